@@ -0,0 +1,229 @@
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import pathlib
+import platform
+import subprocess
+import sys
+
+import pendulum
+
+from benchmarks.harness import BENCHMARKS, run_benchmarks
+from rubby.profiles import CLIENT_PROFILES, PROFILES
+
+RESULTS_DIR = pathlib.Path(__file__).parent / "results"
+# Relative slowdown tolerated on latencies and allocations before it is flagged.
+DEFAULT_THRESHOLD = 0.2
+# Per-operation counts are deterministic, any increase is a regression.
+COUNT_METRICS = ("db_round_trips", "rest_calls")
+RELATIVE_METRICS = ("p50", "p99", "alloc_peak_bytes")
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args: argparse.Namespace):
+    from benchmarks.suite import create_context
+
+    names = args.benchmarks or [
+        name
+        for name, bench in BENCHMARKS.items()
+        if args.uri or not bench.server_only
+    ]
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        sys.exit(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+    server_only = [name for name in names if BENCHMARKS[name].server_only]
+    if server_only and not args.uri:
+        sys.exit(f"These benchmarks need --uri: {', '.join(server_only)}")
+
+    commit = current_commit()
+    results = {
+        "commit": commit,
+        "python": platform.python_version(),
+        "created_at": pendulum.now("UTC").to_iso8601_string(),
+        "benchmarks": asyncio.run(
+            run_benchmarks(names, functools.partial(create_context, uri=args.uri))
+        ),
+    }
+
+    output = pathlib.Path(args.output or RESULTS_DIR / f"{commit}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+
+    print(
+        f"{'benchmark':<32}{'p50 µs':>10}{'p99 µs':>10}"
+        f"{'peak B':>10}{'db':>7}{'rest':>7}"
+    )
+    for name, result in results["benchmarks"].items():
+        print(
+            f"{name:<32}"
+            f"{result['latency_us']['p50']:>10.1f}"
+            f"{result['latency_us']['p99']:>10.1f}"
+            f"{result['alloc_peak_bytes']:>10.0f}"
+            f"{result['db_round_trips']:>7.2f}"
+            f"{result['rest_calls']:>7.2f}"
+        )
+    print(f"\nSaved results to {output}.")
+
+
+def memory(args: argparse.Namespace):
+    from benchmarks.memory import measure_profile, replay
+
+    if args.replay:
+        result = asyncio.run(
+            replay(args.replay, args.guilds, args.members, args.messages)
+        )
+        print(json.dumps(result))
+        return
+
+    print(
+        f"Replaying {args.guilds} guilds of {args.members} members"
+        f" and {args.messages} messages.\n"
+    )
+    print(
+        f"{'profile':<12}{'RSS MiB':>10}{'members':>10}{'users':>10}{'messages':>10}"
+    )
+    for profile in args.profiles:
+        result = measure_profile(profile, args.guilds, args.members, args.messages)
+        print(
+            f"{profile:<12}"
+            f"{result['rss_bytes'] / 2**20:>10.1f}"
+            f"{result['members']:>10}"
+            f"{result['users']:>10}"
+            f"{result['messages']:>10}"
+        )
+
+
+def database(args: argparse.Namespace):
+    from benchmarks.database import measure_profile
+
+    print(
+        f"Running {args.operations} operations per query shape"
+        f" with {args.concurrency} concurrent workers.\n"
+    )
+    print(f"{'profile':<10}{'query shape':<22}{'p50 ms':>9}{'p99 ms':>9}{'ops/s':>10}")
+    for profile in args.profiles:
+        results = asyncio.run(
+            measure_profile(args.uri, profile, args.operations, args.concurrency)
+        )
+        for shape, result in results.items():
+            print(
+                f"{profile:<10}{shape:<22}"
+                f"{result['p50_ms']:>9.2f}"
+                f"{result['p99_ms']:>9.2f}"
+                f"{result['throughput']:>10.0f}"
+            )
+
+
+def metric(result: dict, name: str) -> float:
+    return result["latency_us"][name] if name in ("p50", "p99") else result[name]
+
+
+def compare(args: argparse.Namespace):
+    base = json.loads(pathlib.Path(args.base).read_text())
+    head = json.loads(pathlib.Path(args.head).read_text())
+    regressions = []
+
+    print(f"Comparing {base['commit']} → {head['commit']}\n")
+    for name, head_result in head["benchmarks"].items():
+        base_result = base["benchmarks"].get(name)
+        if base_result is None:
+            print(f"{name}: new benchmark")
+            continue
+
+        for key in RELATIVE_METRICS + COUNT_METRICS:
+            before, after = metric(base_result, key), metric(head_result, key)
+            change = (after - before) / before if before else 0.0
+            regressed = (
+                after > before if key in COUNT_METRICS else change > args.threshold
+            )
+
+            line = f"{name} {key}: {before:.2f} → {after:.2f} ({change:+.1%})"
+            if regressed:
+                regressions.append(line)
+            print(f"{'!!' if regressed else '  '} {line}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) found.")
+        sys.exit(1)
+    print("\nNo regressions found.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="Benchmarks the bot's hot paths."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks.")
+    run_parser.add_argument("benchmarks", nargs="*", help="Benchmarks to run.")
+    run_parser.add_argument("-o", "--output", help="Where to save the results.")
+    run_parser.add_argument(
+        "--uri",
+        help="Run against a disposable mongod instead of in memory, the"
+        " benchmark database is dropped.",
+    )
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser(
+        "compare", help="Flag regressions between two results files."
+    )
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument(
+        "-t", "--threshold", type=float, default=DEFAULT_THRESHOLD
+    )
+    compare_parser.set_defaults(handler=compare)
+
+    memory_parser = commands.add_parser(
+        "memory", help="Compare the RSS of the runtime profiles."
+    )
+    memory_parser.add_argument(
+        "profiles", nargs="*", default=list(PROFILES), help="Profiles to compare."
+    )
+    memory_parser.add_argument("--guilds", type=int, default=100)
+    memory_parser.add_argument("--members", type=int, default=1_000)
+    memory_parser.add_argument(
+        "--messages", type=int, default=200, help="Messages replayed per guild."
+    )
+    memory_parser.add_argument("--replay", choices=PROFILES, help=argparse.SUPPRESS)
+    memory_parser.set_defaults(handler=memory)
+
+    database_parser = commands.add_parser(
+        "database",
+        help="Compare the database profiles on the giveaway queries, needs a mongod.",
+    )
+    database_parser.add_argument(
+        "profiles",
+        nargs="*",
+        default=list(CLIENT_PROFILES),
+        help="Profiles to compare.",
+    )
+    database_parser.add_argument(
+        "--uri",
+        default="mongodb://localhost:27017",
+        help="A disposable deployment, the benchmark database is dropped.",
+    )
+    database_parser.add_argument("--operations", type=int, default=2_000)
+    database_parser.add_argument("--concurrency", type=int, default=20)
+    database_parser.set_defaults(handler=database)
+
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
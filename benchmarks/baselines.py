@@ -0,0 +1,48 @@
+"""Implementations replaced by faster ones, kept to benchmark them against."""
+
+from typing import Iterable
+
+import pendulum
+
+from rubby.functions.guild_settings import guild_settings
+from rubby.functions.time_object import (
+    DEFAULT_TIMEZONE,
+    FULL_DATE_FORMAT,
+    NORMAL_DATE_FORMAT,
+    SMALL_DATE_FORMAT,
+)
+from rubby.models import Giveaway
+
+
+class EagerTimeObject:
+    def __init__(
+        self,
+        date_time: pendulum.DateTime,
+        small_date_format: str,
+        normal_date_format: str,
+        full_date_format: str,
+    ):
+        self.date_time = date_time
+        self.small_date_format = small_date_format
+        self.normal_date_format = normal_date_format
+        self.full_date_format = full_date_format
+
+
+async def create_eager_time_object(
+    guild_id: int, time: pendulum.DateTime
+) -> EagerTimeObject:
+    """`create_time_object` rendering every format of every object upfront."""
+    settings = await guild_settings.get(guild_id)
+    time = time.in_tz(settings.get("timezone", DEFAULT_TIMEZONE))
+
+    return EagerTimeObject(
+        time,
+        time.format(SMALL_DATE_FORMAT),
+        time.format(NORMAL_DATE_FORMAT),
+        time.format(FULL_DATE_FORMAT),
+    )
+
+
+def decode_giveaway_models(documents: Iterable[dict]) -> list[Giveaway]:
+    """Giveaway documents decoded through the validated pydantic model."""
+    return [Giveaway.model_validate(document) for document in documents]
@@ -0,0 +1,140 @@
+import asyncio
+import datetime
+import random
+import time
+from typing import Awaitable, Callable
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from benchmarks.harness import percentile
+from rubby.database import DatabaseManager, warm_pool
+from rubby.functions.giveaways.end_giveaway import claim_giveaway
+from rubby.functions.giveaways.giveaway_entries import (
+    fetch_participants,
+    is_participant,
+    toggle_participant,
+)
+from rubby.functions.giveaways.giveaway_list import (
+    GiveawayListFilters,
+    fetch_giveaway_page,
+)
+from rubby.profiles import CLIENT_PROFILES
+from rubby.schema import ensure_indexes
+
+DATABASE_NAME = "rubby_benchmark"
+GUILD_COUNT = 10
+GIVEAWAYS_PER_GUILD = 100
+ENTRIES = 1_000
+GUILD_ID_START = 1_200_000_000_000_000_000
+GIVEAWAY_ID_START = 1_210_000_000_000_000_000
+USER_ID_START = 1_220_000_000_000_000_000
+
+
+async def seed(database: AsyncIOMotorDatabase):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    await database.giveaways.insert_many(
+        [
+            {
+                "_id": GIVEAWAY_ID_START + index,
+                "channel_id": GUILD_ID_START + index % GUILD_COUNT + 1,
+                "guild_id": GUILD_ID_START + index % GUILD_COUNT,
+                "created_by": USER_ID_START,
+                "title": "🎉 New giveaway 🎉",
+                "description": "Click on the button below to participate!",
+                "prize": "Discord Nitro",
+                "winner_count": 3,
+                "participant_count": ENTRIES if index == 0 else 0,
+                "allowed_roles": [],
+                "finished_configuring": True,
+                "ended": False,
+                "end_date": now + datetime.timedelta(days=1),
+                "created_at": now,
+            }
+            for index in range(GUILD_COUNT * GIVEAWAYS_PER_GUILD)
+        ]
+    )
+    await database.giveaway_entries.insert_many(
+        [
+            {"giveaway_id": GIVEAWAY_ID_START, "user_id": USER_ID_START + user}
+            for user in range(ENTRIES)
+        ]
+    )
+
+
+def random_giveaway(rng: random.Random) -> int:
+    # The first giveaway holds the entries read by `fetch_participants`.
+    return GIVEAWAY_ID_START + rng.randrange(1, GUILD_COUNT * GIVEAWAYS_PER_GUILD)
+
+
+def query_shapes(rng: random.Random) -> dict[str, Callable[[], Awaitable]]:
+    return {
+        "toggle_participant": lambda: toggle_participant(
+            random_giveaway(rng), USER_ID_START + rng.randrange(ENTRIES)
+        ),
+        "is_participant": lambda: is_participant(
+            GIVEAWAY_ID_START, USER_ID_START + rng.randrange(ENTRIES * 2)
+        ),
+        "claim_giveaway": lambda: claim_giveaway(random_giveaway(rng), force=True),
+        "fetch_giveaway_page": lambda: fetch_giveaway_page(
+            GUILD_ID_START + rng.randrange(GUILD_COUNT), GiveawayListFilters()
+        ),
+        "fetch_participants": lambda: fetch_participants(GIVEAWAY_ID_START),
+    }
+
+
+async def measure_shape(
+    operation: Callable[[], Awaitable], operations: int, concurrency: int
+) -> dict:
+    latencies: list[float] = []
+    remaining = iter(range(operations))
+
+    async def worker():
+        for _ in remaining:
+            start_time = time.perf_counter()
+            await operation()
+            latencies.append(time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start_time
+
+    return {
+        "p50_ms": percentile(latencies, 0.50) * 1_000,
+        "p99_ms": percentile(latencies, 0.99) * 1_000,
+        "throughput": operations / elapsed,
+    }
+
+
+async def measure_profile(
+    uri: str, profile_name: str, operations: int, concurrency: int
+) -> dict[str, dict]:
+    """Runs the giveaway query shapes through a client built from a profile.
+
+    Each shape uses the operation class the bot uses for it.
+    """
+    profile = CLIENT_PROFILES[profile_name]
+    client = AsyncIOMotorClient(uri, **profile.options())
+
+    # The bot's functions get their database through the manager.
+    manager = DatabaseManager.__new__(DatabaseManager)
+    manager.client = client
+    manager.database_name = DATABASE_NAME
+    manager.initialized = True
+    DatabaseManager._instance = manager
+
+    try:
+        await client.drop_database(DATABASE_NAME)
+        database = client[DATABASE_NAME]
+        await ensure_indexes(database)
+        await seed(database)
+        await warm_pool(client, profile.min_pool_size)
+
+        rng = random.Random(0)
+        return {
+            name: await measure_shape(operation, operations, concurrency)
+            for name, operation in query_shapes(rng).items()
+        }
+    finally:
+        await client.drop_database(DATABASE_NAME)
+        client.close()
+        DatabaseManager._instance = None
@@ -0,0 +1,284 @@
+import itertools
+from types import SimpleNamespace
+from typing import Optional
+
+import disnake
+import pendulum
+from mongomock_motor import AsyncMongoMockClient
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from rubby.database import DatabaseManager
+
+DATABASE_NAME = "rubby_benchmark"
+# Motor fetches results in batches, the first one being 101 documents.
+CURSOR_BATCH_SIZE = 101
+
+COLLECTION_METHODS = {
+    "bulk_write",
+    "count_documents",
+    "create_indexes",
+    "delete_many",
+    "delete_one",
+    "find_one",
+    "find_one_and_update",
+    "insert_many",
+    "insert_one",
+    "update_many",
+    "update_one",
+}
+
+
+class Counters:
+    def __init__(self):
+        self.db_round_trips = 0
+        self.rest_calls = 0
+
+    def reset(self):
+        self.db_round_trips = 0
+        self.rest_calls = 0
+
+
+class CountingCursor:
+    def __init__(self, cursor, counters: Counters):
+        self.cursor = cursor
+        self.counters = counters
+        self.returned = 0
+
+    def sort(self, *args, **kwargs) -> "CountingCursor":
+        self.cursor = self.cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, *args) -> "CountingCursor":
+        self.cursor = self.cursor.limit(*args)
+        return self
+
+    def skip(self, *args) -> "CountingCursor":
+        self.cursor = self.cursor.skip(*args)
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> list:
+        documents = await self.cursor.to_list(length)
+        self.counters.db_round_trips += max(
+            1, -(-len(documents) // CURSOR_BATCH_SIZE)
+        )
+        return documents
+
+    async def explain(self) -> dict:
+        self.counters.db_round_trips += 1
+        return await self.cursor.explain()
+
+    def __aiter__(self) -> "CountingCursor":
+        return self
+
+    async def __anext__(self):
+        if self.returned % CURSOR_BATCH_SIZE == 0:
+            self.counters.db_round_trips += 1
+        document = await self.cursor.__anext__()
+        self.returned += 1
+        return document
+
+
+class CountingCollection:
+    def __init__(self, collection, counters: Counters):
+        self.collection = collection
+        self.counters = counters
+
+    def find(self, *args, **kwargs) -> CountingCursor:
+        return CountingCursor(self.collection.find(*args, **kwargs), self.counters)
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.collection, name)
+        if name not in COLLECTION_METHODS:
+            return attribute
+
+        async def counted(*args, **kwargs):
+            self.counters.db_round_trips += 1
+            return await attribute(*args, **kwargs)
+
+        return counted
+
+
+class CountingDatabase:
+    """In-memory stand-in for a Motor database that counts round trips."""
+
+    def __init__(self, database, counters: Counters):
+        self.database = database
+        self.counters = counters
+
+    def __getitem__(self, name: str) -> CountingCollection:
+        return CountingCollection(self.database[name], self.counters)
+
+    def __getattr__(self, name: str) -> CountingCollection:
+        return self[name]
+
+
+class CountingClient:
+    def __init__(self, counters: Counters, uri: Optional[str] = None):
+        self.client = AsyncIOMotorClient(uri) if uri else AsyncMongoMockClient()
+        self.server = uri is not None
+        self.counters = counters
+
+    def __getitem__(self, name: str) -> CountingDatabase:
+        return CountingDatabase(self.client[name], self.counters)
+
+    def get_database(self, name: str, **options) -> CountingDatabase:
+        if not self.server:
+            # Write concerns and read preferences don't apply to one in-memory
+            # node.
+            return self[name]
+        return CountingDatabase(
+            self.client.get_database(name, **options), self.counters
+        )
+
+
+async def install_database(
+    counters: Counters, uri: Optional[str] = None
+) -> CountingDatabase:
+    """Points the bot at an in-memory database, or at an empty one on `uri`."""
+    # `get_database` goes through the manager, so replacing its instance is
+    # enough for every module to use the stand-in.
+    manager = DatabaseManager.__new__(DatabaseManager)
+    manager.client = CountingClient(counters, uri)
+    manager.database_name = DATABASE_NAME
+    manager.initialized = True
+    DatabaseManager._instance = manager
+
+    if uri:
+        await manager.client.client.drop_database(DATABASE_NAME)
+    return manager.client[DATABASE_NAME]
+
+
+snowflakes = itertools.count(1_150_000_000_000_000_000)
+
+
+class FakeRole:
+    def __init__(self, role_id: int):
+        self.id = role_id
+
+
+class FakeUser:
+    def __init__(self, user_id: int, roles: list[int] = (), administrator=False):
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.discriminator = "0"
+        self.bot = False
+        self.created_at = pendulum.datetime(2020, 1, 1)
+        self.display_avatar = SimpleNamespace(url="https://cdn.example/avatar.png")
+        self.avatar = self.display_avatar
+        self.accent_color = None
+        self.roles = [FakeRole(role_id) for role_id in roles]
+        self.guild_permissions = SimpleNamespace(administrator=administrator)
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.name = f"guild{guild_id}"
+
+
+class FakeMessage:
+    def __init__(
+        self, channel: "FakeChannel", message_id: int = None, embeds: list = None
+    ):
+        self.channel = channel
+        self.id = message_id or next(snowflakes)
+        self.embeds = embeds or []
+        self.jump_url = f"https://discord.com/channels/0/{channel.id}/{self.id}"
+
+    async def edit(self, **fields) -> "FakeMessage":
+        self.channel.counters.rest_calls += 1
+        if "embed" in fields:
+            self.embeds = [fields["embed"]]
+        return self
+
+    async def reply(self, content=None, **fields) -> "FakeMessage":
+        self.channel.counters.rest_calls += 1
+        return FakeMessage(self.channel)
+
+    async def delete(self):
+        self.channel.counters.rest_calls += 1
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, counters: Counters):
+        self.id = channel_id
+        self.counters = counters
+
+    def get_partial_message(self, message_id: int) -> FakeMessage:
+        return FakeMessage(self, message_id)
+
+    async def fetch_message(self, message_id: int) -> FakeMessage:
+        self.counters.rest_calls += 1
+        return FakeMessage(self, message_id)
+
+    async def send(self, content=None, **fields) -> FakeMessage:
+        self.counters.rest_calls += 1
+        return FakeMessage(self)
+
+
+class FakeBot:
+    """Stand-in for the bot with a gateway cache of `cached_users`."""
+
+    def __init__(self, counters: Counters, cached_users: list[FakeUser] = ()):
+        self.counters = counters
+        self.users = {user.id: user for user in cached_users}
+        self.channels: dict[int, FakeChannel] = {}
+
+    def get_user(self, user_id: int) -> Optional[FakeUser]:
+        return self.users.get(user_id)
+
+    async def fetch_user(self, user_id: int) -> FakeUser:
+        self.counters.rest_calls += 1
+        return FakeUser(user_id)
+
+    def get_channel(self, channel_id: int) -> FakeChannel:
+        return self.channels.setdefault(
+            channel_id, FakeChannel(channel_id, self.counters)
+        )
+
+    def get_partial_messageable(self, channel_id: int, **kwargs) -> FakeChannel:
+        return self.get_channel(channel_id)
+
+
+class FakeResponse:
+    def __init__(self, counters: Counters):
+        self.counters = counters
+
+    async def defer(self, **kwargs):
+        self.counters.rest_calls += 1
+
+    async def edit_message(self, **kwargs):
+        self.counters.rest_calls += 1
+
+
+class FakeFollowup:
+    def __init__(self, counters: Counters):
+        self.counters = counters
+
+    async def send(self, *args, **kwargs):
+        self.counters.rest_calls += 1
+
+
+class FakeInteraction:
+    def __init__(
+        self,
+        bot: FakeBot,
+        guild: FakeGuild,
+        user: FakeUser,
+        message: Optional[FakeMessage] = None,
+        custom_id: Optional[str] = None,
+    ):
+        self.client = bot
+        self.guild = guild
+        self.user = self.author = user
+        self.message = message
+        self.channel = message.channel if message else None
+        self.component = SimpleNamespace(custom_id=custom_id)
+        self.response = FakeResponse(bot.counters)
+        self.followup = FakeFollowup(bot.counters)
+
+
+def create_embed() -> disnake.Embed:
+    embed = disnake.Embed(title="🎉 New giveaway 🎉", description="Click below!")
+    embed.set_footer(text="Max Winners: 1 • Hosted by @host")
+    return embed
@@ -0,0 +1,121 @@
+import asyncio
+import gc
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from benchmarks.fakes import Counters
+
+Operation = Callable[[Any], Awaitable[None]]
+
+
+@dataclass
+class Benchmark:
+    name: str
+    run: Operation
+    # Runs before every operation, outside of the measurements.
+    setup: Optional[Operation] = None
+    # Runs once before the benchmark, e.g. to seed the database.
+    prepare: Optional[Operation] = None
+    iterations: int = 500
+    allocation_iterations: int = 50
+    # Only run against a real server, the in-memory database being too slow.
+    server_only: bool = False
+
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(
+    name: str,
+    setup: Optional[Operation] = None,
+    prepare: Optional[Operation] = None,
+    iterations: int = 500,
+    allocation_iterations: int = 50,
+    server_only: bool = False,
+):
+    def decorator(run: Operation) -> Operation:
+        BENCHMARKS[name] = Benchmark(
+            name, run, setup, prepare, iterations, allocation_iterations, server_only
+        )
+        return run
+
+    return decorator
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def measure(bench: Benchmark, context: Any, counters: Counters) -> dict:
+    latencies: list[float] = []
+    db_round_trips = rest_calls = 0
+
+    if bench.prepare:
+        await bench.prepare(context)
+
+    gc.collect()
+    for _ in range(bench.iterations):
+        if bench.setup:
+            await bench.setup(context)
+
+        counters.reset()
+        start_time = time.perf_counter_ns()
+        await bench.run(context)
+        latencies.append((time.perf_counter_ns() - start_time) / 1_000)
+
+        db_round_trips += counters.db_round_trips
+        rest_calls += counters.rest_calls
+
+    # Allocations are measured in a separate, shorter pass since tracing them
+    # slows every operation down.
+    peaks: list[int] = []
+    retained = 0
+    tracemalloc.start()
+    for _ in range(bench.allocation_iterations):
+        if bench.setup:
+            await bench.setup(context)
+
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        await bench.run(context)
+        after, peak = tracemalloc.get_traced_memory()
+
+        peaks.append(peak - before)
+        retained += after - before
+    tracemalloc.stop()
+
+    return {
+        "iterations": bench.iterations,
+        "latency_us": {
+            "mean": sum(latencies) / len(latencies),
+            "p50": percentile(latencies, 0.50),
+            "p90": percentile(latencies, 0.90),
+            "p99": percentile(latencies, 0.99),
+            "max": max(latencies),
+        },
+        "alloc_peak_bytes": sum(peaks) / len(peaks),
+        "alloc_retained_bytes": retained / bench.allocation_iterations,
+        "db_round_trips": db_round_trips / bench.iterations,
+        "rest_calls": rest_calls / bench.iterations,
+    }
+
+
+async def run_benchmarks(
+    names: list[str], create_context: Callable[[Counters], Awaitable[Any]]
+) -> dict:
+    results = {}
+    for name in names:
+        counters = Counters()
+        context = await create_context(counters)
+        results[name] = await measure(BENCHMARKS[name], context, counters)
+
+        # Let background tasks (coalesced edits, cache loads) settle so they
+        # don't leak into the next benchmark.
+        for task in asyncio.all_tasks() - {asyncio.current_task()}:
+            task.cancel()
+        await asyncio.sleep(0)
+    return results
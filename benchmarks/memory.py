@@ -0,0 +1,217 @@
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+
+from disnake.ext import commands
+
+from rubby.profiles import PROFILES, RuntimeProfile
+
+BOT_ID = 1_100_000_000_000_000_000
+GUILD_ID_START = 1_110_000_000_000_000_000
+USER_ID_START = 1_120_000_000_000_000_000
+MESSAGE_ID_START = 1_130_000_000_000_000_000
+CHANNELS_PER_GUILD = 20
+ROLES_PER_GUILD = 30
+TIMESTAMP = "2024-01-01T00:00:00.000000+00:00"
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak rather than current RSS, in KiB on Linux but bytes on macOS.
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+def user_payload(user_id: int) -> dict:
+    return {
+        "id": str(user_id),
+        "username": f"user{user_id}",
+        "global_name": None,
+        "discriminator": "0",
+        "avatar": "a" * 32,
+        "bot": user_id == BOT_ID,
+    }
+
+
+def member_payload(guild_id: int, user_id: int) -> dict:
+    return {
+        "user": user_payload(user_id),
+        "nick": None,
+        "roles": [str(guild_id + 1 + user_id % ROLES_PER_GUILD)],
+        "joined_at": TIMESTAMP,
+        "deaf": False,
+        "mute": False,
+    }
+
+
+def presence_payload(user_id: int) -> dict:
+    return {
+        "user": {"id": str(user_id)},
+        "status": "online",
+        "activities": [{"name": "Rubby", "type": 0}],
+        "client_status": {"desktop": "online"},
+    }
+
+
+def guild_create_payload(
+    profile: RuntimeProfile, index: int, member_count: int
+) -> dict:
+    guild_id = GUILD_ID_START + index * 1_000
+    user_ids = [BOT_ID] + [
+        USER_ID_START + index * member_count + member for member in range(member_count)
+    ]
+    # Discord only sends every member (as chunks) with the members intent, and
+    # their presences with the presences intent.
+    members = user_ids if profile.intents.members else [BOT_ID]
+
+    return {
+        "id": str(guild_id),
+        "name": f"Guild {index}",
+        "icon": None,
+        "owner_id": str(user_ids[-1]),
+        "features": [],
+        "emojis": [],
+        "stickers": [],
+        "large": member_count >= 250,
+        "member_count": member_count + 1,
+        "roles": [
+            {
+                "id": str(guild_id + role),
+                "name": "@everyone" if role == 0 else f"Role {role}",
+                "color": 0,
+                "colors": {
+                    "primary_color": 0,
+                    "secondary_color": None,
+                    "tertiary_color": None,
+                },
+                "hoist": False,
+                "position": role,
+                "permissions": "0",
+                "managed": False,
+                "mentionable": False,
+            }
+            for role in range(ROLES_PER_GUILD + 1)
+        ],
+        "channels": [
+            {
+                "id": str(guild_id + ROLES_PER_GUILD + 1 + channel),
+                "type": 0,
+                "name": f"channel-{channel}",
+                "position": channel,
+                "permission_overwrites": [],
+            }
+            for channel in range(CHANNELS_PER_GUILD)
+        ],
+        "members": [member_payload(guild_id, user_id) for user_id in members],
+        "presences": (
+            [presence_payload(user_id) for user_id in user_ids[1:]]
+            if profile.intents.presences
+            else []
+        ),
+        "voice_states": [],
+        "threads": [],
+    }
+
+
+def message_payload(guild: dict, message_id: int) -> dict:
+    author_id = int(guild["owner_id"])
+    return {
+        "id": str(message_id),
+        "channel_id": guild["channels"][message_id % CHANNELS_PER_GUILD]["id"],
+        "guild_id": guild["id"],
+        "author": user_payload(author_id),
+        "member": {"roles": [], "joined_at": TIMESTAMP, "deaf": False, "mute": False},
+        "content": "Hello there! " * 5,
+        "timestamp": TIMESTAMP,
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+    }
+
+
+async def replay(
+    profile_name: str, guild_count: int, member_count: int, message_count: int
+) -> dict:
+    profile = PROFILES[profile_name]
+    bot = commands.InteractionBot(**profile.options())
+    state = bot._connection
+
+    gc.collect()
+    baseline = rss_bytes()
+
+    state.parse_ready(
+        {
+            "v": 10,
+            "user": user_payload(BOT_ID),
+            "guilds": [
+                {"id": str(GUILD_ID_START + index * 1_000), "unavailable": True}
+                for index in range(guild_count)
+            ],
+            "session_id": "benchmark",
+            "application": {"id": str(BOT_ID), "flags": 0},
+        }
+    )
+    # READY is followed by one GUILD_CREATE per guild, the bot does not wait
+    # for them since it is never connected.
+    state._ready_task.cancel()
+    del state._ready_state
+
+    message_id = MESSAGE_ID_START
+    for index in range(guild_count):
+        guild = guild_create_payload(profile, index, member_count)
+        state.parse_guild_create(guild)
+
+        if profile.intents.guild_messages:
+            for _ in range(message_count):
+                state.parse_message_create(message_payload(guild, message_id))
+                message_id += 1
+
+    del guild
+    gc.collect()
+
+    return {
+        "profile": profile_name,
+        "rss_bytes": rss_bytes() - baseline,
+        "guilds": len(bot.guilds),
+        "members": sum(len(guild.members) for guild in bot.guilds),
+        "users": len(bot.users),
+        "messages": len(bot.cached_messages),
+    }
+
+
+def measure_profile(
+    profile_name: str, guild_count: int, member_count: int, message_count: int
+) -> dict:
+    """Replays the gateway stream in a fresh process so RSS is not shared."""
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks",
+            "memory",
+            "--replay",
+            profile_name,
+            "--guilds",
+            str(guild_count),
+            "--members",
+            str(member_count),
+            "--messages",
+            str(message_count),
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
@@ -0,0 +1,446 @@
+import contextlib
+import datetime
+import functools
+import importlib
+import itertools
+import random
+from typing import AsyncIterator, Optional
+
+import disnake
+import pendulum
+
+from benchmarks.baselines import create_eager_time_object, decode_giveaway_models
+from benchmarks.fakes import (
+    Counters,
+    CountingDatabase,
+    FakeBot,
+    FakeChannel,
+    FakeGuild,
+    FakeInteraction,
+    FakeMessage,
+    FakeUser,
+    create_embed,
+    install_database,
+    snowflakes,
+)
+from benchmarks.harness import benchmark
+from rubby.cogs.games.giveaway_events import GiveawayEvents
+from rubby.cogs.timezone import TIMEZONE_INDEX, auto_complete_timezones
+from rubby.components import ComponentRouter, component_id
+from rubby.functions.giveaways.create_giveaway_embed import (
+    create_giveaway_embed,
+    render_giveaway_embed,
+)
+from rubby.functions.giveaways.draw_winners import draw_winners
+from rubby.functions.giveaways.giveaway_entries import ENTRIES_PAGE_SIZE
+from rubby.functions.giveaways.giveaway_scheduler import giveaway_scheduler
+from rubby.functions.guild_settings import guild_settings
+from rubby.functions.time_object import TimeObject, create_time_object
+from rubby.functions.timezone_index import TIMEZONE_ALIASES
+from rubby.functions.truncate_components import truncate_embed
+from rubby.functions.user_cache import user_cache
+from rubby.functions.user_details import UserDetails, get_user_details
+from rubby.models import GiveawayRecord
+from rubby.schema import ensure_indexes
+
+GUILD_COUNT = 10
+USER_COUNT = 500
+ENDING_PARTICIPANTS = 200
+# Entries already in the giveaway when toggling, the larger collections are
+# too slow to seed and scan in memory and need a server (`run --uri`).
+ENTER_TOGGLE_ENTRIES = {"10": 10, "1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+IN_MEMORY_ENTRIES = 1_000
+SEED_BATCH_SIZE = 10_000
+ENTRANT_ID_START = 1_160_000_000_000_000_000
+GIVEAWAY_DOCUMENT_ID_START = 1_170_000_000_000_000_000
+FORMATTED_DATES = [pendulum.datetime(2030, 1, 1, 12, minute) for minute in range(5)]
+# Entrants of the draws, streamed from a stub of the entries collection so the
+# draws measure the sampling alone. Unweighted draws only ever hold a page of
+# entries and the reservoir, weighted ones every weight.
+DRAW_ENTRANTS = {"1k": 1_000, "100k": 100_000, "10m": 10_000_000}
+WEIGHTED_DRAW_ENTRANTS = {"1k": 1_000, "100k": 100_000}
+DRAW_WINNERS = 3
+DECODED_GIVEAWAYS = 100_000
+EMBED_END_DATES = 24
+TIMEZONE_QUERIES = ["eu", "europe/pa", "new york", "utc+2", "tokyo", "", "kol"]
+
+
+def create_timezone_search_queries() -> list[str]:
+    # What users type on their way to a zone: prefixes of its name, part of its
+    # city, an alias or an offset.
+    queries = list(TIMEZONE_ALIASES)
+    queries += [f"utc{hours:+d}" for hours in range(-12, 15)]
+    queries += ["+05:30", "gmt-3:30", "utc+5:45"]
+    for name in pendulum.timezones():
+        lowered = name.lower()
+        city = lowered.rpartition("/")[2].replace("_", " ")
+        queries += [lowered[:2], lowered[:6], lowered[:10], city[1:5]]
+    return list(dict.fromkeys(query for query in queries if query.strip()))
+
+
+TIMEZONE_SEARCH_QUERIES = create_timezone_search_queries()
+
+
+class BenchmarkContext:
+    def __init__(self, counters: Counters, database: CountingDatabase):
+        self.counters = counters
+        self.database = database
+        self.rng = random.Random(0)
+
+        self.guilds = [FakeGuild(next(snowflakes)) for _ in range(GUILD_COUNT)]
+        self.users = [FakeUser(next(snowflakes)) for _ in range(USER_COUNT)]
+        # Half of the users are in the gateway cache, the others need a fetch.
+        self.bot = FakeBot(counters, self.users[: USER_COUNT // 2])
+        self.channel = FakeChannel(next(snowflakes), counters)
+
+        self.events = GiveawayEvents.__new__(GiveawayEvents)
+        self.events.bot = self.bot
+        self.router = ComponentRouter()
+        self.router.add_route("giveaway:enter", self.events.enter_giveaway)
+        self.cycle = itertools.count()
+        self.giveaway_id = None
+        self.documents: list[dict] = []
+        self.end_dates: list[TimeObject] = []
+
+    def next_item(self, items: list):
+        return items[next(self.cycle) % len(items)]
+
+
+async def create_context(
+    counters: Counters, uri: Optional[str] = None
+) -> BenchmarkContext:
+    guild_settings.entries.clear()
+    guild_settings.loading.clear()
+    user_cache.entries.clear()
+    user_cache.loading.clear()
+    render_giveaway_embed.cache_clear()
+
+    context = BenchmarkContext(counters, await install_database(counters, uri))
+    await ensure_indexes(context.database)
+    await context.database.guilds.insert_many(
+        [
+            {"_id": guild.id, "name": guild.name, "timezone": "Europe/Paris"}
+            for guild in context.guilds
+        ]
+    )
+    return context
+
+
+async def insert_giveaway(
+    context: BenchmarkContext, end_date: datetime.datetime, participants: int = 0
+) -> int:
+    giveaway_id = next(snowflakes)
+    await context.database.giveaways.insert_one(
+        {
+            "_id": giveaway_id,
+            "channel_id": context.channel.id,
+            "guild_id": context.guilds[0].id,
+            "created_by": context.users[0].id,
+            "title": "🎉 New giveaway 🎉",
+            "description": "Click on the button below to participate!",
+            "prize": "Discord Nitro",
+            "winner_count": 3,
+            "participant_count": participants,
+            "allowed_roles": [],
+            "finished_configuring": True,
+            "ended": False,
+            "end_date": end_date,
+            "created_at": end_date,
+        }
+    )
+
+    if participants:
+        await context.database.giveaway_entries.insert_many(
+            [
+                {"giveaway_id": giveaway_id, "user_id": user.id}
+                for user in context.users[:participants]
+            ]
+        )
+    return giveaway_id
+
+
+async def seed_entries(context: BenchmarkContext, giveaway_id: int, entries: int):
+    # Entrants other than the users, who toggle their entry on top of them.
+    for start in range(0, entries, SEED_BATCH_SIZE):
+        await context.database.giveaway_entries.insert_many(
+            [
+                {"giveaway_id": giveaway_id, "user_id": ENTRANT_ID_START + entrant}
+                for entrant in range(start, min(entries, start + SEED_BATCH_SIZE))
+            ]
+        )
+    await context.database.giveaways.update_one(
+        {"_id": giveaway_id}, {"$set": {"participant_count": entries}}
+    )
+
+
+async def prepare_active_giveaway(context: BenchmarkContext, entries: int = 0):
+    context.giveaway_id = await insert_giveaway(
+        context, datetime.datetime.utcnow() + datetime.timedelta(days=1)
+    )
+    await seed_entries(context, context.giveaway_id, entries)
+
+
+async def giveaway_enter_toggle(context: BenchmarkContext):
+    inter = FakeInteraction(
+        context.bot,
+        context.guilds[0],
+        context.rng.choice(context.users),
+        FakeMessage(context.channel, context.giveaway_id, [create_embed()]),
+        component_id("giveaway:enter", context.giveaway_id),
+    )
+    await context.router.on_button_click(inter)
+
+
+for label, entries in ENTER_TOGGLE_ENTRIES.items():
+    benchmark(
+        f"giveaway_enter_toggle_{label}",
+        prepare=functools.partial(prepare_active_giveaway, entries=entries),
+        server_only=entries > IN_MEMORY_ENTRIES,
+    )(giveaway_enter_toggle)
+
+
+async def setup_ended_giveaway(context: BenchmarkContext):
+    # Entries of ended giveaways are cleared so every ending sees the same
+    # collection size.
+    await context.database.giveaway_entries.delete_many({})
+    context.giveaway_id = await insert_giveaway(
+        context,
+        datetime.datetime.utcnow() - datetime.timedelta(minutes=1),
+        ENDING_PARTICIPANTS,
+    )
+
+
+@benchmark(
+    "end_giveaways",
+    setup=setup_ended_giveaway,
+    iterations=100,
+    allocation_iterations=20,
+)
+async def end_giveaways(context: BenchmarkContext):
+    await giveaway_scheduler.process(
+        [context.giveaway_id], context.events.end_giveaway
+    )
+
+
+async def iter_stub_entries(
+    entrants: int, page_size: int = ENTRIES_PAGE_SIZE
+) -> AsyncIterator[list[dict]]:
+    for start in range(0, entrants, page_size):
+        yield [
+            {"user_id": ENTRANT_ID_START + entrant, "weight": 1 + entrant % 2}
+            for entrant in range(start, min(entrants, start + page_size))
+        ]
+
+
+async def iter_stub_participants(
+    entrants: int, page_size: int = ENTRIES_PAGE_SIZE
+) -> AsyncIterator[list[int]]:
+    for start in range(0, entrants, page_size):
+        yield list(
+            range(
+                ENTRANT_ID_START + start,
+                ENTRANT_ID_START + min(entrants, start + page_size),
+            )
+        )
+
+
+@contextlib.contextmanager
+def stub_entries(entrants: int):
+    # The package exports the `draw_winners` function under the module's name.
+    module = importlib.import_module("rubby.functions.giveaways.draw_winners")
+    iterators = module.iter_entries, module.iter_participants
+    module.iter_entries = lambda giveaway_id: iter_stub_entries(entrants)
+    module.iter_participants = lambda giveaway_id: iter_stub_participants(entrants)
+    try:
+        yield
+    finally:
+        module.iter_entries, module.iter_participants = iterators
+
+
+async def draw_winners_benchmark(
+    context: BenchmarkContext, entrants: int, role_weights: dict[str, int]
+):
+    giveaway = GiveawayRecord(
+        next(snowflakes), winner_count=DRAW_WINNERS, role_weights=role_weights
+    )
+    with stub_entries(entrants):
+        await draw_winners(giveaway)
+
+
+def draw_iterations(entrants: int) -> dict:
+    # About as many entrants drawn from per benchmark whatever their number.
+    return {
+        "iterations": max(3, min(500, 5_000_000 // entrants)),
+        "allocation_iterations": max(1, min(50, 500_000 // entrants)),
+    }
+
+
+for label, entrants in DRAW_ENTRANTS.items():
+    benchmark(f"draw_winners_{label}", **draw_iterations(entrants))(
+        functools.partial(draw_winners_benchmark, entrants=entrants, role_weights={})
+    )
+
+for label, entrants in WEIGHTED_DRAW_ENTRANTS.items():
+    benchmark(f"draw_weighted_winners_{label}", **draw_iterations(entrants))(
+        functools.partial(
+            draw_winners_benchmark, entrants=entrants, role_weights={"1": 2}
+        )
+    )
+
+
+async def prepare_giveaway_documents(context: BenchmarkContext):
+    # Dates are pendulum instances, which the pydantic model requires and
+    # records accept as well.
+    created_at = pendulum.datetime(2024, 1, 1)
+    context.documents = [
+        {
+            "_id": GIVEAWAY_DOCUMENT_ID_START + index,
+            "channel_id": context.channel.id,
+            "guild_id": context.guilds[index % GUILD_COUNT].id,
+            "created_by": context.users[index % USER_COUNT].id,
+            "title": "🎉 New giveaway 🎉",
+            "description": "Click on the button below to participate!",
+            "prize": "Discord Nitro",
+            "winner_count": 3,
+            "participant_count": index % 1_000,
+            "allowed_roles": [],
+            "role_weights": {},
+            "finished_configuring": True,
+            "ended": index % 2 == 0,
+            "winners": [],
+            "draw_order": [],
+            "end_date": created_at.add(days=7),
+            "created_at": created_at,
+        }
+        for index in range(DECODED_GIVEAWAYS)
+    ]
+
+
+# Decoding the documents of a large listing, or of every giveaway the scheduler
+# loads, into records and into the pydantic model they replaced. The allocation
+# peak is the memory the decoded giveaways take.
+@benchmark(
+    "decode_giveaways_100k",
+    prepare=prepare_giveaway_documents,
+    iterations=10,
+    allocation_iterations=2,
+)
+async def decode_giveaways_benchmark(context: BenchmarkContext):
+    GiveawayRecord.decode_many(context.documents)
+
+
+@benchmark(
+    "decode_giveaways_100k_baseline",
+    prepare=prepare_giveaway_documents,
+    iterations=10,
+    allocation_iterations=2,
+)
+async def decode_giveaways_baseline_benchmark(context: BenchmarkContext):
+    decode_giveaway_models(context.documents)
+
+
+@benchmark("create_time_object")
+async def create_time_object_benchmark(context: BenchmarkContext):
+    guild = context.next_item(context.guilds)
+    await create_time_object(guild.id, pendulum.datetime(2030, 1, 1, 12))
+
+
+# Formats an end date as the giveaway buttons do, for a few recurring minutes,
+# against the eager implementation it replaced.
+@benchmark("format_time_object")
+async def format_time_object_benchmark(context: BenchmarkContext):
+    guild = context.next_item(context.guilds)
+    end_date = await create_time_object(guild.id, context.next_item(FORMATTED_DATES))
+    end_date.normal_date_format
+
+
+@benchmark("format_time_object_baseline")
+async def format_time_object_baseline_benchmark(context: BenchmarkContext):
+    guild = context.next_item(context.guilds)
+    end_date = await create_eager_time_object(
+        guild.id, context.next_item(FORMATTED_DATES)
+    )
+    end_date.normal_date_format
+
+
+async def prepare_embed_end_dates(context: BenchmarkContext):
+    guild_id = context.guilds[0].id
+    context.end_dates = [
+        await create_time_object(guild_id, pendulum.datetime(2030, 1, 1, hour))
+        for hour in range(EMBED_END_DATES)
+    ]
+
+
+async def clear_embed_cache(context: BenchmarkContext):
+    render_giveaway_embed.cache_clear()
+
+
+def render_embed(winner_count: int, end_date: TimeObject):
+    create_giveaway_embed(
+        UserDetails(1, "@host", pendulum.datetime(2020, 1, 1)),
+        "🎉 New giveaway 🎉",
+        "Click on the button below to participate!",
+        winner_count,
+        end_date,
+        [1, 2, 3],
+        {"4": 2},
+    )
+
+
+# Every giveaway renders its own embed, so the render is measured over varying
+# configurations with its cache cleared, and cache hits on their own, as when
+# a few giveaways are being edited.
+@benchmark(
+    "create_giveaway_embed",
+    setup=clear_embed_cache,
+    prepare=prepare_embed_end_dates,
+)
+async def create_giveaway_embed_benchmark(context: BenchmarkContext):
+    render_embed(context.rng.randrange(1, 20), context.next_item(context.end_dates))
+
+
+@benchmark("create_giveaway_embed_cached", prepare=prepare_embed_end_dates)
+async def create_giveaway_embed_cached_benchmark(context: BenchmarkContext):
+    render_embed(context.next_item([1, 2, 3, 5]), context.end_dates[0])
+
+
+def create_oversized_embed() -> disnake.Embed:
+    embed = disnake.Embed(title="t" * 300, description="**bold** " * 600)
+    for index in range(30):
+        embed.add_field(name=f"Field {index} " * 30, value="<@123456789> " * 100)
+    embed.set_footer(text="footer " * 400)
+    return embed
+
+
+OVERSIZED_EMBED = create_oversized_embed()
+
+
+@benchmark("truncate_embed")
+async def truncate_embed_benchmark(context: BenchmarkContext):
+    truncate_embed(OVERSIZED_EMBED)
+
+
+async def clear_timezone_search_cache(context: BenchmarkContext):
+    TIMEZONE_INDEX.cached_search.cache_clear()
+
+
+# Each keystroke is a new query, so the search itself is measured over distinct
+# queries with its cache cleared, and cache hits on their own.
+@benchmark(
+    "auto_complete_timezones",
+    setup=clear_timezone_search_cache,
+    iterations=len(TIMEZONE_SEARCH_QUERIES),
+)
+async def auto_complete_timezones_benchmark(context: BenchmarkContext):
+    await auto_complete_timezones(None, context.next_item(TIMEZONE_SEARCH_QUERIES))
+
+
+@benchmark("auto_complete_timezones_cached")
+async def auto_complete_timezones_cached_benchmark(context: BenchmarkContext):
+    await auto_complete_timezones(None, context.next_item(TIMEZONE_QUERIES))
+
+
+@benchmark("get_user_details")
+async def get_user_details_benchmark(context: BenchmarkContext):
+    user = context.rng.choice(context.users)
+    await get_user_details(user.id, context.bot)
@@ -0,0 +1,3 @@
+from rubby.main import start
+
+start()
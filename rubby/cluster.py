@@ -0,0 +1,85 @@
+import os
+import socket
+import uuid
+from typing import Optional
+
+from rubby.misc import Config
+
+# Identifies this process in the leases it takes on shared work.
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def shard_for_guild(guild_id: int, shard_count: int) -> int:
+    return (guild_id >> 22) % shard_count
+
+
+def owns_guild(guild_id: int) -> bool:
+    """Whether the guild is on one of the shards this process runs."""
+    if not Config.SHARD_COUNT or Config.SHARD_IDS is None:
+        return True
+    return shard_for_guild(guild_id, Config.SHARD_COUNT) in Config.SHARD_IDS
+
+
+def owned_guilds_filter(field: str = "guild_id") -> dict:
+    """Query filter for the guilds of `owns_guild`, evaluated by the server."""
+    if not Config.SHARD_COUNT or Config.SHARD_IDS is None:
+        return {}
+
+    # `guild_id >> 22`, with the shifted out bits subtracted first so the
+    # division is exact.
+    guild_id = f"${field}"
+    timestamp = {
+        "$divide": [
+            {"$subtract": [guild_id, {"$mod": [guild_id, 1 << 22]}]},
+            1 << 22,
+        ]
+    }
+    return {
+        "$expr": {
+            "$in": [{"$mod": [timestamp, Config.SHARD_COUNT]}, Config.SHARD_IDS]
+        }
+    }
+
+
+def cluster_shard_ids() -> list[int]:
+    if Config.SHARD_IDS is not None:
+        return Config.SHARD_IDS
+    return list(range(Config.SHARD_COUNT or 1))
+
+
+def parse_shard_ids(value: str) -> list[int]:
+    """Parses shard ranges such as `0-3,6`."""
+    shard_ids = set()
+    for part in value.split(","):
+        first, _, last = part.strip().partition("-")
+        shard_ids.update(range(int(first), int(last or first) + 1))
+    return sorted(shard_ids)
+
+
+def split_shards(shard_count: int, cluster_count: int) -> list[list[int]]:
+    """Splits the shards into contiguous ranges, one per cluster."""
+    size, extra = divmod(shard_count, cluster_count)
+    clusters, start = [], 0
+    for index in range(cluster_count):
+        end = start + size + (1 if index < extra else 0)
+        clusters.append(list(range(start, end)))
+        start = end
+    return [shard_ids for shard_ids in clusters if shard_ids]
+
+
+def format_shard_ids(shard_ids: Optional[list[int]]) -> str:
+    if not shard_ids:
+        return "-"
+
+    ranges = []
+    start = previous = shard_ids[0]
+    for current in shard_ids[1:]:
+        if current != previous + 1:
+            ranges.append((start, previous))
+            start = current
+        previous = current
+    ranges.append((start, previous))
+
+    return ",".join(
+        str(first) if first == last else f"{first}-{last}" for first, last in ranges
+    )
@@ -1,10 +1,16 @@
 import disnake
 from disnake.ext import commands
 
+from rubby.components import component_id, component_router
+
 
 class ButtonCommand(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        component_router.add_route("buttons:answer", self.answer)
+
+    def cog_unload(self):
+        component_router.remove_routes(self)
 
     @commands.slash_command(
         name="buttons",
@@ -16,22 +22,22 @@ class ButtonCommand(commands.Cog):
             ephemeral=True,
             components=[
                 disnake.ui.Button(
-                    label="Yes", style=disnake.ButtonStyle.success, custom_id="yes"
+                    label="Yes",
+                    style=disnake.ButtonStyle.success,
+                    custom_id=component_id("buttons:answer", "yes"),
                 ),
                 disnake.ui.Button(
-                    label="No", style=disnake.ButtonStyle.danger, custom_id="no"
+                    label="No",
+                    style=disnake.ButtonStyle.danger,
+                    custom_id=component_id("buttons:answer", "no"),
                 ),
             ],
         )
 
-    @commands.Cog.listener("on_button_click")
-    async def help_listener(self, inter: disnake.MessageInteraction):
-        if inter.component.custom_id not in ["yes", "no"]:
-            return
-
-        if inter.component.custom_id == "yes":
+    async def answer(self, inter: disnake.MessageInteraction, answer: str):
+        if answer == "yes":
             await inter.response.send_message("You clicked yes!", ephemeral=True)
-        elif inter.component.custom_id == "no":
+        elif answer == "no":
             await inter.response.send_message("You clicked no!", ephemeral=True)
 
 
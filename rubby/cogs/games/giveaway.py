@@ -1,14 +1,35 @@
-import random
+from typing import Optional
+
 import pendulum
 
 import disnake
 from disnake.ext import commands
 
+from rubby.components import component_router
 from rubby.database import get_database
+from rubby.models import GiveawayRecord
 
 from rubby.misc.emojis import Emojis
 from rubby.functions.time_object import create_time_object
-from rubby.functions.giveaways.create_giveaway_buttons import create_giveaway_buttons
+from rubby.functions.giveaways.draw_winners import reroll_winners
+from rubby.functions.giveaways.end_giveaway import (
+    LeaseLostError,
+    claim_giveaway,
+    end_claimed_giveaway,
+)
+from rubby.functions.giveaways.giveaway_entries import delete_participants
+from rubby.functions.giveaways.giveaway_list import (
+    LIST_CUSTOM_ID_PREFIX,
+    GiveawayListFilters,
+    create_giveaway_list_buttons,
+    create_giveaway_list_embed,
+    fetch_giveaway_page,
+)
+from rubby.functions.giveaways.giveaway_messages import (
+    get_giveaway_message,
+    get_result_message,
+)
+from rubby.functions.giveaways.giveaway_scheduler import giveaway_scheduler
 
 
 error_embed = disnake.Embed(
@@ -25,6 +46,10 @@ success_embed = disnake.Embed(
 class GiveawayCommand(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        component_router.add_route(LIST_CUSTOM_ID_PREFIX, self.show_list_page)
+
+    def cog_unload(self):
+        component_router.remove_routes(self)
 
     @commands.slash_command()
     async def giveaway(self, inter: disnake.ApplicationCommandInteraction):
@@ -42,7 +67,7 @@ class GiveawayCommand(commands.Cog):
 
         await inter.response.send_modal(
             title="Create a new giveaway",
-            custom_id="create_giveaway",
+            custom_id="giveaway:create",
             components=[
                 disnake.ui.TextInput(
                     label="End date (Required)",
@@ -100,75 +125,40 @@ class GiveawayCommand(commands.Cog):
             return await inter.followup.send(embed=error_embed)
 
         database = await get_database()
-        giveaway = await database.giveaways.find_one(
-            {"_id": int(message_id), "guild_id": inter.guild.id}
+        giveaway = GiveawayRecord.decode(
+            await database.giveaways.find_one(
+                {"_id": int(message_id), "guild_id": inter.guild.id}
+            )
         )
 
         if not giveaway:
             error_embed.description = "I couldn't find a giveaway with that message ID."
             return await inter.followup.send(embed=error_embed)
 
-        if giveaway["ended"]:
+        if giveaway.ended:
             error_embed.description = "This giveaway has already ended."
             return await inter.followup.send(embed=error_embed)
 
-        channel = self.bot.get_channel(giveaway["channel_id"])
-        try:
-            message = await channel.fetch_message(giveaway["_id"])
-        except disnake.NotFound:
-            message = None
-
-        if not message:
-            error_embed.description = "I couldn't find the giveaway message."
-            await database.giveaways.delete_one({"_id": int(message_id)})
+        if not giveaway.finished_configuring:
+            error_embed.description = "This giveaway hasn't been set up yet."
             return await inter.followup.send(embed=error_embed)
 
-        end_date = await create_time_object(inter.guild.id)
-        buttons = await create_giveaway_buttons(
-            len(giveaway["participants"]), end_date, True
-        )
-        winners = []
-        winners_mentions = None
-        description = "There were not enough participants to draw winners."
-
-        if len(giveaway["participants"]) > 0:
-            if len(giveaway["participants"]) <= giveaway["winner_count"]:
-                winners = giveaway["participants"]
-            else:
-                winners = random.sample(
-                    giveaway["participants"], giveaway["winner_count"]
-                )
-
-            winners_mentions = ", ".join([f"<@{winner}>" for winner in winners])
-            description = f"The winner of this giveaway {'are' if len(winners) > 1 else 'is'} tagged above! Congratulations 🎉"
-
-        result_embed = disnake.Embed(
-            title=f"{giveaway['title']} (Results)",
-            description=description,
-            color=disnake.Color.blurple(),
-        )
-        result_embed.add_field(
-            name="Prize",
-            value=giveaway["prize"],
-        )
-        message.embeds[0].title = f"{giveaway['title']} (Ended)"
-        message.embeds[0].color = disnake.Color.red()
+        claimed = await claim_giveaway(giveaway.id, force=True)
+        try:
+            result_message = claimed and await end_claimed_giveaway(
+                self.bot, claimed
+            )
+        except LeaseLostError:
+            claimed = None
 
-        await message.edit(content=None, embed=message.embeds[0], components=buttons)
-        result_message = await message.reply(
-            embed=result_embed, content=winners_mentions
-        )
+        if not claimed:
+            error_embed.description = "This giveaway is already being ended."
+            return await inter.followup.send(embed=error_embed)
 
-        await database.giveaways.update_one(
-            {"_id": giveaway["_id"]},
-            {
-                "$set": {
-                    "result_message_id": result_message.id,
-                    "ended": True,
-                    "end_date": end_date.date_time,
-                }
-            },
-        )
+        giveaway_scheduler.unschedule(giveaway.id)
+        if not result_message:
+            error_embed.description = "I couldn't find the giveaway message."
+            return await inter.followup.send(embed=error_embed)
 
         success_embed.description = f"Successfully ended the giveaway! \n\n**[Jump to results]({result_message.jump_url})**"
         await inter.followup.send(
@@ -195,36 +185,37 @@ class GiveawayCommand(commands.Cog):
             return await inter.followup.send(embed=error_embed)
 
         database = await get_database()
-        giveaway = await database.giveaways.find_one(
-            {"_id": int(message_id), "guild_id": inter.guild.id}
+        giveaway = GiveawayRecord.decode(
+            await database.giveaways.find_one(
+                {"_id": int(message_id), "guild_id": inter.guild.id}
+            )
         )
 
         if not giveaway:
-            giveaway = await database.giveaways.find_one(
-                {"result_message_id": int(message_id), "guild_id": inter.guild.id}
+            giveaway = GiveawayRecord.decode(
+                await database.giveaways.find_one(
+                    {"result_message_id": int(message_id), "guild_id": inter.guild.id}
+                )
             )
 
         if not giveaway:
             error_embed.description = "I couldn't find a giveaway with that message ID."
             return await inter.followup.send(embed=error_embed)
 
-        channel = self.bot.get_channel(giveaway["channel_id"])
-        try:
-            message = await channel.fetch_message(giveaway["_id"])
-            await message.delete()
-        except disnake.NotFound:
-            pass
-
-        if giveaway["result_message_id"]:
+        for message in (
+            get_giveaway_message(self.bot, giveaway),
+            get_result_message(self.bot, giveaway),
+        ):
+            if not message:
+                continue
             try:
-                result_message = await channel.fetch_message(
-                    giveaway["result_message_id"]
-                )
-                await result_message.delete()
+                await message.delete()
             except disnake.NotFound:
                 pass
 
-        await database.giveaways.delete_one({"_id": giveaway["_id"]})
+        await database.giveaways.delete_one({"_id": giveaway.id})
+        await delete_participants(giveaway.id)
+        giveaway_scheduler.unschedule(giveaway.id)
 
         success_embed.description = "Successfully deleted the giveaway."
         await inter.followup.send(
@@ -251,76 +242,85 @@ class GiveawayCommand(commands.Cog):
             return await inter.followup.send(embed=error_embed)
 
         database = await get_database()
-        giveaway = await database.giveaways.find_one(
-            {"_id": int(message_id), "guild_id": inter.guild.id}
+        giveaway = GiveawayRecord.decode(
+            await database.giveaways.find_one(
+                {"_id": int(message_id), "guild_id": inter.guild.id}
+            )
         )
 
         if not giveaway:
-            giveaway = await database.giveaways.find_one(
-                {"result_message_id": int(message_id), "guild_id": inter.guild.id}
+            giveaway = GiveawayRecord.decode(
+                await database.giveaways.find_one(
+                    {"result_message_id": int(message_id), "guild_id": inter.guild.id}
+                )
             )
 
         if not giveaway:
             error_embed.description = "I couldn't find a giveaway with that message ID."
             return await inter.followup.send(embed=error_embed)
 
-        if not giveaway["ended"]:
+        if not giveaway.ended:
             error_embed.description = "This giveaway hasn't ended yet."
             return await inter.followup.send(embed=error_embed)
 
-        if len(giveaway["participants"]) <= giveaway["winner_count"]:
+        drawn = (
+            giveaway.draw_position
+            if giveaway.draw_position is not None
+            else giveaway.winner_count
+        )
+        if giveaway.participant_count <= drawn:
             error_embed.description = (
                 "There were not enough participants to reroll winners."
             )
             return await inter.followup.send(embed=error_embed)
 
-        channel = self.bot.get_channel(giveaway["channel_id"])
-        try:
-            message = await channel.fetch_message(giveaway["_id"])
-        except disnake.NotFound:
-            message = None
-
-        if not message:
-            error_embed.description = "I couldn't find the giveaway message."
-            await database.giveaways.delete_one({"_id": int(message_id)})
-            return await inter.followup.send(embed=error_embed)
-
-        try:
-            result_message = await channel.fetch_message(giveaway["result_message_id"])
-        except disnake.NotFound:
-            result_message = None
-
-        winners = random.sample(giveaway["participants"], giveaway["winner_count"])
+        draw = await reroll_winners(giveaway)
+        winners = draw["winners"]
         winners_mentions = ", ".join([f"<@{winner}>" for winner in winners])
         description = f"The winner of this giveaway {'are' if len(winners) > 1 else 'is'} tagged above! Congratulations 🎉"
 
         result_embed = disnake.Embed(
-            title=f"{giveaway['title']} (Rerolled)",
+            title=f"{giveaway.title} (Rerolled)",
             description=description,
             color=disnake.Color.blurple(),
         )
         result_embed.add_field(
             name="Prize",
-            value=giveaway["prize"],
+            value=giveaway.prize,
         )
 
-        if result_message:
-            await result_message.edit(
-                embed=result_embed,
-                content=winners_mentions,
-            )
-        else:
-            result_message = await message.reply(
-                embed=result_embed,
-                content=winners_mentions,
+        result_message = get_result_message(self.bot, giveaway)
+        try:
+            result_message = (
+                await result_message.edit(embed=result_embed, content=winners_mentions)
+                if result_message
+                else None
             )
+        except disnake.NotFound:
+            result_message = None
+
+        if not result_message:
+            try:
+                # The results are still announced if the giveaway message is gone.
+                result_message = await get_giveaway_message(self.bot, giveaway).reply(
+                    embed=result_embed,
+                    content=winners_mentions,
+                    fail_if_not_exists=False,
+                )
+            except disnake.NotFound:
+                error_embed.description = "I couldn't find the giveaway channel."
+                await database.giveaways.delete_one({"_id": giveaway.id})
+                await delete_participants(giveaway.id)
+                giveaway_scheduler.unschedule(giveaway.id)
+                return await inter.followup.send(embed=error_embed)
 
         await database.giveaways.update_one(
-            {"_id": giveaway["_id"]},
+            {"_id": giveaway.id},
             {
                 "$set": {
                     "result_message_id": result_message.id,
                     "ended": True,
+                    **draw,
                 }
             },
         )
@@ -364,7 +364,51 @@ class GiveawayCommand(commands.Cog):
             default=None,
         ),
     ):
-        pass
+        await inter.response.defer(ephemeral=True)
+
+        if message_id and not message_id.isdigit():
+            error_embed.description = "Please provide a valid message ID."
+            return await inter.followup.send(embed=error_embed)
+
+        filters = GiveawayListFilters(
+            status,
+            channel_id.id if channel_id else None,
+            created_by.id if created_by else None,
+            int(message_id) if message_id else None,
+        )
+        giveaways, has_previous, has_next = await fetch_giveaway_page(
+            inter.guild.id, filters
+        )
+
+        await inter.followup.send(
+            embed=create_giveaway_list_embed(inter.guild.id, giveaways),
+            components=create_giveaway_list_buttons(
+                filters, giveaways, has_previous, has_next
+            ),
+        )
+
+    async def show_list_page(
+        self,
+        inter: disnake.MessageInteraction,
+        direction: str,
+        cursor: int,
+        status_code: Optional[str] = None,
+        channel_id: Optional[int] = None,
+        created_by: Optional[int] = None,
+    ):
+        filters = GiveawayListFilters.from_status_code(
+            status_code, channel_id, created_by
+        )
+        giveaways, has_previous, has_next = await fetch_giveaway_page(
+            inter.guild.id, filters, direction, cursor
+        )
+
+        await inter.response.edit_message(
+            embed=create_giveaway_list_embed(inter.guild.id, giveaways),
+            components=create_giveaway_list_buttons(
+                filters, giveaways, has_previous, has_next
+            ),
+        )
 
 
 def setup(bot: commands.Bot):
@@ -1,20 +1,31 @@
 import logging
 import pendulum
-import random
+from typing import Optional
 
 import disnake
 from disnake.ext import commands, tasks
 
 from pydantic import ValidationError
 
+from rubby.components import component_id, component_router
 from rubby.database import get_database
-from rubby.models import Giveaway
+from rubby.schema import ACTIVE_GIVEAWAYS_FILTER
+from rubby.models import Giveaway, GiveawayRecord
 from rubby.misc.emojis import Emojis
 
+from rubby.functions.message_edit_coalescer import message_edit_coalescer
 from rubby.functions.time_object import create_time_object
 from rubby.functions.user_details import get_user_details
 from rubby.functions.giveaways.create_giveaway_embed import create_giveaway_embed
 from rubby.functions.giveaways.create_giveaway_buttons import create_giveaway_buttons
+from rubby.functions.giveaways.end_giveaway import (
+    claim_giveaway,
+    end_claimed_giveaway,
+)
+from rubby.functions.giveaways.giveaway_entries import toggle_participant
+from rubby.functions.giveaways.giveaway_scheduler import giveaway_scheduler
+from rubby.functions.giveaways.update_giveaway import update_giveaway
+from rubby.functions.write_behind import write_behind
 
 error_embed = disnake.Embed(
     color=disnake.Color.red(),
@@ -27,28 +38,164 @@ success_embed = disnake.Embed(
 )
 
 
-class ConfirmButton(disnake.ui.Button):
-    def __init__(self, original_interaction: disnake.MessageInteraction):
-        self.original_interaction = original_interaction
-        super().__init__(
-            style=disnake.ButtonStyle.success,
-            label="Confirm",
-            custom_id="giveaway:confirm",
+async def create_preview_embed(
+    inter: disnake.MessageInteraction, giveaway: GiveawayRecord
+) -> disnake.Embed:
+    end_date = await create_time_object(inter.guild.id, giveaway.end_date)
+    user = await get_user_details(inter.user, inter.client)
+
+    return create_giveaway_embed(
+        user,
+        giveaway.title,
+        giveaway.description,
+        giveaway.winner_count,
+        end_date,
+        giveaway.allowed_roles,
+        giveaway.role_weights,
+    )
+
+
+def get_entry_weight(member: disnake.Member, role_weights: dict[str, int]) -> int:
+    return max(
+        [role_weights.get(str(role.id), 1) for role in member.roles], default=1
+    )
+
+
+def create_setup_components(owner_id: int) -> list[disnake.ui.ActionRow]:
+    # The owner is part of the custom_ids, so the components don't depend on
+    # any state kept in memory and keep working after a restart.
+    return [
+        disnake.ui.ActionRow(
+            disnake.ui.Button(
+                style=disnake.ButtonStyle.success,
+                label="Confirm",
+                custom_id=component_id("giveaway:confirm", owner_id),
+            ),
+            disnake.ui.Button(
+                style=disnake.ButtonStyle.danger,
+                label="Cancel",
+                custom_id=component_id("giveaway:cancel", owner_id),
+            ),
+        ),
+        disnake.ui.ActionRow(
+            disnake.ui.RoleSelect(
+                custom_id=component_id("giveaway:roles", owner_id),
+                placeholder="Add/Remove roles that can participate for this giveaway",
+                min_values=0,
+                max_values=25,
+            )
+        ),
+        disnake.ui.ActionRow(
+            disnake.ui.StringSelect(
+                custom_id=component_id("giveaway:winner_count", owner_id),
+                placeholder="Select the maximum number of winners",
+                options=[
+                    disnake.SelectOption(label=str(i), value=str(i))
+                    for i in range(1, 11)
+                ],
+            )
+        ),
+        disnake.ui.ActionRow(
+            disnake.ui.RoleSelect(
+                custom_id=component_id("giveaway:bonus_roles", owner_id),
+                placeholder="Add/Remove roles that get bonus entries",
+                min_values=0,
+                max_values=25,
+            )
+        ),
+        disnake.ui.ActionRow(
+            disnake.ui.StringSelect(
+                custom_id=component_id("giveaway:bonus_multiplier", owner_id),
+                placeholder="Select how many entries bonus roles get",
+                options=[
+                    disnake.SelectOption(label=f"×{i}", value=str(i))
+                    for i in (2, 3, 5, 10)
+                ],
+            )
+        ),
+    ]
+
+
+async def check_owner(
+    inter: disnake.MessageInteraction, owner_id: Optional[int], component: str
+) -> bool:
+    if inter.user.id == owner_id:
+        return True
+
+    error_embed.description = f"You are not allowed to use this {component}!"
+    await inter.followup.send(
+        embed=error_embed,
+        ephemeral=True,
+    )
+    return False
+
+
+class GiveawayEvents(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.end_giveaways.start()
+
+        component_router.add_route("giveaway:create", self.create_giveaway)
+        component_router.add_route("giveaway:enter", self.enter_giveaway)
+        component_router.add_route("giveaway:confirm", self.confirm_giveaway)
+        component_router.add_route("giveaway:cancel", self.cancel_giveaway)
+        component_router.add_route("giveaway:roles", self.select_allowed_roles)
+        component_router.add_route("giveaway:winner_count", self.select_winner_count)
+        component_router.add_route("giveaway:bonus_roles", self.select_bonus_roles)
+        component_router.add_route(
+            "giveaway:bonus_multiplier", self.select_bonus_multiplier
         )
 
-    async def callback(self, inter: disnake.MessageInteraction):
-        await inter.response.defer(ephemeral=True)
+    def cog_unload(self):
+        self.end_giveaways.cancel()
+        component_router.remove_routes(self)
 
-        if inter.user.id != self.original_interaction.user.id:
-            error_embed.description = "You are not allowed to use this button!"
-            return await inter.followup.send(
-                embed=error_embed,
-                ephemeral=True,
-            )
+    @tasks.loop(seconds=0)
+    async def end_giveaways(self):
+        await giveaway_scheduler.tick(self.end_giveaway)
+
+    @end_giveaways.before_loop
+    async def before_end_giveaways(self):
+        await self.bot.wait_until_ready()
+
+    async def end_giveaway(self, giveaway_id: int) -> bool:
+        giveaway = await claim_giveaway(giveaway_id)
+        if giveaway:
+            return await end_claimed_giveaway(self.bot, giveaway) is not None
 
         database = await get_database()
-        giveaway = await database.giveaways.find_one(
-            {"_id": inter.message.id, "guild_id": inter.guild.id}
+        giveaway = GiveawayRecord.decode(
+            await database.giveaways.find_one(
+                {"_id": giveaway_id, **ACTIVE_GIVEAWAYS_FILTER},
+                {"end_date": 1, "lease_expires": 1},
+            )
+        )
+
+        if not giveaway:
+            logging.debug("Skipped giveaway %s. (ENDED/NOT CONFIG)", giveaway_id)
+            return False
+
+        # Either not due yet, or being ended by another instance: it is tried
+        # again once that instance's lease expires, in case it stopped.
+        giveaway_scheduler.schedule(
+            giveaway.id,
+            max(giveaway.end_datetime, giveaway.lease_expires or giveaway.end_datetime),
+        )
+        logging.debug("Rescheduled giveaway %s. (NOT DUE/CLAIMED)", giveaway.id)
+        return False
+
+    async def confirm_giveaway(
+        self, inter: disnake.MessageInteraction, owner_id: Optional[int] = None
+    ):
+        await inter.response.defer(ephemeral=True)
+
+        if not await check_owner(inter, owner_id, "button"):
+            return
+
+        giveaway = GiveawayRecord.decode(
+            await write_behind.find_one(
+                "giveaways", {"_id": inter.message.id, "guild_id": inter.guild.id}
+            )
         )
 
         if not giveaway:
@@ -57,28 +204,18 @@ class ConfirmButton(disnake.ui.Button):
                 embed=error_embed,
             )
 
-        end_date = await create_time_object(
-            inter.guild.id, pendulum.instance(giveaway["end_date"])
-        )
-        user = await get_user_details(inter.user, inter.client)
-
-        embed = create_giveaway_embed(
-            user,
-            giveaway["title"],
-            giveaway["description"],
-            giveaway["winner_count"],
-            end_date,
-            giveaway["allowed_roles"],
-        )
-
-        buttons = await create_giveaway_buttons(0, end_date)
+        end_date = await create_time_object(inter.guild.id, giveaway.end_date)
+        embed = await create_preview_embed(inter, giveaway)
+        buttons = await create_giveaway_buttons(giveaway.id, 0, end_date)
 
         await inter.message.edit(content=None, embed=embed, components=buttons)
 
-        await database.giveaways.update_one(
+        await write_behind.update_one(
+            "giveaways",
             {"_id": inter.message.id},
             {"$set": {"finished_configuring": True}},
         )
+        giveaway_scheduler.schedule(giveaway.id, giveaway.end_datetime)
 
         success_embed.description = f"Your giveaway has been created successfully ! \n\n**[Click here to enter it]({inter.message.jump_url})**"
         await inter.followup.send(
@@ -86,25 +223,13 @@ class ConfirmButton(disnake.ui.Button):
             ephemeral=True,
         )
 
-
-class CancelButton(disnake.ui.Button):
-    def __init__(self, original_interaction: disnake.MessageInteraction):
-        self.original_interaction = original_interaction
-        super().__init__(
-            style=disnake.ButtonStyle.danger,
-            label="Cancel",
-            custom_id="giveaway:cancel",
-        )
-
-    async def callback(self, inter: disnake.MessageInteraction):
+    async def cancel_giveaway(
+        self, inter: disnake.MessageInteraction, owner_id: Optional[int] = None
+    ):
         await inter.response.defer(ephemeral=True)
 
-        if inter.user.id != self.original_interaction.user.id:
-            error_embed.description = "You are not allowed to use this button!"
-            return await inter.followup.send(
-                embed=error_embed,
-                ephemeral=True,
-            )
+        if not await check_owner(inter, owner_id, "button"):
+            return
 
         await inter.message.delete()
 
@@ -119,193 +244,105 @@ class CancelButton(disnake.ui.Button):
             ephemeral=True,
         )
 
-
-class RolesSelectMenu(disnake.ui.RoleSelect):
-    def __init__(self, original_interaction: disnake.MessageInteraction):
-        self.original_interaction = original_interaction
-        super().__init__(
-            custom_id="giveaway:roles",
-            placeholder="Add/Remove roles that can participate for this giveaway",
-            min_values=0,
-            max_values=25,
-        )
-
-    async def callback(self, inter: disnake.MessageInteraction):
+    async def select_allowed_roles(
+        self, inter: disnake.MessageInteraction, owner_id: Optional[int] = None
+    ):
         await inter.response.defer(ephemeral=True)
 
-        if inter.user.id != self.original_interaction.user.id:
-            error_embed.description = "You are not allowed to use this selection menu!"
-            return await inter.followup.send(
-                embed=error_embed,
-                ephemeral=True,
-            )
+        if not await check_owner(inter, owner_id, "selection menu"):
+            return
 
-        allowed_roles = [role.id for role in self.values] if self.values else []
+        allowed_roles = [role.id for role in inter.resolved_values]
 
-        database = await get_database()
-        await database.giveaways.update_one(
-            {"_id": inter.message.id, "guild_id": inter.guild.id},
-            {"$set": {"allowed_roles": allowed_roles}},
+        giveaway = await update_giveaway(
+            inter.message.id, inter.guild.id, {"allowed_roles": allowed_roles}
         )
 
-        embed = inter.message.embeds[0]
-
-        if len(allowed_roles) == 0:
-            embed.remove_field(0)
-        else:
-            if embed.fields:
-                embed.set_field_at(
-                    index=0,
-                    name="Allowed Roles",
-                    value=", ".join([f"<@&{role_id}>" for role_id in allowed_roles]),
-                )
-            else:
-                embed.add_field(
-                    name="Allowed Roles",
-                    value=", ".join([f"<@&{role_id}>" for role_id in allowed_roles]),
-                )
-
-        await inter.message.edit(embed=embed)
+        if giveaway:
+            await inter.message.edit(embed=await create_preview_embed(inter, giveaway))
 
-
-class WinnerCountSelectMenu(disnake.ui.StringSelect):
-    def __init__(self, original_interaction: disnake.MessageInteraction):
-        self.original_interaction = original_interaction
-        super().__init__(
-            custom_id="giveaway:winner_count",
-            placeholder="Select the maximum number of winners",
-            options=[
-                disnake.SelectOption(label=str(i), value=str(i)) for i in range(1, 11)
-            ],
-        )
-
-    async def callback(self, inter: disnake.MessageInteraction):
+    async def select_winner_count(
+        self, inter: disnake.MessageInteraction, owner_id: Optional[int] = None
+    ):
         await inter.response.defer(ephemeral=True)
 
-        if inter.user.id != self.original_interaction.user.id:
-            error_embed.description = "You are not allowed to use this selection menu!"
-            return await inter.followup.send(
-                embed=error_embed,
-                ephemeral=True,
-            )
+        if not await check_owner(inter, owner_id, "selection menu"):
+            return
 
-        winner_count = int(self.values[0])
+        winner_count = int(inter.values[0])
 
-        database = await get_database()
-        await database.giveaways.update_one(
-            {"_id": inter.message.id, "guild_id": inter.guild.id},
-            {"$set": {"winner_count": winner_count}},
+        giveaway = await update_giveaway(
+            inter.message.id, inter.guild.id, {"winner_count": winner_count}
         )
 
-        user = await get_user_details(inter.user, inter.client)
-        embed = inter.message.embeds[0]
-        embed.set_footer(
-            text=f"Max Winners: {winner_count} • Hosted by {user.name}",
-        )
-
-        await inter.message.edit(embed=embed)
-
-
-class GiveawayView(disnake.ui.View):
-    def __init__(self, original_interaction: disnake.MessageInteraction):
-        super().__init__(timeout=300)
-
-        self.add_item(ConfirmButton(original_interaction))
-        self.add_item(CancelButton(original_interaction))
-        self.add_item(RolesSelectMenu(original_interaction))
-        self.add_item(WinnerCountSelectMenu(original_interaction))
+        if giveaway:
+            await inter.message.edit(embed=await create_preview_embed(inter, giveaway))
 
+    async def select_bonus_roles(
+        self, inter: disnake.MessageInteraction, owner_id: Optional[int] = None
+    ):
+        await inter.response.defer(ephemeral=True)
 
-class GiveawayEvents(commands.Cog):
-    def __init__(self, bot: commands.Bot):
-        self.bot = bot
-        self.end_giveaways.start()
+        if not await check_owner(inter, owner_id, "selection menu"):
+            return
 
-    def cog_unload(self):
-        self.end_giveaways.cancel()
+        giveaway = GiveawayRecord.decode(
+            await write_behind.find_one(
+                "giveaways",
+                {"_id": inter.message.id, "guild_id": inter.guild.id},
+                {"bonus_multiplier": 1},
+            )
+        )
 
-    @tasks.loop(seconds=10.0)
-    async def end_giveaways(self):
-        database = await get_database()
-        giveaways = await database.giveaways.find({}).to_list(None)
-        logging.debug("Checking %s giveaways.", len(giveaways))
+        if not giveaway:
+            return
 
-        for giveaway in giveaways:
-            if giveaway["ended"] or not giveaway["finished_configuring"]:
-                logging.debug(
-                    "Skipped giveaway %s. (ENDED/NOT CONFIG)", giveaway["_id"]
-                )
-                continue
+        multiplier = giveaway.bonus_multiplier
+        role_weights = {str(role.id): multiplier for role in inter.resolved_values}
 
-            if pendulum.instance(giveaway["end_date"]) <= pendulum.now():
-                channel = self.bot.get_channel(giveaway["channel_id"])
-                message = await channel.fetch_message(giveaway["_id"])
+        giveaway = await update_giveaway(
+            inter.message.id, inter.guild.id, {"role_weights": role_weights}
+        )
 
-                if not message:
-                    await database.giveaways.delete_one({"_id": giveaway["_id"]})
-                    logging.debug("Deleted giveaway %s.", giveaway["_id"])
-                    continue
+        if giveaway:
+            await inter.message.edit(embed=await create_preview_embed(inter, giveaway))
 
-                end_date = await create_time_object(giveaway["guild_id"])
+    async def select_bonus_multiplier(
+        self, inter: disnake.MessageInteraction, owner_id: Optional[int] = None
+    ):
+        await inter.response.defer(ephemeral=True)
 
-                buttons = await create_giveaway_buttons(
-                    len(giveaway["participants"]), end_date, disabled=True
-                )
+        if not await check_owner(inter, owner_id, "selection menu"):
+            return
 
-                winners = []
-                winners_mentions = None
-                description = "There were not enough participants to draw winners."
-
-                if len(giveaway["participants"]) > 0:
-                    if len(giveaway["participants"]) <= giveaway["winner_count"]:
-                        winners = giveaway["participants"]
-                    else:
-                        winners = random.sample(
-                            giveaway["participants"], giveaway["winner_count"]
-                        )
-
-                    winners_mentions = ", ".join([f"<@{winner}>" for winner in winners])
-                    description = f"The winner of this giveaway {'are' if len(winners) > 1 else 'is'} tagged above! Congratulations 🎉"
-
-                result_embed = disnake.Embed(
-                    title=f"{giveaway['title']} (Results)",
-                    description=description,
-                    color=disnake.Color.blurple(),
-                )
-                result_embed.add_field(
-                    name="Prize",
-                    value=giveaway["prize"],
-                )
+        multiplier = int(inter.values[0])
 
-                message.embeds[0].title = f"{giveaway['title']} (Ended)"
-                message.embeds[0].color = disnake.Color.red()
+        giveaway = GiveawayRecord.decode(
+            await write_behind.find_one(
+                "giveaways",
+                {"_id": inter.message.id, "guild_id": inter.guild.id},
+                {"role_weights": 1},
+            )
+        )
 
-                await message.edit(
-                    content=None, embed=message.embeds[0], components=buttons
-                )
-                result_message = await message.reply(
-                    embed=result_embed, content=winners_mentions
-                )
+        if not giveaway:
+            return
 
-                await database.giveaways.update_one(
-                    {"_id": giveaway["_id"]},
-                    {
-                        "$set": {
-                            "result_message_id": result_message.id,
-                            "ended": True,
-                            "end_date": end_date.date_time,
-                        }
-                    },
-                )
-                logging.debug("Ended giveaway %s.", giveaway["_id"])
-            else:
-                logging.debug("Skipped giveaway %s. (NOT ENDED)", giveaway["_id"])
+        giveaway = await update_giveaway(
+            inter.message.id,
+            inter.guild.id,
+            {
+                "bonus_multiplier": multiplier,
+                "role_weights": {
+                    role_id: multiplier for role_id in giveaway.role_weights
+                },
+            },
+        )
 
-    @commands.Cog.listener("on_modal_submit")
-    async def on_modal_submit(self, inter: disnake.ModalInteraction):
-        if inter.custom_id != "create_giveaway":
-            return
+        if giveaway:
+            await inter.message.edit(embed=await create_preview_embed(inter, giveaway))
 
+    async def create_giveaway(self, inter: disnake.ModalInteraction):
         await inter.response.defer(ephemeral=True)
 
         duration = inter.text_values.get("duration")
@@ -354,7 +391,7 @@ class GiveawayEvents(commands.Cog):
                 ]
             ),
             embed=embed,
-            view=GiveawayView(inter),
+            components=create_setup_components(inter.user.id),
         )
 
         database = await get_database()
@@ -388,16 +425,18 @@ class GiveawayEvents(commands.Cog):
             ephemeral=True,
         )
 
-    @commands.Cog.listener("on_button_click")
-    async def on_button_click(self, inter: disnake.MessageInteraction):
-        if inter.component.custom_id != "giveaway:enter":
-            return
+    async def enter_giveaway(
+        self, inter: disnake.MessageInteraction, giveaway_id: Optional[int] = None
+    ):
+        # Buttons sent before the ID was part of the custom_id.
+        giveaway_id = giveaway_id or inter.message.id
 
         await inter.response.defer(ephemeral=True)
 
-        database = await get_database()
-        giveaway = await database.giveaways.find_one(
-            {"_id": inter.message.id, "guild_id": inter.guild.id}
+        giveaway = GiveawayRecord.decode(
+            await write_behind.find_one(
+                "giveaways", {"_id": giveaway_id, "guild_id": inter.guild.id}
+            )
         )
 
         if not giveaway:
@@ -405,7 +444,9 @@ class GiveawayEvents(commands.Cog):
             inter.message.embeds[0].color = disnake.Color.orange()
 
             errored_time = await create_time_object(guild_id=inter.guild.id)
-            buttons = await create_giveaway_buttons(0, errored_time, disabled=True)
+            buttons = await create_giveaway_buttons(
+                giveaway_id, 0, errored_time, disabled=True
+            )
 
             await inter.message.edit(embed=inter.message.embeds[0], components=buttons)
 
@@ -417,15 +458,15 @@ class GiveawayEvents(commands.Cog):
                 ephemeral=True,
             )
 
-        end_date = await create_time_object(
-            inter.guild.id, pendulum.instance(giveaway["end_date"])
-        )
+        end_date = await create_time_object(inter.guild.id, giveaway.end_date)
 
         if end_date.date_time <= pendulum.now():
             buttons = await create_giveaway_buttons(
-                len(giveaway["participants"]), end_date, disabled=True
+                giveaway.id, giveaway.participant_count, end_date, disabled=True
+            )
+            await message_edit_coalescer.flush(
+                inter.message, final=True, components=buttons
             )
-            await inter.message.edit(components=buttons)
             error_embed.description = (
                 "You cannot enter this giveaway, it has already ended."
             )
@@ -435,16 +476,16 @@ class GiveawayEvents(commands.Cog):
             )
 
         if (
-            len(giveaway["allowed_roles"]) > 0
+            len(giveaway.allowed_roles) > 0
             and not inter.user.guild_permissions.administrator
         ):
             if not any(
-                role.id in giveaway["allowed_roles"] for role in inter.user.roles
+                role.id in giveaway.allowed_roles for role in inter.user.roles
             ):
                 error_embed.description = (
                     "You need to have one of the following roles to join this giveaway: "
                     + ", ".join(
-                        [f"<@&{role_id}>" for role_id in giveaway["allowed_roles"]]
+                        [f"<@&{role_id}>" for role_id in giveaway.allowed_roles]
                     )
                 )
                 return await inter.followup.send(
@@ -452,27 +493,39 @@ class GiveawayEvents(commands.Cog):
                     ephemeral=True,
                 )
 
-        if inter.user.id in giveaway["participants"]:
-            giveaway["participants"].remove(inter.user.id)
-            success_embed.description = "You have been removed from the giveaway."
-            await inter.followup.send(
-                embed=success_embed,
-                ephemeral=True,
+        toggled = await toggle_participant(
+            giveaway_id,
+            inter.user.id,
+            get_entry_weight(inter.user, giveaway.role_weights),
+        )
+
+        if toggled is None:
+            error_embed.description = (
+                "You cannot enter this giveaway, it has already ended."
             )
-        else:
-            giveaway["participants"].append(inter.user.id)
-            success_embed.description = "You have been added to the giveaway."
-            await inter.followup.send(
-                embed=success_embed,
+            return await inter.followup.send(
+                embed=error_embed,
                 ephemeral=True,
             )
 
-        buttons = await create_giveaway_buttons(len(giveaway["participants"]), end_date)
+        joined, participant_count = toggled
 
-        await inter.message.edit(components=buttons)
-        await database.giveaways.update_one(
-            {"_id": inter.message.id},
-            {"$set": {"participants": giveaway["participants"]}},
+        # Queued before anything else is awaited, so counts are queued in the
+        # order the toggles returned and a slow followup can't queue a stale
+        # count last.
+        buttons = await create_giveaway_buttons(
+            giveaway.id, participant_count, end_date
+        )
+        message_edit_coalescer.queue(inter.message, components=buttons)
+
+        success_embed.description = (
+            "You have been added to the giveaway."
+            if joined
+            else "You have been removed from the giveaway."
+        )
+        await inter.followup.send(
+            embed=success_embed,
+            ephemeral=True,
         )
 
 
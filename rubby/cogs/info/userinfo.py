@@ -2,6 +2,7 @@ import disnake
 from disnake.ext import commands
 
 from rubby.misc.emojis import Emojis
+from rubby.functions.user_cache import user_cache
 
 
 def user_name(user: disnake.User) -> str:
@@ -53,8 +54,20 @@ class UserInfoCommand(commands.Cog):
     ):
         await inter.response.defer()
         user = user or inter.author
-        user = await self.bot.fetch_user(user.id) or user
-        member = inter.guild.get_member(user.id)
+        # Members come with the interaction payload, the member cache is only
+        # filled by the full runtime profile.
+        member = (
+            user
+            if isinstance(user, disnake.Member)
+            else inter.guild.get_member(user.id)
+        )
+        if member is None:
+            try:
+                member = await inter.guild.fetch_member(user.id)
+            except disnake.NotFound:
+                pass
+
+        user = await user_cache.get(self.bot, user.id, full=True) or user
 
         embed = disnake.Embed(title="User Information", color=user.accent_color)
         embed.set_thumbnail(url=user.display_avatar.url)
@@ -28,8 +28,10 @@ class PingCommand(commands.Cog):
         shard_id = self.bot.shard_id + 1 if self.bot.shard_id is not None else 1
         shard_count = self.bot.shard_count if self.bot.shard_count is not None else 1
 
+        # Member counts come with the guilds, the member cache may be empty.
+        members = sum(guild.member_count or 0 for guild in self.bot.guilds)
         embed.set_footer(
-            text=f"Shard {shard_id}/{shard_count} • Guilds: {len(self.bot.guilds)} • Members: {len(self.bot.users)}"
+            text=f"Shard {shard_id}/{shard_count} • Guilds: {len(self.bot.guilds)} • Members: {members}"
         )
 
         await inter.response.send_message(embed=embed)
@@ -0,0 +1,96 @@
+import disnake
+from disnake.ext import commands
+
+from rubby.functions.embed_builder import EmbedBuilder
+from rubby.functions.giveaways.giveaway_scheduler import giveaway_scheduler
+from rubby.metrics import (
+    HANDLER_DURATION,
+    MONGODB_COMMAND_DURATION,
+    MONGODB_COMMAND_FAILURES,
+    REST_RATE_LIMITS,
+    REST_REQUESTS,
+    Histogram,
+)
+from rubby.misc.emojis import Emojis
+
+TOP_SERIES = 10
+
+
+def format_histogram(histogram: Histogram) -> str:
+    summaries = sorted(
+        (
+            (*histogram.summary(*labels), " ".join(labels))
+            for labels in histogram.label_sets()
+        ),
+        reverse=True,
+    )
+
+    return (
+        "\n".join(
+            f"> `{name}` {count}× • avg {mean * 1000:.1f}ms"
+            f" • p95 ≤ {bound * 1000:g}ms"
+            for count, mean, bound, name in summaries[:TOP_SERIES]
+        )
+        or "> Nothing recorded yet."
+    )
+
+
+class StatsCommand(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.slash_command(
+        name="stats",
+        description="Shows the bot's runtime metrics.",
+    )
+    async def stats(self, inter: disnake.ApplicationCommandInteraction):
+        if not await self.bot.is_owner(inter.author):
+            return await inter.response.send_message(
+                embed=disnake.Embed(
+                    color=disnake.Color.red(),
+                    title=f"{Emojis.SYMBOLS['exclamation_mark_red']} Error!",
+                    description="Only the bot owners can use this command.",
+                ),
+                ephemeral=True,
+            )
+
+        rest_requests = sum(REST_REQUESTS.values.values())
+        rate_limits = REST_RATE_LIMITS.values
+        mongodb_failures = sum(MONGODB_COMMAND_FAILURES.values.values())
+        last_tick = giveaway_scheduler.last_tick
+
+        embed = EmbedBuilder(title="Runtime Metrics", color=disnake.Color.blurple())
+        embed.add_field(
+            name="Handlers", value=format_histogram(HANDLER_DURATION), inline=False
+        )
+        embed.add_field(
+            name=f"MongoDB ({mongodb_failures} failed)",
+            value=format_histogram(MONGODB_COMMAND_DURATION),
+            inline=False,
+        )
+        embed.add_field(
+            name="Discord REST",
+            value="\n".join(
+                [
+                    f"> **Requests:** {rest_requests:g}",
+                    f"> **Rate limited:** {rate_limits.get(('bucket',), 0):g}"
+                    f" • **Global:** {rate_limits.get(('global',), 0):g}",
+                ]
+            ),
+        )
+        embed.add_field(
+            name="Giveaway Scheduler",
+            value="\n".join(
+                [
+                    f"> **Queued:** {len(giveaway_scheduler)}",
+                    f"> **Last tick:** {last_tick['ended']}/{last_tick['due']} ended"
+                    f" in {last_tick['duration']}s",
+                ]
+            ),
+        )
+
+        await inter.response.send_message(embed=embed.build(), ephemeral=True)
+
+
+def setup(bot: commands.Bot):
+    bot.add_cog(StatsCommand(bot))
@@ -0,0 +1,141 @@
+import math
+import os
+
+import disnake
+import pendulum
+from disnake.ext import commands, tasks
+
+from rubby.cluster import cluster_shard_ids, format_shard_ids
+from rubby.database import database_operation, get_database
+from rubby.functions.embed_builder import EmbedBuilder
+from rubby.functions.giveaways.giveaway_scheduler import giveaway_scheduler
+from rubby.misc import Config
+
+
+def get_latencies(bot: commands.InteractionBot) -> dict[str, float | None]:
+    if isinstance(bot, commands.AutoShardedInteractionBot):
+        latencies = bot.latencies
+    else:
+        latencies = [(bot.shard_id or 0, bot.latency)]
+
+    return {
+        str(shard_id): round(latency, 3) if math.isfinite(latency) else None
+        for shard_id, latency in latencies
+    }
+
+
+class StatusCommand(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.send_heartbeat.start()
+
+    def cog_unload(self):
+        self.send_heartbeat.cancel()
+
+    def heartbeat(self) -> dict:
+        return {
+            "shard_ids": cluster_shard_ids(),
+            "shard_count": Config.SHARD_COUNT or 1,
+            "guilds": len(self.bot.guilds),
+            "latencies": get_latencies(self.bot),
+            "scheduled_giveaways": len(giveaway_scheduler),
+            "pid": os.getpid(),
+            "updated_at": pendulum.now("UTC"),
+        }
+
+    @tasks.loop(seconds=Config.CLUSTER_HEARTBEAT_INTERVAL)
+    async def send_heartbeat(self, heartbeat: dict = None):
+        database = await get_database()
+        await database.clusters.update_one(
+            {"_id": Config.CLUSTER_NAME},
+            {"$set": heartbeat or self.heartbeat()},
+            upsert=True,
+        )
+
+    @send_heartbeat.before_loop
+    async def before_send_heartbeat(self):
+        await self.bot.wait_until_ready()
+
+    @commands.slash_command(
+        name="status",
+        description="Shows the status of every cluster running the bot.",
+    )
+    async def status(self, inter: disnake.ApplicationCommandInteraction):
+        # The heartbeat and the analytics query can outlast the 3 seconds an
+        # interaction has to be answered in.
+        await inter.response.defer(ephemeral=True)
+        heartbeat = self.heartbeat()
+        await self.send_heartbeat(heartbeat)
+
+        async with database_operation("analytics") as database:
+            clusters = await database.clusters.find(
+                {"_id": {"$ne": Config.CLUSTER_NAME}}
+            ).to_list(None)
+
+        # A secondary may not have replicated the heartbeat yet, so this
+        # cluster is shown with the numbers it just sent.
+        clusters.append({"_id": Config.CLUSTER_NAME, **heartbeat})
+        clusters.sort(key=lambda cluster: cluster["_id"])
+
+        stale_after = pendulum.now("UTC").subtract(
+            seconds=Config.CLUSTER_MISSED_HEARTBEATS
+            * Config.CLUSTER_HEARTBEAT_INTERVAL
+        )
+        shard_count = Config.SHARD_COUNT or 1
+        covered_shards = set()
+        guilds = 0
+        fields = []
+
+        for cluster in clusters:
+            updated_at = pendulum.instance(cluster["updated_at"])
+            alive = updated_at >= stale_after
+            if alive:
+                covered_shards.update(cluster["shard_ids"])
+                guilds += cluster["guilds"]
+
+            latencies = [
+                latency
+                for latency in cluster["latencies"].values()
+                if latency is not None
+            ]
+            latency = (
+                f"{sum(latencies) / len(latencies):.3f}s" if latencies else "-"
+            )
+
+            fields.append(
+                (
+                    f"{'🟢' if alive else '🔴'} {cluster['_id']}",
+                    "\n".join(
+                        [
+                            f"> **Shards:** {format_shard_ids(cluster['shard_ids'])}",
+                            f"> **Guilds:** {cluster['guilds']}",
+                            f"> **Latency:** {latency}",
+                            f"> **Giveaways:** {cluster['scheduled_giveaways']}",
+                            "> **Heartbeat:** "
+                            + disnake.utils.format_dt(updated_at, "R"),
+                        ]
+                    ),
+                )
+            )
+
+        missing_shards = sorted(set(range(shard_count)) - covered_shards)
+        summary = [
+            f"**Guilds:** {guilds}",
+            f"**Shards up:** {shard_count - len(missing_shards)}/{shard_count}",
+        ]
+        if missing_shards:
+            summary.append(f"**Shards down:** {format_shard_ids(missing_shards)}")
+
+        embed = EmbedBuilder(
+            title="Cluster Status",
+            color=disnake.Color.blurple(),
+            description="\n".join(summary),
+        )
+        for name, value in fields:
+            embed.add_field(name=name, value=value)
+
+        await inter.edit_original_response(embed=embed.build())
+
+
+def setup(bot: commands.Bot):
+    bot.add_cog(StatusCommand(bot))
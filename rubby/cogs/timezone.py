@@ -3,10 +3,12 @@ import pendulum
 import disnake
 from disnake.ext import commands
 
-from rubby.database import get_database
+from rubby.functions.guild_settings import guild_settings
+from rubby.functions.time_object import DEFAULT_TIMEZONE
+from rubby.functions.timezone_index import TimezoneIndex
 from rubby.models import Guild
 
-TIMEZONES = pendulum.timezones()
+TIMEZONE_INDEX = TimezoneIndex(pendulum.timezones())
 
 
 async def auto_complete_timezones(
@@ -14,9 +16,8 @@ async def auto_complete_timezones(
 ):
     return [
         disnake.OptionChoice(name=timezone, value=timezone)
-        for timezone in TIMEZONES
-        if user_input.lower() in timezone.lower()
-    ][:25]
+        for timezone in TIMEZONE_INDEX.search(user_input)
+    ]
 
 
 class TimezoneCommand(commands.Cog):
@@ -39,35 +40,31 @@ class TimezoneCommand(commands.Cog):
     ):
         await inter.response.defer(ephemeral=True)
 
-        database = await get_database()
-
-        guild: Guild = await database.guilds.find_one({"_id": inter.guild.id})
-
-        if not guild:
-            guild = Guild(
-                _id=inter.guild.id,
-                name=inter.guild.name,
-                owner=inter.guild.owner_id,
-                icon=inter.guild.icon.url,
-                created_at=inter.guild.created_at,
-            ).model_dump(by_alias=True)
-
-            await database.guilds.insert_one(guild)
-
         if not timezone:
+            settings = await guild_settings.get(inter.guild.id)
             return await inter.followup.send(
-                f"The timezone for this server is `{guild['timezone']}`.",
+                f"The timezone for this server is `{settings.get('timezone', DEFAULT_TIMEZONE)}`.",
                 ephemeral=True,
             )
 
-        if timezone not in TIMEZONES:
+        timezone = TIMEZONE_INDEX.resolve(timezone)
+
+        if not timezone:
             return await inter.followup.send(
                 "Invalid timezone. Please try again.",
                 ephemeral=True,
             )
 
-        await database.guilds.update_one(
-            {"_id": inter.guild.id}, {"$set": {"timezone": timezone}}
+        guild = Guild(
+            _id=inter.guild.id,
+            name=inter.guild.name,
+            owner=inter.guild.owner_id,
+            created_at=inter.guild.created_at,
+            **({"icon": inter.guild.icon.url} if inter.guild.icon else {}),
+        ).model_dump(by_alias=True)
+
+        await guild_settings.update(
+            inter.guild.id, {"timezone": timezone}, defaults=guild
         )
 
         await inter.followup.send(
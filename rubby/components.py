@@ -0,0 +1,136 @@
+import inspect
+import logging
+import time
+import typing
+from typing import Any, Awaitable, Callable, Optional
+
+import disnake
+from disnake.ext import commands
+
+from rubby.metrics import HANDLER_DURATION, metrics
+from rubby.misc.constants import Constants
+
+SEPARATOR = ":"
+# Routes are namespaced ("giveaway:enter"), only this many leading segments of
+# a custom_id are looked up, the others are the handler's arguments.
+MAX_ROUTE_SEGMENTS = 2
+
+ComponentHandler = Callable[..., Awaitable[Any]]
+
+
+def component_id(route: str, *args) -> str:
+    """Builds the custom_id of a component handled by `route`."""
+    custom_id = SEPARATOR.join(
+        [route, *("" if arg is None else str(arg) for arg in args)]
+    )
+    if len(custom_id) > Constants.BUTTON_CUSTOM_ID_LIMIT:
+        raise ValueError(f"The custom_id {custom_id!r} is too long.")
+    return custom_id
+
+
+def argument_converter(annotation) -> Callable[[str], Any]:
+    for candidate in (annotation, *typing.get_args(annotation)):
+        if candidate in (int, str):
+            return candidate
+    return str
+
+
+class Route:
+    __slots__ = ("name", "handler", "converters")
+
+    def __init__(self, name: str, handler: ComponentHandler):
+        self.name = name
+        self.handler = handler
+        # Every parameter after the interaction is filled from the custom_id.
+        parameters = list(inspect.signature(handler, eval_str=True).parameters.values())
+        self.converters = [
+            argument_converter(parameter.annotation) for parameter in parameters[1:]
+        ]
+
+    def parse(self, args: list[str]) -> list:
+        # Empty segments stand for `None`, missing trailing ones for the
+        # handler's defaults, which keeps components sent before an argument
+        # was added working.
+        return [
+            None if arg == "" else converter(arg)
+            for converter, arg in zip(self.converters, args)
+        ]
+
+
+class ComponentRouter:
+    """Dispatches component and modal interactions to one handler each.
+
+    Handlers only get the interaction and the arguments encoded in the
+    custom_id, so components keep working after a restart.
+    """
+
+    def __init__(self):
+        self.routes: dict[str, Route] = {}
+
+    def __len__(self):
+        return len(self.routes)
+
+    def add_route(self, name: str, handler: ComponentHandler):
+        if name in self.routes:
+            raise ValueError(f"The route {name!r} is already registered.")
+        if len(name.split(SEPARATOR)) > MAX_ROUTE_SEGMENTS:
+            raise ValueError(f"The route {name!r} has too many segments.")
+        self.routes[name] = Route(name, handler)
+
+    def remove_routes(self, owner: object):
+        """Removes the routes handled by the methods of `owner`, e.g. a cog."""
+        for name in [
+            name
+            for name, route in self.routes.items()
+            if getattr(route.handler, "__self__", None) is owner
+        ]:
+            del self.routes[name]
+
+    def resolve(self, custom_id: str) -> Optional[tuple[Route, list]]:
+        segments = custom_id.split(SEPARATOR)
+        for count in range(min(len(segments), MAX_ROUTE_SEGMENTS), 0, -1):
+            route = self.routes.get(SEPARATOR.join(segments[:count]))
+            if route:
+                return route, route.parse(segments[count:])
+        return None
+
+    async def dispatch(self, kind: str, custom_id: str, inter: disnake.Interaction):
+        try:
+            resolved = self.resolve(custom_id)
+        except ValueError:
+            logging.warning("Malformed custom_id %r.", custom_id)
+            resolved = None
+
+        if resolved is None:
+            UNROUTED_COMPONENTS.inc(kind)
+            return
+
+        route, args = resolved
+        start_time = time.perf_counter()
+        try:
+            await route.handler(inter, *args)
+        finally:
+            HANDLER_DURATION.observe(time.perf_counter() - start_time, kind, route.name)
+
+    async def on_button_click(self, inter: disnake.MessageInteraction):
+        await self.dispatch("button", inter.component.custom_id, inter)
+
+    async def on_dropdown(self, inter: disnake.MessageInteraction):
+        await self.dispatch("select", inter.component.custom_id, inter)
+
+    async def on_modal_submit(self, inter: disnake.ModalInteraction):
+        await self.dispatch("modal", inter.custom_id, inter)
+
+    def install(self, bot: commands.InteractionBot):
+        bot.add_listener(self.on_button_click)
+        bot.add_listener(self.on_dropdown)
+        bot.add_listener(self.on_modal_submit)
+
+
+component_router = ComponentRouter()
+
+UNROUTED_COMPONENTS = metrics.counter(
+    "rubby_unrouted_components_total",
+    "Component and modal interactions without a matching route.",
+    ("type",),
+)
@@ -1,7 +1,16 @@
+import asyncio
+import contextlib
 import logging
-from typing import Optional
-from motor.motor_asyncio import AsyncIOMotorClient
-from rubby.misc import Env
+from typing import AsyncIterator, Optional
+
+import pymongo
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from rubby.metrics import MongoCommandListener
+from rubby.misc import Config, Env
+from rubby.profiles import CLIENT_PROFILES, OPERATION_CLASSES
+from rubby.schema import bootstrap_schema
+
+DEFAULT_DATABASE_NAME = "rubby"
 
 
 class DatabaseManager:
@@ -19,9 +28,21 @@ class DatabaseManager:
                 raise ValueError(
                     "MongoDB URI not provided. Please provide a valid MongoDB URI to initialize the DatabaseManager."
                 )
+            profile = CLIENT_PROFILES[Config.DATABASE_PROFILE]
             cls._instance = cls.__new__(cls)
-            cls._instance.client = AsyncIOMotorClient(Env.MONGO_URI)
+            cls._instance.client = AsyncIOMotorClient(
+                Env.MONGO_URI,
+                event_listeners=[MongoCommandListener()],
+                **profile.options(),
+            )
+            cls._instance.database_name = Env.MONGO_DBNAME or DEFAULT_DATABASE_NAME
             cls._instance.initialized = True
+            await asyncio.gather(
+                bootstrap_schema(
+                    cls._instance.client[cls._instance.database_name]
+                ),
+                warm_pool(cls._instance.client, profile.min_pool_size),
+            )
             logging.debug(
                 "DatabaseManager initialized successfully. Using new instance."
             )
@@ -39,10 +60,46 @@ class DatabaseManager:
         return cls._instance
 
 
-async def get_database(database_name: Optional[str] = "rubby"):
+async def warm_pool(client: AsyncIOMotorClient, connections: int):
+    # Concurrent pings each check out a connection, so the pool opens them now
+    # rather than on the first interactions. At least one is sent, which also
+    # fails the startup early if the server can't be reached.
+    await asyncio.gather(
+        *(client.admin.command("ping") for _ in range(max(connections, 1)))
+    )
+
+
+async def get_database(
+    database_name: Optional[str] = None, operation_class: Optional[str] = None
+):
     if not DatabaseManager.instance().initialized:
         logging.debug("Initializing DatabaseManager for database access.")
         await DatabaseManager.initialize()
     else:
         logging.debug("Using existing DatabaseManager instance for database access.")
-    return DatabaseManager.instance().client[database_name]
+
+    manager = DatabaseManager.instance()
+    database_name = database_name or manager.database_name
+    if operation_class is None:
+        return manager.client[database_name]
+
+    options = OPERATION_CLASSES[operation_class]
+    return manager.client.get_database(
+        database_name,
+        write_concern=options.write_concern,
+        read_preference=options.read_preference,
+    )
+
+
+@contextlib.asynccontextmanager
+async def database_operation(
+    operation_class: str,
+) -> AsyncIterator[AsyncIOMotorDatabase]:
+    """Yields the database with the concerns of an operation class.
+
+    The class's time limit applies to every operation of the block, including
+    the time spent waiting for a connection.
+    """
+    database = await get_database(operation_class=operation_class)
+    with pymongo.timeout(OPERATION_CLASSES[operation_class].max_time_ms / 1000):
+        yield database
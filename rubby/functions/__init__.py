@@ -1,3 +1,9 @@
+from .guild_settings import GuildSettingsCache, guild_settings
 from .time_object import create_time_object
+from .embed_builder import EmbedBuilder
 from .truncate_components import truncate_embed
+from .truncate_text import truncate_text
+from .user_cache import UserCache, user_cache
 from .user_details import UserDetails, get_user_details
+from .message_edit_coalescer import MessageEditCoalescer, message_edit_coalescer
+from .write_behind import Operation, WriteBehind, write_behind
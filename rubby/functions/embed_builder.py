@@ -0,0 +1,136 @@
+from datetime import datetime
+from typing import Optional, Union
+
+import disnake
+
+from rubby.functions.truncate_text import truncate_text
+from rubby.misc.constants import Constants
+
+
+class EmbedBuilder:
+    """Builds an embed payload that always fits Discord's limits.
+
+    Every text is truncated against its own limit and what is left of the 6000
+    characters an embed may hold in total, as it is added. Parts added first
+    therefore win when the total runs out; fields that no longer fit are dropped.
+    """
+
+    def __init__(
+        self,
+        title: Optional[str] = None,
+        description: Optional[str] = None,
+        color: Union[disnake.Color, int, None] = None,
+        timestamp: Optional[datetime] = None,
+        url: Optional[str] = None,
+    ):
+        self.remaining = Constants.EMBED_TOTAL_LIMIT
+        self.payload: dict = {"type": "rich"}
+        self.fields: list[dict] = []
+
+        self._set("title", title, Constants.EMBED_TITLE_LIMIT)
+        self._set("description", description, Constants.EMBED_DESCRIPTION_LIMIT)
+        if color is not None:
+            self.payload["color"] = int(color)
+        if timestamp is not None:
+            self.payload["timestamp"] = timestamp.isoformat()
+        if url is not None:
+            self.payload["url"] = url
+
+    def _fit(self, text: Optional[str], limit: int) -> Optional[str]:
+        if text is None:
+            return None
+
+        text = truncate_text(str(text), min(limit, self.remaining))
+        self.remaining -= len(text)
+        return text
+
+    def _set(self, key: str, text: Optional[str], limit: int):
+        text = self._fit(text, limit)
+        if text:
+            self.payload[key] = text
+
+    def set_author(
+        self, name: str, url: Optional[str] = None, icon_url: Optional[str] = None
+    ) -> "EmbedBuilder":
+        name = self._fit(name, Constants.EMBED_AUTHOR_NAME_LIMIT)
+        if name:
+            author = {"name": name}
+            if url:
+                author["url"] = url
+            if icon_url:
+                author["icon_url"] = icon_url
+            self.payload["author"] = author
+        return self
+
+    def set_footer(self, text: str, icon_url: Optional[str] = None) -> "EmbedBuilder":
+        text = self._fit(text, Constants.EMBED_FOOTER_TEXT_LIMIT)
+        if text:
+            footer = {"text": text}
+            if icon_url:
+                footer["icon_url"] = icon_url
+            self.payload["footer"] = footer
+        return self
+
+    def set_thumbnail(self, url: Optional[str]) -> "EmbedBuilder":
+        if url:
+            self.payload["thumbnail"] = {"url": url}
+        return self
+
+    def set_image(self, url: Optional[str]) -> "EmbedBuilder":
+        if url:
+            self.payload["image"] = {"url": url}
+        return self
+
+    def add_field(self, name: str, value: str, inline: bool = True) -> "EmbedBuilder":
+        # Both the name and the value of a field need at least one character.
+        if len(self.fields) >= Constants.EMBED_FIELD_LIMIT or self.remaining < 2:
+            return self
+
+        name = truncate_text(
+            str(name), min(Constants.EMBED_FIELD_NAME_LIMIT, self.remaining - 1)
+        )
+        value = truncate_text(
+            str(value),
+            min(Constants.EMBED_FIELD_VALUE_LIMIT, self.remaining - len(name)),
+        )
+        if name and value:
+            self.remaining -= len(name) + len(value)
+            self.fields.append({"name": name, "value": value, "inline": inline})
+        return self
+
+    def to_dict(self) -> dict:
+        payload = {
+            key: dict(value) if isinstance(value, dict) else value
+            for key, value in self.payload.items()
+        }
+        if self.fields:
+            payload["fields"] = [dict(field) for field in self.fields]
+        return payload
+
+    def build(self) -> disnake.Embed:
+        return disnake.Embed.from_dict(self.to_dict())
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EmbedBuilder":
+        builder = cls(data.get("title"), data.get("description"), url=data.get("url"))
+        for key in ("color", "timestamp"):
+            if key in data:
+                builder.payload[key] = data[key]
+
+        if "author" in data:
+            builder.set_author(
+                data["author"].get("name"),
+                data["author"].get("url"),
+                data["author"].get("icon_url"),
+            )
+        if "footer" in data:
+            builder.set_footer(
+                data["footer"].get("text"), data["footer"].get("icon_url")
+            )
+        for key in ("thumbnail", "image"):
+            if key in data:
+                builder.payload[key] = dict(data[key])
+
+        for field in data.get("fields", []):
+            builder.add_field(field["name"], field["value"], field.get("inline", True))
+        return builder
@@ -1,2 +1,26 @@
 from .create_giveaway_buttons import create_giveaway_buttons
 from .create_giveaway_embed import create_giveaway_embed
+from .giveaway_scheduler import GiveawayScheduler, giveaway_scheduler
+from .update_giveaway import update_giveaway
+from .giveaway_entries import (
+    count_participants,
+    delete_participants,
+    fetch_participants,
+    is_participant,
+    iter_entries,
+    iter_participants,
+    toggle_participant,
+)
+from .draw_winners import (
+    AliasTable,
+    draw_winners,
+    reroll_winners,
+    sample_participants,
+    sample_weighted_participants,
+)
+from .giveaway_messages import (
+    create_ended_giveaway_embed,
+    get_giveaway_message,
+    get_messageable,
+    get_result_message,
+)
@@ -1,12 +1,13 @@
 import disnake
 import pendulum
 
+from rubby.components import component_id
 from rubby.functions.time_object import TimeObject
 from rubby.functions.truncate_components import truncate_buttons
 
 
 async def create_giveaway_buttons(
-    count: int, end_date: TimeObject, disabled: bool = False
+    giveaway_id: int, count: int, end_date: TimeObject, disabled: bool = False
 ) -> list[disnake.ui.Button]:
     disabled = end_date.date_time <= pendulum.now() or disabled
 
@@ -22,14 +23,14 @@ async def create_giveaway_buttons(
                 style=disnake.ButtonStyle.primary,
                 label=f"Participate ({count})",
                 disabled=disabled,
-                custom_id="giveaway:enter",
+                custom_id=component_id("giveaway:enter", giveaway_id),
                 emoji="🎉",
             ),
             disnake.ui.Button(
                 style=disnake.ButtonStyle.secondary,
                 label=time_string,
                 disabled=True,
-                custom_id="giveaway:ends",
+                custom_id=component_id("giveaway:ends", giveaway_id),
             ),
         ]
     )
@@ -1,35 +1,34 @@
+from datetime import datetime
+from functools import lru_cache
+
 import disnake
 import pendulum
 
+from rubby.functions.embed_builder import EmbedBuilder
 from rubby.functions.time_object import TimeObject
-from rubby.functions.truncate_components import truncate_embed
 from rubby.functions.user_details import UserDetails
 
 
-def create_giveaway_embed(
-    created_by: UserDetails,
+@lru_cache(maxsize=256)
+def render_giveaway_embed(
+    host_name: str,
     title: str,
     description: str,
     winner_count: int,
-    end_date: TimeObject,
-    allowed_roles: list[int] = None,
-):
-    color = (
-        disnake.Color.blurple()
-        if end_date.date_time > pendulum.now()
-        else disnake.Color.red()
-    )
-
-    embed = disnake.Embed(
+    end_date: datetime,
+    ended: bool,
+    allowed_roles: tuple[int, ...],
+    role_weights: tuple[tuple[str, int], ...],
+) -> EmbedBuilder:
+    # Giveaway embeds only change when their configuration does, so a rendered
+    # payload is reused until then.
+    embed = EmbedBuilder(
         title=title,
         description=description,
-        color=color,
-    )
-
-    embed.set_footer(
-        text=f"Max Winners: {winner_count} • Hosted by {created_by.name}",
+        color=disnake.Color.red() if ended else disnake.Color.blurple(),
+        timestamp=end_date,
     )
-    embed.timestamp = end_date.date_time
+    embed.set_footer(text=f"Max Winners: {winner_count} • Hosted by {host_name}")
 
     if allowed_roles:
         embed.add_field(
@@ -37,4 +36,33 @@ def create_giveaway_embed(
             value=", ".join([f"<@&{role_id}>" for role_id in allowed_roles]),
         )
 
-    return truncate_embed(embed)
+    if role_weights:
+        embed.add_field(
+            name="Bonus Entries",
+            value=", ".join(
+                [f"<@&{role_id}> ×{weight}" for role_id, weight in role_weights]
+            ),
+        )
+
+    return embed
+
+
+def create_giveaway_embed(
+    created_by: UserDetails,
+    title: str,
+    description: str,
+    winner_count: int,
+    end_date: TimeObject,
+    allowed_roles: list[int] = None,
+    role_weights: dict[str, int] = None,
+) -> disnake.Embed:
+    return render_giveaway_embed(
+        created_by.name,
+        title,
+        description,
+        winner_count,
+        end_date.date_time,
+        end_date.date_time <= pendulum.now(),
+        tuple(allowed_roles or ()),
+        tuple((role_weights or {}).items()),
+    ).build()
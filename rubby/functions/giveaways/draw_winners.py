@@ -0,0 +1,198 @@
+import math
+import random
+import secrets
+from array import array
+from typing import Iterable
+
+from rubby.functions.giveaways.giveaway_entries import iter_entries, iter_participants
+from rubby.misc import Config
+from rubby.models import GiveawayRecord
+
+
+def create_draw_rng(seed: int, offset: int) -> random.Random:
+    return random.Random(f"{seed}:{offset}")
+
+
+def _skip_length(rng: random.Random, weight: float) -> int:
+    return math.floor(math.log(1.0 - rng.random()) / math.log(1.0 - weight))
+
+
+def _next_weight(rng: random.Random, weight: float, size: int) -> float:
+    return min(weight * math.exp(math.log(1.0 - rng.random()) / size), 1.0 - 1e-12)
+
+
+async def sample_participants(
+    giveaway_id: int,
+    size: int,
+    rng: random.Random,
+    excluded: Iterable[int] = (),
+) -> list[int]:
+    # Reservoir sampling (Algorithm L) over the entries ordered by user ID, so a
+    # draw never holds more than `size` IDs and replays identically from its seed.
+    excluded = set(excluded)
+    reservoir: list[int] = []
+    if size <= 0:
+        return reservoir
+
+    weight = _next_weight(rng, 1.0, size)
+    next_index = size + _skip_length(rng, weight)
+    index = 0
+
+    async for page in iter_participants(giveaway_id):
+        for user_id in page:
+            if user_id in excluded:
+                continue
+
+            if index < size:
+                reservoir.append(user_id)
+            elif index == next_index:
+                reservoir[rng.randrange(size)] = user_id
+                weight = _next_weight(rng, weight, size)
+                next_index += _skip_length(rng, weight) + 1
+            index += 1
+
+    rng.shuffle(reservoir)
+    return reservoir
+
+
+class AliasTable:
+    def __init__(self, weights: array):
+        # Vose's alias method: O(n) to build, then O(1) per weighted draw.
+        size = len(weights)
+        total = sum(weights)
+        scaled = array("d", (weight * size / total for weight in weights))
+
+        self.probabilities = array("d", bytes(8 * size))
+        self.aliases = array("q", bytes(8 * size))
+
+        small = array("q", (i for i in range(size) if scaled[i] < 1.0))
+        large = array("q", (i for i in range(size) if scaled[i] >= 1.0))
+
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probabilities[less] = scaled[less]
+            self.aliases[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+
+        for index in (*large, *small):
+            self.probabilities[index] = 1.0
+            self.aliases[index] = index
+
+    def __len__(self):
+        return len(self.probabilities)
+
+    def sample(self, rng: random.Random) -> int:
+        index = rng.randrange(len(self.probabilities))
+        return (
+            index if rng.random() < self.probabilities[index] else self.aliases[index]
+        )
+
+
+def weighted_sample(
+    user_ids: array, weights: array, size: int, rng: random.Random
+) -> list[int]:
+    # Distinct winners are drawn one after another from the alias table and
+    # duplicates rejected. Once rejections pile up, the table is rebuilt over the
+    # participants that are left so heavy winners cannot stall the draw.
+    indexes = array("q", range(len(user_ids)))
+    table = AliasTable(weights)
+    chosen: set[int] = set()
+    sample: list[int] = []
+    rejections = 0
+
+    while len(sample) < min(size, len(user_ids)):
+        index = indexes[table.sample(rng)]
+        if index not in chosen:
+            chosen.add(index)
+            sample.append(user_ids[index])
+            continue
+
+        rejections += 1
+        if rejections > 4 * len(chosen) + 16:
+            indexes = array("q", (i for i in indexes if i not in chosen))
+            table = AliasTable(array("d", (weights[i] for i in indexes)))
+            rejections = 0
+            chosen.clear()
+
+    return sample
+
+
+async def sample_weighted_participants(
+    giveaway_id: int,
+    size: int,
+    rng: random.Random,
+    excluded: Iterable[int] = (),
+) -> list[int]:
+    excluded = set(excluded)
+    user_ids = array("q")
+    weights = array("d")
+
+    async for page in iter_entries(giveaway_id):
+        for entry in page:
+            if entry["user_id"] in excluded:
+                continue
+            user_ids.append(entry["user_id"])
+            weights.append(entry.get("weight", 1))
+
+    if not user_ids or size <= 0:
+        return []
+
+    return weighted_sample(user_ids, weights, size, rng)
+
+
+async def draw_sample(
+    giveaway: GiveawayRecord, size: int, rng: random.Random, excluded: Iterable[int] = ()
+) -> list[int]:
+    if giveaway.role_weights:
+        return await sample_weighted_participants(
+            giveaway.id, size, rng, excluded
+        )
+    return await sample_participants(giveaway.id, size, rng, excluded)
+
+
+async def draw_winners(giveaway: GiveawayRecord) -> dict:
+    # More participants than winners are drawn, in random order, so rerolls can
+    # hand out the next ones without scanning the entries again.
+    seed = secrets.randbits(63)
+    order = await draw_sample(
+        giveaway,
+        giveaway.winner_count * (Config.GIVEAWAY_REROLL_RESERVE + 1),
+        create_draw_rng(seed, 0),
+    )
+    winners = order[: giveaway.winner_count]
+
+    return {
+        "draw_seed": seed,
+        "draw_order": order,
+        "draw_position": len(winners),
+        "winners": winners,
+    }
+
+
+async def reroll_winners(giveaway: GiveawayRecord) -> dict:
+    seed = giveaway.draw_seed or secrets.randbits(63)
+    order = list(giveaway.draw_order or giveaway.winners)
+    position = (
+        giveaway.draw_position if giveaway.draw_position is not None else len(order)
+    )
+
+    winners = order[position : position + giveaway.winner_count]
+    missing = giveaway.winner_count - len(winners)
+
+    if missing > 0:
+        extra = await draw_sample(
+            giveaway,
+            missing * (Config.GIVEAWAY_REROLL_RESERVE + 1),
+            create_draw_rng(seed, len(order)),
+            excluded=order,
+        )
+        order.extend(extra)
+        winners.extend(extra[:missing])
+
+    return {
+        "draw_seed": seed,
+        "draw_order": order,
+        "draw_position": position + len(winners),
+        "winners": winners,
+    }
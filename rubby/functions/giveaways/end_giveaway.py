@@ -0,0 +1,180 @@
+import logging
+from typing import Optional
+
+import disnake
+import pendulum
+from disnake.ext import commands
+from pymongo import ReturnDocument
+
+from rubby.cluster import INSTANCE_ID
+from rubby.database import database_operation, get_database
+from rubby.misc import Config
+from rubby.models import GiveawayRecord
+from rubby.schema import ACTIVE_GIVEAWAYS_FILTER
+
+from rubby.functions.message_edit_coalescer import (
+    EditableMessage,
+    message_edit_coalescer,
+)
+from rubby.functions.time_object import create_time_object
+from rubby.functions.write_behind import write_behind
+from rubby.functions.giveaways.create_giveaway_buttons import create_giveaway_buttons
+from rubby.functions.giveaways.draw_winners import draw_winners
+from rubby.functions.giveaways.giveaway_entries import (
+    count_participants,
+    delete_participants,
+)
+from rubby.functions.giveaways.giveaway_messages import (
+    create_ended_giveaway_embed,
+    find_result_message,
+    get_giveaway_message,
+    get_result_message,
+)
+
+
+class LeaseLostError(Exception):
+    """Raised when another instance took over a giveaway being ended."""
+
+
+async def claim_giveaway(
+    giveaway_id: int, force: bool = False
+) -> Optional[GiveawayRecord]:
+    """Leases an active giveaway to this instance, so no other one ends it.
+
+    Only giveaways past their end date are claimed unless `force` is set.
+    Expired leases, left by an instance that stopped while ending a giveaway,
+    can be claimed again.
+    """
+    # Entries and settings still pending must be in the database for the draw.
+    await write_behind.flush()
+
+    now = pendulum.now("UTC")
+    query = {
+        "_id": giveaway_id,
+        **ACTIVE_GIVEAWAYS_FILTER,
+        "$or": [
+            {"lease_expires": {"$not": {"$gt": now}}},
+            {"lease_owner": INSTANCE_ID},
+        ],
+    }
+    if not force:
+        query["end_date"] = {"$lte": now}
+
+    async with database_operation("admin") as database:
+        return GiveawayRecord.decode(
+            await database.giveaways.find_one_and_update(
+                query,
+                {
+                    "$set": {
+                        "lease_owner": INSTANCE_ID,
+                        "lease_expires": now.add(
+                            seconds=Config.GIVEAWAY_LEASE_DURATION
+                        ),
+                    }
+                },
+                return_document=ReturnDocument.AFTER,
+            )
+        )
+
+
+async def update_claimed(giveaway_id: int, update: dict, **query):
+    async with database_operation("admin") as database:
+        result = await database.giveaways.update_one(
+            {"_id": giveaway_id, "lease_owner": INSTANCE_ID, **query}, update
+        )
+    if not result.matched_count:
+        raise LeaseLostError(giveaway_id)
+
+
+def create_result_embed(
+    giveaway: GiveawayRecord, winners: list[int]
+) -> disnake.Embed:
+    description = "There were not enough participants to draw winners."
+    if winners:
+        description = f"The winner of this giveaway {'are' if len(winners) > 1 else 'is'} tagged above! Congratulations 🎉"
+
+    result_embed = disnake.Embed(
+        title=f"{giveaway.title} (Results)",
+        description=description,
+        color=disnake.Color.blurple(),
+    )
+    result_embed.add_field(
+        name="Prize",
+        value=giveaway.prize,
+    )
+    return result_embed
+
+
+async def end_claimed_giveaway(
+    bot: commands.Bot, giveaway: GiveawayRecord
+) -> Optional[EditableMessage]:
+    """Ends a giveaway claimed with `claim_giveaway`.
+
+    The draw is saved before it is announced and the result message along
+    with the final transition, so an instance taking over after a crash
+    announces the same winners. The time of the announcement is saved before
+    it is posted, so an instance taking over after one was posted but not
+    saved finds it in the channel instead of posting it again.
+    Returns the result message, or `None` if the giveaway message was deleted,
+    in which case the giveaway is deleted too.
+    """
+    message = get_giveaway_message(bot, giveaway)
+    end_date = await create_time_object(giveaway.guild_id)
+    # Entries are closed once claimed, recounting them fixes a count left off
+    # by a toggle that failed halfway.
+    giveaway.participant_count = await count_participants(giveaway.id)
+
+    buttons = await create_giveaway_buttons(
+        giveaway.id, giveaway.participant_count, end_date, disabled=True
+    )
+
+    try:
+        # Final, so clicks handled until the giveaway is marked as ended can't
+        # enable the buttons again.
+        await message_edit_coalescer.flush(
+            message,
+            final=True,
+            content=None,
+            embed=await create_ended_giveaway_embed(bot, giveaway, end_date),
+            components=buttons,
+        )
+    except disnake.NotFound:
+        database = await get_database()
+        await database.giveaways.delete_one({"_id": giveaway.id})
+        await delete_participants(giveaway.id)
+        logging.debug("Deleted giveaway %s.", giveaway.id)
+        return None
+
+    winners = giveaway.winners
+    if giveaway.draw_seed is None:
+        draw = await draw_winners(giveaway)
+        await update_claimed(giveaway.id, {"$set": draw})
+        winners = draw["winners"]
+
+    result_message = get_result_message(bot, giveaway)
+    if result_message is None and giveaway.announced_at is not None:
+        result_message = await find_result_message(bot, giveaway)
+    if result_message is None:
+        await update_claimed(
+            giveaway.id, {"$set": {"announced_at": pendulum.now("UTC")}}
+        )
+        result_message = await message.reply(
+            embed=create_result_embed(giveaway, winners),
+            content=", ".join([f"<@{winner}>" for winner in winners]) or None,
+        )
+
+    await update_claimed(
+        giveaway.id,
+        {
+            "$set": {
+                "result_message_id": result_message.id,
+                "participant_count": giveaway.participant_count,
+                "ended": True,
+                "end_date": end_date.date_time,
+            },
+            "$unset": {"lease_owner": "", "lease_expires": ""},
+        },
+        ended=False,
+    )
+    logging.debug("Ended giveaway %s.", giveaway.id)
+    return result_message
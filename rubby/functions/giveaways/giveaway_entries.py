@@ -0,0 +1,175 @@
+import asyncio
+from typing import AsyncIterator, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from rubby.database import database_operation, get_database
+from rubby.functions.write_behind import Operation, write_behind
+
+ENTRIES_PAGE_SIZE = 1_000
+# Entries are closed once a giveaway is leased to be ended, so the draw sees
+# the entries of the clicks that completed before it.
+OPEN_GIVEAWAY_FILTER = {"ended": False, "lease_owner": {"$exists": False}}
+
+
+async def toggle_participant(
+    giveaway_id: int, user_id: int, weight: int = 1
+) -> Optional[tuple[bool, int]]:
+    entry = {"giveaway_id": giveaway_id, "user_id": user_id}
+    # Entries without a weight count once, which keeps unweighted entries small.
+    weighted_entry = {**entry, "weight": weight} if weight != 1 else entry
+
+    if write_behind.enabled:
+        return await _toggle_participant_behind(entry, weighted_entry)
+
+    async with database_operation("hot-toggle") as database:
+        joined = await _toggle_entry(database, entry, weighted_entry)
+        giveaway = await database.giveaways.find_one_and_update(
+            {"_id": giveaway_id, **OPEN_GIVEAWAY_FILTER},
+            {"$inc": {"participant_count": 1 if joined else -1}},
+            projection={"_id": 0, "participant_count": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+
+        # The entry and the count are separate writes, a failure in between
+        # leaves the count off until the giveaway ends and it is recounted.
+        if not giveaway:
+            # The giveaway ended or was deleted in the meantime, undo the entry
+            # by toggling it again, which also holds if other clicks toggled it
+            # since.
+            await _toggle_entry(database, entry, weighted_entry)
+            return None
+
+    return joined, giveaway["participant_count"]
+
+
+async def _toggle_entry(
+    database: AsyncIOMotorDatabase, entry: dict, weighted_entry: dict
+) -> bool:
+    """Inserts the entry or deletes it if it exists, returns whether it joined."""
+    while True:
+        try:
+            await database.giveaway_entries.insert_one(dict(weighted_entry))
+            return True
+        except DuplicateKeyError:
+            result = await database.giveaway_entries.delete_one(entry)
+            if result.deleted_count:
+                return False
+            # A concurrent click deleted the entry first, this one inserts it.
+
+
+async def _toggle_participant_behind(
+    entry: dict, weighted_entry: dict
+) -> Optional[tuple[bool, int]]:
+    giveaway_query = {"_id": entry["giveaway_id"], **OPEN_GIVEAWAY_FILTER}
+
+    async with database_operation("hot-toggle") as database:
+        while True:
+            flushed_seq = write_behind.flushed_seq
+            entered, giveaway = await asyncio.gather(
+                database.giveaway_entries.find_one(entry, {"_id": 1}),
+                database.giveaways.find_one(
+                    giveaway_query, {"_id": 1, "participant_count": 1}
+                ),
+            )
+            if write_behind.flushed_seq == flushed_seq:
+                break
+
+    # Nothing is awaited from here until both writes are journaled, so toggles
+    # of the same giveaway can't interleave and the count stays exact.
+    entered = write_behind.apply_pending("giveaway_entries", entry, entered)
+    giveaway = write_behind.apply_pending("giveaways", giveaway_query, giveaway)
+    if not giveaway:
+        return None
+
+    joined = entered is None
+    # Incremented rather than set, so writes of other processes aren't
+    # overwritten. The write-behind applies each increment once, even when
+    # replaying its journal.
+    participant_count = giveaway["participant_count"] + (1 if joined else -1)
+
+    await write_behind.write(
+        [
+            (
+                Operation(
+                    "giveaway_entries", entry, {"$set": weighted_entry}, upsert=True
+                )
+                if joined
+                else Operation("giveaway_entries", entry)
+            ),
+            Operation(
+                "giveaways",
+                giveaway_query,
+                {"$inc": {"participant_count": 1 if joined else -1}},
+            ),
+        ]
+    )
+    return joined, participant_count
+
+
+async def is_participant(giveaway_id: int, user_id: int) -> bool:
+    entry = await write_behind.find_one(
+        "giveaway_entries", {"giveaway_id": giveaway_id, "user_id": user_id}, {"_id": 1}
+    )
+    return entry is not None
+
+
+async def count_participants(giveaway_id: int) -> int:
+    database = await get_database()
+    return await database.giveaway_entries.count_documents(
+        {"giveaway_id": giveaway_id}
+    )
+
+
+async def iter_entries(
+    giveaway_id: int, page_size: int = ENTRIES_PAGE_SIZE
+) -> AsyncIterator[list[dict]]:
+    database = await get_database()
+    last_user_id = None
+
+    while True:
+        query = {"giveaway_id": giveaway_id}
+        if last_user_id is not None:
+            query["user_id"] = {"$gt": last_user_id}
+
+        page = [
+            entry
+            async for entry in database.giveaway_entries.find(
+                query, {"_id": 0, "user_id": 1, "weight": 1}
+            )
+            .sort("user_id", ASCENDING)
+            .limit(page_size)
+        ]
+        if not page:
+            return
+
+        yield page
+
+        if len(page) < page_size:
+            return
+        last_user_id = page[-1]["user_id"]
+
+
+async def iter_participants(
+    giveaway_id: int, page_size: int = ENTRIES_PAGE_SIZE
+) -> AsyncIterator[list[int]]:
+    async for page in iter_entries(giveaway_id, page_size):
+        yield [entry["user_id"] for entry in page]
+
+
+async def fetch_participants(giveaway_id: int) -> list[int]:
+    participants = []
+    async for page in iter_participants(giveaway_id):
+        participants.extend(page)
+    return participants
+
+
+async def delete_participants(giveaway_id: int):
+    # Entries still pending would be written back after the delete.
+    await write_behind.flush()
+
+    database = await get_database()
+    await database.giveaway_entries.delete_many({"giveaway_id": giveaway_id})
+
@@ -0,0 +1,163 @@
+from typing import Optional
+
+import disnake
+from pymongo import ASCENDING, DESCENDING
+
+from rubby.components import component_id
+from rubby.database import database_operation
+from rubby.functions.embed_builder import EmbedBuilder
+from rubby.functions.truncate_components import truncate_buttons
+from rubby.misc import Config
+from rubby.models import GiveawayRecord
+
+LIST_CUSTOM_ID_PREFIX = "giveaway:list"
+LIST_PROJECTION = {
+    "_id": 1,
+    "channel_id": 1,
+    "title": 1,
+    "prize": 1,
+    "ended": 1,
+    "end_date": 1,
+    "winner_count": 1,
+    "participant_count": 1,
+}
+STATUS_CODES = {"active": "a", "ended": "e"}
+
+
+class GiveawayListFilters:
+    def __init__(
+        self,
+        status: Optional[str] = None,
+        channel_id: Optional[int] = None,
+        created_by: Optional[int] = None,
+        message_id: Optional[int] = None,
+    ):
+        self.status = status if status in STATUS_CODES else None
+        self.channel_id = channel_id
+        self.created_by = created_by
+        self.message_id = message_id
+
+    def query(self, guild_id: int) -> dict:
+        query = {"guild_id": guild_id}
+        if self.status:
+            query["ended"] = self.status == "ended"
+        if self.channel_id:
+            query["channel_id"] = self.channel_id
+        if self.created_by:
+            query["created_by"] = self.created_by
+        if self.message_id:
+            query["_id"] = self.message_id
+        return query
+
+    def custom_id(self, direction: str, cursor: int) -> str:
+        return component_id(
+            LIST_CUSTOM_ID_PREFIX,
+            direction,
+            cursor,
+            STATUS_CODES.get(self.status),
+            self.channel_id,
+            self.created_by,
+        )
+
+    @classmethod
+    def from_status_code(
+        cls,
+        status_code: Optional[str],
+        channel_id: Optional[int],
+        created_by: Optional[int],
+    ) -> "GiveawayListFilters":
+        statuses = {code: status for status, code in STATUS_CODES.items()}
+        return cls(statuses.get(status_code), channel_id, created_by)
+
+
+async def fetch_giveaway_page(
+    guild_id: int,
+    filters: GiveawayListFilters,
+    direction: str = "next",
+    cursor: Optional[int] = None,
+) -> tuple[list[GiveawayRecord], bool, bool]:
+    # Pages are keyed on the message ID (newest first) instead of skip/limit.
+    # Each filter has an index on the guild, the filter and the message ID, so
+    # a page with one filter reads its matches only. Combined filters use the
+    # index of one of them and skip the giveaways the others exclude.
+    query = filters.query(guild_id)
+    if cursor is not None:
+        query["_id"] = {"$lt": cursor} if direction == "next" else {"$gt": cursor}
+
+    async with database_operation("analytics") as database:
+        giveaways = GiveawayRecord.decode_many(
+            await database.giveaways.find(query, LIST_PROJECTION)
+            .sort("_id", DESCENDING if direction == "next" else ASCENDING)
+            .to_list(Config.GIVEAWAY_LIST_PAGE_SIZE + 1)
+        )
+
+    has_more = len(giveaways) > Config.GIVEAWAY_LIST_PAGE_SIZE
+    giveaways = giveaways[: Config.GIVEAWAY_LIST_PAGE_SIZE]
+
+    if direction == "next":
+        return giveaways, cursor is not None, has_more
+
+    giveaways.reverse()
+    return giveaways, has_more, True
+
+
+def create_giveaway_list_embed(
+    guild_id: int, giveaways: list[GiveawayRecord]
+) -> disnake.Embed:
+    embed = EmbedBuilder(
+        title="Giveaways",
+        description=(
+            f"Showing {len(giveaways)} giveaway{'s' if len(giveaways) > 1 else ''}."
+            if giveaways
+            else "I couldn't find any giveaway matching these filters."
+        ),
+        color=disnake.Color.blurple(),
+    )
+
+    for giveaway in giveaways:
+        end_date = int(giveaway.end_date.timestamp())
+        jump_url = f"https://discord.com/channels/{guild_id}/{giveaway.channel_id}/{giveaway.id}"
+
+        embed.add_field(
+            name=f"{giveaway.title} ({'Ended' if giveaway.ended else 'Active'})",
+            value="\n".join(
+                [
+                    f"> **Prize:** {giveaway.prize}",
+                    f"> **{'Ended' if giveaway.ended else 'Ends'}:** <t:{end_date}:R>",
+                    f"> **Participants:** {giveaway.participant_count} • **Max Winners:** {giveaway.winner_count}",
+                    f"> **[Jump to giveaway]({jump_url})**",
+                ]
+            ),
+            inline=False,
+        )
+
+    return embed.build()
+
+
+def create_giveaway_list_buttons(
+    filters: GiveawayListFilters,
+    giveaways: list[GiveawayRecord],
+    has_previous: bool,
+    has_next: bool,
+) -> list[disnake.ui.Button]:
+    first_id = giveaways[0].id if giveaways else 0
+    last_id = giveaways[-1].id if giveaways else 0
+
+    return truncate_buttons(
+        [
+            disnake.ui.Button(
+                style=disnake.ButtonStyle.secondary,
+                label="Previous",
+                emoji="◀️",
+                custom_id=filters.custom_id("previous", first_id),
+                disabled=not has_previous,
+            ),
+            disnake.ui.Button(
+                style=disnake.ButtonStyle.secondary,
+                label="Next",
+                emoji="▶️",
+                custom_id=filters.custom_id("next", last_id),
+                disabled=not has_next,
+            ),
+        ]
+    )
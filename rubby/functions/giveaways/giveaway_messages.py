@@ -0,0 +1,73 @@
+from typing import Optional
+
+import disnake
+import pendulum
+from disnake.ext import commands
+
+from rubby.functions.time_object import TimeObject
+from rubby.functions.user_details import get_user_details
+from rubby.functions.giveaways.create_giveaway_embed import create_giveaway_embed
+from rubby.misc import Config
+from rubby.models import GiveawayRecord
+
+
+def get_messageable(bot: commands.Bot, channel_id: int) -> disnake.abc.Messageable:
+    # Giveaways are only hosted in text channels, which is the type partial
+    # messages need when the channel isn't cached.
+    return bot.get_channel(channel_id) or bot.get_partial_messageable(
+        channel_id, type=disnake.ChannelType.text
+    )
+
+
+def get_giveaway_message(
+    bot: commands.Bot, giveaway: GiveawayRecord
+) -> disnake.PartialMessage:
+    # Partial messages are built from the stored IDs, so editing, replying to or
+    # deleting a giveaway message costs one REST call instead of two.
+    return get_messageable(bot, giveaway.channel_id).get_partial_message(giveaway.id)
+
+
+def get_result_message(
+    bot: commands.Bot, giveaway: GiveawayRecord
+) -> Optional[disnake.PartialMessage]:
+    if not giveaway.result_message_id:
+        return None
+
+    return get_messageable(bot, giveaway.channel_id).get_partial_message(
+        giveaway.result_message_id
+    )
+
+
+async def find_result_message(
+    bot: commands.Bot, giveaway: GiveawayRecord
+) -> Optional[disnake.Message]:
+    """Looks for a result message posted without its ID being saved."""
+    # With some leeway for the clocks of this host and Discord's.
+    after = pendulum.instance(giveaway.announced_at).subtract(minutes=1)
+    history = get_messageable(bot, giveaway.channel_id).history(
+        after=after, limit=Config.GIVEAWAY_RESULT_LOOKUP_LIMIT
+    )
+    async for message in history:
+        if (
+            message.author.id == bot.user.id
+            and message.reference
+            and message.reference.message_id == giveaway.id
+        ):
+            return message
+    return None
+
+
+async def create_ended_giveaway_embed(
+    bot: commands.Bot, giveaway: GiveawayRecord, end_date: TimeObject
+) -> disnake.Embed:
+    user = await get_user_details(giveaway.created_by, bot)
+
+    return create_giveaway_embed(
+        user,
+        f"{giveaway.title} (Ended)",
+        giveaway.description,
+        giveaway.winner_count,
+        end_date,
+        giveaway.allowed_roles,
+        giveaway.role_weights,
+    )
@@ -0,0 +1,188 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+import disnake
+import pendulum
+
+from rubby.cluster import owned_guilds_filter
+from rubby.database import get_database
+from rubby.metrics import metrics
+from rubby.misc import Config
+from rubby.models import GiveawayRecord
+from rubby.schema import ACTIVE_GIVEAWAYS_FILTER
+
+MAX_SLEEP_SECONDS = 300.0
+# Errors that retrying won't fix, e.g. the bot can't post in the channel.
+PERMANENT_ERRORS = (disnake.Forbidden, disnake.NotFound)
+
+
+class GiveawayScheduler:
+    def __init__(self):
+        self.queue: list[tuple[float, int]] = []
+        self.deadlines: dict[int, float] = {}
+        self.wake_event = asyncio.Event()
+        # Failed attempts at ending each giveaway, and the giveaways given up on.
+        self.attempts: dict[int, int] = {}
+        self.abandoned: set[int] = set()
+        self.next_load = 0.0
+        self.last_tick = {"due": 0, "ended": 0, "failed": 0, "duration": 0.0}
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def schedule(self, giveaway_id: int, end_date: datetime):
+        deadline = pendulum.instance(end_date).timestamp()
+        self.deadlines[giveaway_id] = deadline
+        heapq.heappush(self.queue, (deadline, giveaway_id))
+        self.wake_event.set()
+
+    def unschedule(self, giveaway_id: int):
+        if self.deadlines.pop(giveaway_id, None) is not None:
+            self.wake_event.set()
+
+    async def load(self):
+        """Schedules the active giveaways that aren't scheduled yet.
+
+        Giveaways created or edited through another process are only scheduled
+        in its queue, so they are loaded again every `GIVEAWAY_POLL_INTERVAL`
+        to be ended here if they belong to this process.
+        """
+        database = await get_database()
+
+        # Other processes end the giveaways of the guilds on their shards. The
+        # server still reads every active giveaway to match its shard, only
+        # the ones of this process are sent back.
+        giveaways = GiveawayRecord.decode_many(
+            await database.giveaways.find(
+                {**ACTIVE_GIVEAWAYS_FILTER, **owned_guilds_filter()}, {"end_date": 1}
+            )
+            .sort("end_date", 1)
+            .to_list(None)
+        )
+        scheduled = 0
+        for giveaway in giveaways:
+            # Giveaways already scheduled keep their deadline, which may be a
+            # retry's.
+            if giveaway.id in self.deadlines or giveaway.id in self.abandoned:
+                continue
+            self.schedule(giveaway.id, giveaway.end_datetime)
+            scheduled += 1
+
+        self.next_load = time.monotonic() + Config.GIVEAWAY_POLL_INTERVAL
+        if scheduled:
+            logging.info("Scheduled %s active giveaways.", scheduled)
+
+    def pop_due(self, now: float) -> list[int]:
+        due = []
+        while self.queue and self.queue[0][0] <= now:
+            deadline, giveaway_id = heapq.heappop(self.queue)
+            if self.deadlines.get(giveaway_id) != deadline:
+                continue
+            del self.deadlines[giveaway_id]
+            due.append(giveaway_id)
+        return due
+
+    def next_deadline(self) -> Optional[float]:
+        while self.queue:
+            deadline, giveaway_id = self.queue[0]
+            if self.deadlines.get(giveaway_id) == deadline:
+                return deadline
+            heapq.heappop(self.queue)
+        return None
+
+    async def process(
+        self, due: list[int], handler: Callable[[int], Awaitable[bool]]
+    ) -> dict:
+        start_time = time.perf_counter()
+        semaphore = asyncio.Semaphore(Config.GIVEAWAY_END_CONCURRENCY)
+
+        async def run(giveaway_id: int) -> Optional[bool]:
+            async with semaphore:
+                try:
+                    result = await handler(giveaway_id)
+                except Exception as error:
+                    logging.exception("Failed to end giveaway %s.", giveaway_id)
+                    self.retry(giveaway_id, error)
+                    return None
+
+                self.attempts.pop(giveaway_id, None)
+                return result
+
+        results = await asyncio.gather(*(run(giveaway_id) for giveaway_id in due))
+
+        return {
+            "due": len(due),
+            "ended": sum(1 for result in results if result),
+            "failed": sum(1 for result in results if result is None),
+            "duration": round(time.perf_counter() - start_time, 3),
+        }
+
+    def retry(self, giveaway_id: int, error: Exception):
+        attempts = self.attempts.get(giveaway_id, 0) + 1
+        if (
+            isinstance(error, PERMANENT_ERRORS)
+            or attempts >= Config.GIVEAWAY_END_MAX_ATTEMPTS
+        ):
+            # Until the next start, which tries every active giveaway again.
+            self.attempts.pop(giveaway_id, None)
+            self.abandoned.add(giveaway_id)
+            logging.warning(
+                "Gave up on ending giveaway %s after %s attempts.",
+                giveaway_id,
+                attempts,
+            )
+            return
+
+        self.attempts[giveaway_id] = attempts
+        self.schedule(
+            giveaway_id,
+            pendulum.now().add(seconds=Config.GIVEAWAY_END_RETRY_DELAY),
+        )
+
+    async def tick(self, handler: Callable[[int], Awaitable[bool]]):
+        if time.monotonic() >= self.next_load:
+            await self.load()
+
+        # Cleared before handling so that wake-ups raised while endings are
+        # in flight still cut the following sleep short.
+        self.wake_event.clear()
+
+        due = self.pop_due(pendulum.now().timestamp())
+        if due:
+            self.last_tick = await self.process(due, handler)
+            logging.info(
+                "Processed %s due giveaways: %s ended, %s failed in %ss.",
+                self.last_tick["due"],
+                self.last_tick["ended"],
+                self.last_tick["failed"],
+                self.last_tick["duration"],
+            )
+
+        deadline = self.next_deadline()
+        timeout = min(
+            MAX_SLEEP_SECONDS,
+            max(self.next_load - time.monotonic(), 0),
+            (
+                MAX_SLEEP_SECONDS
+                if deadline is None
+                else max(deadline - pendulum.now().timestamp(), 0)
+            ),
+        )
+
+        try:
+            await asyncio.wait_for(self.wake_event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+giveaway_scheduler = GiveawayScheduler()
+
+metrics.gauge(
+    "rubby_giveaway_scheduler_queue_depth",
+    "Giveaways waiting in the scheduler for their end date.",
+    function=lambda: len(giveaway_scheduler),
+)
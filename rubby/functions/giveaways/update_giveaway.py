@@ -0,0 +1,33 @@
+from typing import Optional
+
+from pymongo import ReturnDocument
+
+from rubby.database import get_database
+from rubby.functions.write_behind import write_behind
+from rubby.models import GiveawayRecord
+
+
+async def update_giveaway(
+    giveaway_id: int, guild_id: int, fields: dict
+) -> Optional[GiveawayRecord]:
+    """Sets fields of a giveaway and returns it updated.
+
+    With write-behind enabled, the update is journaled instead of waiting for
+    the database.
+    """
+    query = {"_id": giveaway_id, "guild_id": guild_id}
+
+    if not write_behind.enabled:
+        database = await get_database()
+        return GiveawayRecord.decode(
+            await database.giveaways.find_one_and_update(
+                query, {"$set": fields}, return_document=ReturnDocument.AFTER
+            )
+        )
+
+    giveaway = await write_behind.find_one("giveaways", query)
+    if not giveaway:
+        return None
+
+    await write_behind.update_one("giveaways", query, {"$set": fields})
+    return GiveawayRecord.decode({**giveaway, **fields})
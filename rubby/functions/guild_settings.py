@@ -0,0 +1,78 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from pymongo import ReturnDocument
+
+from rubby.database import get_database
+from rubby.misc import Config
+
+
+class GuildSettingsCache:
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: OrderedDict[int, tuple[float, dict]] = OrderedDict()
+        self.loading: dict[int, asyncio.Task] = {}
+
+    async def get(self, guild_id: int) -> dict:
+        entry = self.entries.get(guild_id)
+        if entry and entry[0] > time.monotonic():
+            self.entries.move_to_end(guild_id)
+            return entry[1]
+
+        task = self.loading.get(guild_id)
+        if task is None:
+            task = asyncio.create_task(self._load(guild_id))
+            self.loading[guild_id] = task
+
+        return await asyncio.shield(task)
+
+    async def update(self, guild_id: int, fields: dict, defaults: dict = None) -> dict:
+        update = {"$set": fields}
+        if defaults:
+            update["$setOnInsert"] = {
+                key: value
+                for key, value in defaults.items()
+                if key != "_id" and key not in fields
+            }
+
+        database = await get_database()
+        settings = await database.guilds.find_one_and_update(
+            {"_id": guild_id},
+            update,
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+        self.invalidate(guild_id)
+        self._store(guild_id, settings)
+        return settings
+
+    def invalidate(self, guild_id: int):
+        self.entries.pop(guild_id, None)
+        self.loading.pop(guild_id, None)
+
+    def _store(self, guild_id: int, settings: dict):
+        self.entries[guild_id] = (time.monotonic() + self.ttl, settings)
+        self.entries.move_to_end(guild_id)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def _load(self, guild_id: int) -> dict:
+        try:
+            database = await get_database()
+            settings = await database.guilds.find_one({"_id": guild_id}) or {}
+
+            # A load that raced with an invalidation must not overwrite it.
+            if self.loading.get(guild_id) is asyncio.current_task():
+                self._store(guild_id, settings)
+            return settings
+        finally:
+            if self.loading.get(guild_id) is asyncio.current_task():
+                del self.loading[guild_id]
+
+
+guild_settings = GuildSettingsCache(
+    Config.GUILD_SETTINGS_TTL, Config.GUILD_SETTINGS_CACHE_SIZE
+)
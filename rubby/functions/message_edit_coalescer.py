@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from typing import Union
+
+import disnake
+
+from rubby.misc import Config
+
+
+EditableMessage = Union[disnake.Message, disnake.PartialMessage]
+# Final messages remembered so late edits are dropped, the oldest are forgotten
+# first.
+CLOSED_MESSAGES_LIMIT = 10_000
+
+
+class MessageEditCoalescer:
+    def __init__(self, window: float):
+        self.window = window
+        self.pending: dict[int, tuple[EditableMessage, dict]] = {}
+        self.tasks: dict[int, asyncio.Task] = {}
+        # Ids of the messages whose last edit was flushed, in insertion order.
+        self.closed: dict[int, None] = {}
+        self.requested_edits = 0
+        self.performed_edits = 0
+        self.failed_edits = 0
+
+    @property
+    def saved_edits(self) -> int:
+        return (
+            self.requested_edits
+            - self.performed_edits
+            - self.failed_edits
+            - len(self.pending)
+        )
+
+    def queue(self, message: EditableMessage, **fields):
+        if message.id in self.closed:
+            return
+
+        self.requested_edits += 1
+        self._merge(message, fields)
+
+        if message.id not in self.tasks:
+            self.tasks[message.id] = asyncio.create_task(self._run(message.id))
+
+    async def flush(self, message: EditableMessage, final: bool = False, **fields):
+        """Edits the message now, along with the edits queued for it.
+
+        With `final`, edits queued afterwards are dropped, e.g. so a click
+        handled while a giveaway is ending can't enable its buttons again.
+        Unlike queued edits, a failed flush raises so callers can react to it.
+        """
+        if final:
+            self.closed[message.id] = None
+            if len(self.closed) > CLOSED_MESSAGES_LIMIT:
+                del self.closed[next(iter(self.closed))]
+
+        self.requested_edits += 1
+        self._merge(message, fields)
+
+        task = self.tasks.pop(message.id, None)
+        if task:
+            task.cancel()
+            # The task can't send another edit once it is cancelled, but one it
+            # already sent is only abandoned and may still be applied after
+            # this one.
+            await asyncio.gather(task, return_exceptions=True)
+
+        await self._edit(message.id, raise_errors=True)
+
+    def _merge(self, message: EditableMessage, fields: dict):
+        _, pending_fields = self.pending.get(message.id, (message, {}))
+        self.pending[message.id] = (message, {**pending_fields, **fields})
+
+    async def _run(self, message_id: int):
+        try:
+            await asyncio.sleep(self.window)
+            # Clicks that arrive while an edit is waiting on the rate limit are
+            # merged and sent as one more edit after another window.
+            while message_id in self.pending:
+                await self._edit(message_id)
+                if message_id in self.pending:
+                    await asyncio.sleep(self.window)
+        finally:
+            if self.tasks.get(message_id) is asyncio.current_task():
+                del self.tasks[message_id]
+
+    async def _edit(self, message_id: int, raise_errors: bool = False):
+        message, fields = self.pending.pop(message_id)
+
+        try:
+            await message.edit(**fields)
+        except disnake.HTTPException as error:
+            self.failed_edits += 1
+            if raise_errors:
+                raise
+            logging.warning("Failed to edit message %s: %s", message_id, error)
+            return
+
+        self.performed_edits += 1
+        logging.debug(
+            "Edited message %s. (%s edits saved so far)", message_id, self.saved_edits
+        )
+
+
+message_edit_coalescer = MessageEditCoalescer(Config.MESSAGE_EDIT_WINDOW)
@@ -1,26 +1,58 @@
+from functools import lru_cache
+
 import pendulum
 
-from rubby.database import get_database
-from rubby.models import Guild
+from rubby.functions.guild_settings import guild_settings
 
 DEFAULT_TIMEZONE = "UTC"
 SMALL_DATE_FORMAT = "DD[/]MM[/]YYYY HH:mm"
 NORMAL_DATE_FORMAT = "ddd DD MMM YYYY [at] HH:mm [(]z[)]"
 FULL_DATE_FORMAT = "dddd, MMMM DD YYYY, HH:mm:ss [(]z[)]"
 
+# Seconds of precision each format renders, formatted instants are truncated to
+# it so that every interaction within the same minute shares one cache entry.
+FORMAT_PRECISION = {
+    SMALL_DATE_FORMAT: 60,
+    NORMAL_DATE_FORMAT: 60,
+    FULL_DATE_FORMAT: 1,
+}
+
+
+@lru_cache(maxsize=None)
+def get_timezone(name: str) -> pendulum.Timezone:
+    return pendulum.timezone(name)
+
+
+@lru_cache(maxsize=4_096)
+def format_instant(timezone: pendulum.Timezone, timestamp: int, fmt: str) -> str:
+    return pendulum.from_timestamp(timestamp, tz=timezone).format(fmt)
+
 
 class TimeObject:
-    def __init__(
-        self,
-        date_time: pendulum.DateTime,
-        small_date_format: str,
-        normal_date_format: str,
-        full_date_format: str,
-    ):
+    __slots__ = ("date_time", "_formats")
+
+    def __init__(self, date_time: pendulum.DateTime):
         self.date_time = date_time
-        self.small_date_format = small_date_format
-        self.normal_date_format = normal_date_format
-        self.full_date_format = full_date_format
+        self._formats: dict[str, str] = {}
+
+    def format(self, fmt: str) -> str:
+        if fmt not in self._formats:
+            precision = FORMAT_PRECISION.get(fmt, 1)
+            timestamp = int(self.date_time.timestamp()) // precision * precision
+            self._formats[fmt] = format_instant(self.date_time.tz, timestamp, fmt)
+        return self._formats[fmt]
+
+    @property
+    def small_date_format(self) -> str:
+        return self.format(SMALL_DATE_FORMAT)
+
+    @property
+    def normal_date_format(self) -> str:
+        return self.format(NORMAL_DATE_FORMAT)
+
+    @property
+    def full_date_format(self) -> str:
+        return self.format(FULL_DATE_FORMAT)
 
     def __str__(self):
         return "\n".join(
@@ -36,9 +68,8 @@ class TimeObject:
 async def create_time_object(
     guild_id: int, time: str | pendulum.DateTime = None
 ) -> TimeObject:
-    database = await get_database()
-    guild: Guild = await database.guilds.find_one({"_id": guild_id})
-    timezone = guild["timezone"] if guild else DEFAULT_TIMEZONE
+    settings = await guild_settings.get(guild_id)
+    timezone = get_timezone(settings.get("timezone", DEFAULT_TIMEZONE))
 
     if not time:
         time = pendulum.now(tz=timezone)
@@ -52,9 +83,4 @@ async def create_time_object(
     else:
         time = time.in_tz(timezone)
 
-    return TimeObject(
-        time,
-        time.format(SMALL_DATE_FORMAT),
-        time.format(NORMAL_DATE_FORMAT),
-        time.format(FULL_DATE_FORMAT),
-    )
+    return TimeObject(time)
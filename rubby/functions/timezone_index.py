@@ -0,0 +1,218 @@
+import datetime
+import re
+import time
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Iterable, Optional
+
+import pendulum
+
+TIMEZONE_ALIASES = {
+    "est": "America/New_York",
+    "edt": "America/New_York",
+    "cst": "America/Chicago",
+    "cdt": "America/Chicago",
+    "mst": "America/Denver",
+    "mdt": "America/Denver",
+    "pst": "America/Los_Angeles",
+    "pdt": "America/Los_Angeles",
+    "akst": "America/Anchorage",
+    "akdt": "America/Anchorage",
+    "hst": "Pacific/Honolulu",
+    "brt": "America/Sao_Paulo",
+    "art": "America/Argentina/Buenos_Aires",
+    "gmt": "Europe/London",
+    "bst": "Europe/London",
+    "wet": "Europe/Lisbon",
+    "west": "Europe/Lisbon",
+    "cet": "Europe/Paris",
+    "cest": "Europe/Paris",
+    "eet": "Europe/Athens",
+    "eest": "Europe/Athens",
+    "msk": "Europe/Moscow",
+    "ist": "Asia/Kolkata",
+    "pkt": "Asia/Karachi",
+    "ict": "Asia/Bangkok",
+    "wib": "Asia/Jakarta",
+    "sgt": "Asia/Singapore",
+    "hkt": "Asia/Hong_Kong",
+    "jst": "Asia/Tokyo",
+    "kst": "Asia/Seoul",
+    "awst": "Australia/Perth",
+    "acst": "Australia/Adelaide",
+    "acdt": "Australia/Adelaide",
+    "aest": "Australia/Sydney",
+    "aedt": "Australia/Sydney",
+    "nzst": "Pacific/Auckland",
+    "nzdt": "Pacific/Auckland",
+}
+
+OFFSET_PATTERN = re.compile(r"^(?:utc|gmt)?\s*([+-])\s*(\d{1,2})(?::?(\d{2}))?$")
+TOKEN_SEPARATORS = re.compile(r"[/_\-]+")
+# Queries are matched with spaces and dashes as underscores, "new york" finds
+# America/New_York and "port au" America/Port-au-Prince.
+WORD_SEPARATORS = re.compile(r"[\s_\-]+")
+NGRAM_SIZE = 3
+# UTC offsets change at DST transitions, which fall on a quarter hour in every
+# zone, so the offsets are recomputed at each one.
+OFFSETS_REFRESH_INTERVAL = 900
+
+
+def normalize(text: str) -> str:
+    return WORD_SEPARATORS.sub("_", text.strip().lower())
+
+
+class TimezoneIndex:
+    def __init__(self, timezones: Iterable[str]):
+        self.names = sorted(timezones)
+        self.lowered = {name.lower(): name for name in self.names}
+        self.normalized = {normalize(name): name for name in self.names}
+        self.sorted_normalized = sorted(self.normalized)
+
+        self.tokens: dict[str, list[str]] = {}
+        self.ngrams: dict[str, set[str]] = {}
+        self.timezones: dict[str, pendulum.Timezone] = {}
+        self.offsets: dict[int, list[str]] = {}
+        self.offsets_expire = 0.0
+
+        for normalized, name in self.normalized.items():
+            # Whole segments too, so "new_york" ranks as a token match.
+            for token in {
+                *TOKEN_SEPARATORS.split(normalized),
+                *normalized.split("/"),
+            }:
+                if token:
+                    self.tokens.setdefault(token, []).append(name)
+
+            for i in range(len(normalized) - NGRAM_SIZE + 1):
+                self.ngrams.setdefault(normalized[i : i + NGRAM_SIZE], set()).add(
+                    name
+                )
+
+            try:
+                self.timezones[name] = pendulum.timezone(name)
+            except Exception:
+                continue
+
+        self.sorted_tokens = sorted(self.tokens)
+        self.cached_search = lru_cache(maxsize=2_048)(self._search)
+
+    def search(self, query: str, limit: int = 25) -> list[str]:
+        self._refresh_offsets()
+        return self.cached_search(query, limit)
+
+    def resolve(self, query: str) -> Optional[str]:
+        lowered = query.strip().lower()
+        if lowered in self.lowered:
+            return self.lowered[lowered]
+        if normalize(lowered) in self.normalized:
+            return self.normalized[normalize(lowered)]
+        if lowered in TIMEZONE_ALIASES:
+            return TIMEZONE_ALIASES[lowered]
+
+        self._refresh_offsets()
+        offset_matches = self._offset_matches(lowered)
+        return offset_matches[0] if offset_matches else None
+
+    def _refresh_offsets(self):
+        now = time.time()
+        if now < self.offsets_expire:
+            return
+
+        utc_now = datetime.datetime.fromtimestamp(now, datetime.timezone.utc)
+        self.offsets = {}
+        for name, timezone in self.timezones.items():
+            offset = int(utc_now.astimezone(timezone).utcoffset().total_seconds())
+            self.offsets.setdefault(offset, []).append(name)
+
+        self.offsets_expire = (
+            now // OFFSETS_REFRESH_INTERVAL + 1
+        ) * OFFSETS_REFRESH_INTERVAL
+        # Cached results may list zones by their previous offsets.
+        self.cached_search.cache_clear()
+
+    def _search(self, query: str, limit: int = 25) -> list[str]:
+        lowered = query.strip().lower()
+        if not lowered:
+            return self.names[:limit]
+        normalized = normalize(lowered)
+
+        results: dict[str, None] = {}
+
+        def extend(names: Iterable[str]) -> bool:
+            for name in names:
+                results.setdefault(name)
+                if len(results) >= limit:
+                    return True
+            return False
+
+        if normalized in self.normalized and extend([self.normalized[normalized]]):
+            return list(results)
+
+        if lowered in TIMEZONE_ALIASES and extend([TIMEZONE_ALIASES[lowered]]):
+            return list(results)
+
+        if extend(self._offset_matches(lowered)):
+            return list(results)
+
+        if extend(self._prefix_matches(normalized)):
+            return list(results)
+
+        if extend(self._token_matches(normalized)):
+            return list(results)
+
+        extend(self._substring_matches(normalized))
+        return list(results)
+
+    def _prefix_matches(self, normalized: str) -> Iterable[str]:
+        index = bisect_left(self.sorted_normalized, normalized)
+        while index < len(self.sorted_normalized) and self.sorted_normalized[
+            index
+        ].startswith(normalized):
+            yield self.normalized[self.sorted_normalized[index]]
+            index += 1
+
+    def _token_matches(self, normalized: str) -> Iterable[str]:
+        index = bisect_left(self.sorted_tokens, normalized)
+        while index < len(self.sorted_tokens) and self.sorted_tokens[
+            index
+        ].startswith(normalized):
+            yield from self.tokens[self.sorted_tokens[index]]
+            index += 1
+
+    def _substring_matches(self, normalized: str) -> Iterable[str]:
+        if len(normalized) < NGRAM_SIZE:
+            candidates = self.names
+        else:
+            postings = sorted(
+                (
+                    self.ngrams.get(normalized[i : i + NGRAM_SIZE], set())
+                    for i in range(len(normalized) - NGRAM_SIZE + 1)
+                ),
+                key=len,
+            )
+            candidates = sorted(set.intersection(*postings))
+
+        return (name for name in candidates if normalized in normalize(name))
+
+    def _offset_matches(self, lowered: str) -> list[str]:
+        match = OFFSET_PATTERN.match(lowered)
+        if not match:
+            return []
+
+        sign, hours, minutes = match.groups()
+        offset = int(hours) * 3_600 + int(minutes or 0) * 60
+        if sign == "-":
+            offset = -offset
+
+        matches = []
+        # Etc/GMT zones use POSIX signs, Etc/GMT-2 is two hours ahead of UTC.
+        if offset % 3_600 == 0:
+            etc_name = (
+                "Etc/UTC" if offset == 0 else f"Etc/GMT{-offset // 3_600:+d}"
+            )
+            if etc_name.lower() in self.lowered:
+                matches.append(etc_name)
+
+        matches.extend(self.offsets.get(offset, []))
+        return matches
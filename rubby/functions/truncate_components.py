@@ -1,32 +1,12 @@
 import disnake
-from rubby.misc.constants import Constants
-
-
-def truncate_embed(embed: disnake.Embed):
-    embed.title = truncate_text(embed.title, Constants.EMBED_TITLE_LIMIT)
 
-    embed.description = truncate_text(
-        embed.description, Constants.EMBED_DESCRIPTION_LIMIT
-    )
-
-    if embed.footer and embed.footer.text:
-        embed.set_footer(
-            text=truncate_text(embed.footer.text, Constants.EMBED_FOOTER_TEXT_LIMIT)
-        )
+from rubby.functions.embed_builder import EmbedBuilder
+from rubby.functions.truncate_text import truncate_text
+from rubby.misc.constants import Constants
 
-    truncated_fields = [
-        (
-            truncate_text(field.name, Constants.EMBED_FIELD_NAME_LIMIT),
-            truncate_text(field.value, Constants.EMBED_FIELD_VALUE_LIMIT),
-            field.inline,
-        )
-        for field in embed.fields[: Constants.EMBED_FIELD_LIMIT]
-    ]
-    embed.clear_fields()
-    for fields in truncated_fields:
-        embed.add_field(name=fields[0], value=fields[1], inline=fields[2])
 
-    return embed
+def truncate_embed(embed: disnake.Embed) -> disnake.Embed:
+    return EmbedBuilder.from_dict(embed.to_dict()).build()
 
 
 def truncate_buttons(buttons: list[disnake.ui.Button]) -> list[disnake.ui.Button]:
@@ -68,6 +48,3 @@ def truncate_select_menu(
 
     return select_menu
 
-
-def truncate_text(text: str, limit: int) -> str:
-    return text[: limit - 3] + "..." if len(text) > limit else text
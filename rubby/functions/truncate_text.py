@@ -0,0 +1,102 @@
+import re
+import unicodedata
+from typing import Optional
+
+ELLIPSIS = "..."
+# Mentions, channels, custom emojis, timestamps, masked links and bare URLs are
+# never cut in half, Discord would render the leftovers as raw text.
+TOKEN_PATTERN = re.compile(r"<[^<>\s]+>|\[[^\]\n]*\]\([^)\s]*\)|https?://\S+")
+# Escaped characters are matched first so they are skipped.
+MARKDOWN_PATTERN = re.compile(r"\\.|```|`|\*\*|__|~~|\|\|")
+# How far back a cut may move to land on a space instead of inside a word.
+WORD_BOUNDARY_WINDOW = 32
+
+ZERO_WIDTH_JOINER = "\u200d"
+
+
+def _is_regional_indicator(char: str) -> bool:
+    return "\U0001f1e6" <= char <= "\U0001f1ff"
+
+
+def _extends_grapheme(char: str) -> bool:
+    return (
+        unicodedata.combining(char) != 0
+        or char == ZERO_WIDTH_JOINER
+        or "\ufe00" <= char <= "\ufe0f"
+        or "\U0001f3fb" <= char <= "\U0001f3ff"
+        or "\U000e0020" <= char <= "\U000e007f"
+    )
+
+
+def grapheme_boundary(text: str, index: int) -> int:
+    # Moves `index` left until it no longer splits a combining sequence, an
+    # emoji ZWJ sequence or a flag (pair of regional indicators).
+    while 0 < index < len(text) and (
+        _extends_grapheme(text[index]) or text[index - 1] == ZERO_WIDTH_JOINER
+    ):
+        index -= 1
+
+    if 0 < index < len(text) and _is_regional_indicator(text[index]):
+        start = index
+        while start > 0 and _is_regional_indicator(text[start - 1]):
+            start -= 1
+        if (index - start) % 2:
+            index -= 1
+
+    return index
+
+
+def token_boundary(text: str, index: int) -> int:
+    for match in TOKEN_PATTERN.finditer(text):
+        if match.start() >= index:
+            break
+        if index < match.end():
+            return match.start()
+    return index
+
+
+def word_boundary(text: str, index: int) -> int:
+    if index >= len(text) or text[index].isspace():
+        return index
+
+    space = text.rfind(" ", max(0, index - WORD_BOUNDARY_WINDOW), index)
+    return space if space > 0 else index
+
+
+def closing_markdown(text: str) -> str:
+    opened: list[str] = []
+
+    for match in MARKDOWN_PATTERN.finditer(text):
+        marker = match.group()
+        if marker.startswith("\\"):
+            continue
+        if opened and opened[-1] in ("```", "`") and marker != opened[-1]:
+            continue
+
+        if marker in opened:
+            del opened[len(opened) - 1 - opened[::-1].index(marker)]
+        else:
+            opened.append(marker)
+
+    return "".join(reversed(opened))
+
+
+def truncate_text(text: Optional[str], limit: int) -> Optional[str]:
+    if text is None or len(text) <= limit:
+        return text
+    if limit <= len(ELLIPSIS):
+        return text[: grapheme_boundary(text, max(limit, 0))]
+
+    end = limit - len(ELLIPSIS)
+    while end > 0:
+        end = word_boundary(text, end)
+        end = token_boundary(text, end)
+        end = grapheme_boundary(text, end)
+
+        head = text[:end].rstrip()
+        closing = closing_markdown(head)
+        if len(head) + len(ELLIPSIS) + len(closing) <= limit:
+            return head + ELLIPSIS + closing
+        end = len(head) - len(closing)
+
+    return text[: grapheme_boundary(text, limit - len(ELLIPSIS))] + ELLIPSIS
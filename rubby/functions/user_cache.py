@@ -0,0 +1,73 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import disnake
+from disnake.ext import commands
+
+from rubby.misc import Config
+
+
+class UserCache:
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: OrderedDict[int, tuple[float, disnake.User]] = OrderedDict()
+        self.loading: dict[int, asyncio.Task] = {}
+        self.gateway_hits = 0
+        self.cache_hits = 0
+        self.misses = 0
+
+    @property
+    def hits(self) -> int:
+        return self.gateway_hits + self.cache_hits
+
+    async def get(
+        self, bot: commands.Bot, user_id: int, full: bool = False
+    ) -> Optional[disnake.User]:
+        # Banner and accent color are only sent by `fetch_user`, so lookups that
+        # need them skip the gateway cache.
+        if not full:
+            user = bot.get_user(user_id)
+            if user:
+                self.gateway_hits += 1
+                return user
+
+        entry = self.entries.get(user_id)
+        if entry and entry[0] > time.monotonic():
+            self.entries.move_to_end(user_id)
+            self.cache_hits += 1
+            return entry[1]
+
+        self.misses += 1
+        task = self.loading.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch(bot, user_id))
+            self.loading[user_id] = task
+
+        return await asyncio.shield(task)
+
+    def invalidate(self, user_id: int):
+        self.entries.pop(user_id, None)
+        self.loading.pop(user_id, None)
+
+    async def _fetch(self, bot: commands.Bot, user_id: int) -> Optional[disnake.User]:
+        try:
+            try:
+                user = await bot.fetch_user(user_id)
+            except disnake.NotFound:
+                return None
+
+            if self.loading.get(user_id) is asyncio.current_task():
+                self.entries[user_id] = (time.monotonic() + self.ttl, user)
+                self.entries.move_to_end(user_id)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+            return user
+        finally:
+            if self.loading.get(user_id) is asyncio.current_task():
+                del self.loading[user_id]
+
+
+user_cache = UserCache(Config.USER_CACHE_TTL, Config.USER_CACHE_SIZE)
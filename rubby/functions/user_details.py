@@ -4,6 +4,8 @@ import random
 import disnake
 from disnake.ext import commands
 
+from rubby.functions.user_cache import user_cache
+
 
 class UserDetails:
     def __init__(
@@ -21,10 +23,10 @@ class UserDetails:
 
 async def get_user_details(user: disnake.User | int, bot: commands.Bot) -> UserDetails:
     if isinstance(user, int) and not isinstance(user, disnake.User):
-        user = await bot.fetch_user(user)
+        user_id, user = user, await user_cache.get(bot, user)
 
-    if not user:
-        raise ValueError(f"I couldn't find a user with `{user}` as their ID.")
+        if not user:
+            raise ValueError(f"I couldn't find a user with `{user_id}` as their ID.")
 
     return UserDetails(
         user.id,
@@ -32,5 +34,5 @@ async def get_user_details(user: disnake.User | int, bot: commands.Bot) -> UserD
         if user.discriminator == "0"
         else f"{user.name}#{user.discriminator}",
         user.created_at,
-        user.avatar.url,
+        user.display_avatar.url,
     )
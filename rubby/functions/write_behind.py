@@ -0,0 +1,418 @@
+import asyncio
+import logging
+import os
+import pathlib
+import time
+from dataclasses import dataclass, field
+from typing import Hashable, Optional
+
+import pendulum
+from bson import json_util
+from pymongo import DeleteOne, UpdateOne
+
+from rubby.cluster import INSTANCE_ID, cluster_shard_ids
+from rubby.database import get_database
+from rubby.metrics import metrics
+from rubby.misc import Config
+
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+@dataclass(slots=True)
+class Operation:
+    collection: str
+    filter: dict
+    # `None` for deletes.
+    update: Optional[dict] = None
+    upsert: bool = False
+    seq: int = 0
+    # The process that journaled the operation, whose sequence numbers it
+    # follows.
+    run: str = INSTANCE_ID
+
+    def to_request(self):
+        if self.update is None:
+            return DeleteOne(self.filter)
+        if "$inc" not in self.update:
+            return UpdateOne(self.filter, self.update, upsert=self.upsert)
+
+        # Increments are only applied once: the document keeps the last one
+        # applied to it, and skips the ones up to it when a batch is retried or
+        # the journal replayed.
+        return UpdateOne(
+            {
+                **self.filter,
+                "$nor": [
+                    {
+                        "write_behind.run": self.run,
+                        "write_behind.seq": {"$gte": self.seq},
+                    }
+                ],
+            },
+            {
+                **self.update,
+                "$set": {
+                    **self.update.get("$set", {}),
+                    "write_behind": {"run": self.run, "seq": self.seq},
+                },
+            },
+            upsert=self.upsert,
+        )
+
+
+@dataclass(slots=True)
+class PendingDocument:
+    """Unflushed state of a document, overlaid on what the database returns."""
+
+    seq: int
+    deleted: bool = False
+    # Set by upserts, the document exists even if the database has none yet.
+    created: bool = False
+    # Set when written again after a delete, the database copy is stale.
+    replaced: bool = False
+    fields: dict = field(default_factory=dict)
+    # Added to the fields of the database copy.
+    increments: dict = field(default_factory=dict)
+
+
+def document_key(collection: str, filter: dict) -> tuple[str, Hashable]:
+    if "_id" in filter:
+        return collection, filter["_id"]
+    return collection, tuple(sorted(filter.items()))
+
+
+class WriteBehind:
+    """Acknowledges writes once journaled and applies them in `bulk_write`s.
+
+    Only idempotent operations (`$set` updates, upserts and deletes) and
+    increments, applied once each, are accepted, so replaying the journal after
+    a crash, or retrying a batch that partly failed, leaves the documents in
+    the same state.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.queue: list[Operation] = []
+        self.documents: dict[tuple[str, Hashable], PendingDocument] = {}
+        self.seq = 0
+        self.flushed_seq = 0
+        self.journal = None
+        self.flush_lock = asyncio.Lock()
+        self.pending_event = asyncio.Event()
+        self.full_event = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return len(self.queue)
+
+    async def start(self):
+        """Replays the journal left by a previous run, then starts flushing."""
+        path = Config.WRITE_BEHIND_JOURNAL_DIR / f"{Config.CLUSTER_NAME}.journal"
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        replayed = await self._replay(path)
+        if replayed:
+            logging.info("Replayed %s journaled writes.", replayed)
+
+        if Config.WRITE_BEHIND:
+            overlapping = await find_overlapping_clusters()
+            if overlapping:
+                # Each cluster only overlays its own pending writes, so the
+                # toggles of a giveaway handled by both would read stale entries.
+                logging.error(
+                    "Not writing behind, clusters %s run the same shards.",
+                    ", ".join(overlapping),
+                )
+                return
+
+            self.journal = open(path, "a", encoding="utf-8")
+            self.enabled = True
+            self.task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+        try:
+            await self.flush()
+        finally:
+            self.enabled = False
+            if self.journal:
+                self.journal.close()
+                self.journal = None
+
+    async def write(self, operations: list[Operation]):
+        """Journals the operations together, or applies them when disabled."""
+        for operation in operations:
+            if operation.update and any(
+                key not in ("$set", "$inc") for key in operation.update
+            ):
+                raise ValueError("Only $set and $inc updates can be written behind.")
+
+        if self.enabled:
+            return await self._append(operations)
+
+        database = await get_database()
+        for operation in operations:
+            collection = database[operation.collection]
+            if operation.update is None:
+                await collection.delete_one(operation.filter)
+            else:
+                await collection.update_one(
+                    operation.filter, operation.update, upsert=operation.upsert
+                )
+
+    async def update_one(
+        self, collection: str, filter: dict, update: dict, upsert: bool = False
+    ):
+        await self.write([Operation(collection, filter, update, upsert)])
+
+    async def delete_one(self, collection: str, filter: dict):
+        await self.write([Operation(collection, filter)])
+
+    def lookup(self, collection: str, filter: dict) -> Optional[PendingDocument]:
+        return self.documents.get(document_key(collection, filter))
+
+    def apply_pending(
+        self, collection: str, filter: dict, document: Optional[dict]
+    ) -> Optional[dict]:
+        """Applies the unflushed writes to a document read from the database.
+
+        The read must not overlap a flush, see `find_one`.
+        """
+        pending = self.lookup(collection, filter)
+        if pending is None:
+            return document
+        if pending.deleted:
+            return None
+        if pending.replaced:
+            document = None
+
+        if document is None:
+            if not pending.created:
+                return None
+            document = dict(filter)
+
+        document = {**document, **pending.fields}
+        for key, amount in pending.increments.items():
+            document[key] = document.get(key, 0) + amount
+        return document
+
+    async def find_one(
+        self, collection: str, filter: dict, projection: Optional[dict] = None
+    ) -> Optional[dict]:
+        database = await get_database()
+        while True:
+            flushed_seq = self.flushed_seq
+            document = await database[collection].find_one(filter, projection)
+            # Writes flushed during the read are no longer pending, but the
+            # read may have missed them.
+            if self.flushed_seq == flushed_seq:
+                return self.apply_pending(collection, filter, document)
+
+    async def flush(self):
+        async with self.flush_lock:
+            while self.queue:
+                batch = self.queue[: Config.WRITE_BEHIND_BATCH_SIZE]
+                await self._write(batch)
+
+                del self.queue[: len(batch)]
+                self.flushed_seq = batch[-1].seq
+                for key in [
+                    key
+                    for key, pending in self.documents.items()
+                    if pending.seq <= self.flushed_seq
+                ]:
+                    del self.documents[key]
+
+                if self.journal:
+                    self._checkpoint(self.flushed_seq)
+
+            self.pending_event.clear()
+            self.full_event.clear()
+
+    async def _append(self, operations: list[Operation]):
+        for operation in operations:
+            self.seq += 1
+            operation.seq = self.seq
+            self.journal.write(
+                json_util.dumps(
+                    {
+                        "seq": operation.seq,
+                        "collection": operation.collection,
+                        "filter": operation.filter,
+                        "update": operation.update,
+                        "upsert": operation.upsert,
+                        "run": operation.run,
+                    }
+                )
+                + "\n"
+            )
+        self.journal.flush()
+
+        # Queued before awaiting the sync, so a flush running meanwhile doesn't
+        # truncate the journal under them.
+        for operation in operations:
+            self.queue.append(operation)
+            self._track(operation)
+        self.pending_event.set()
+        if len(self.queue) >= Config.WRITE_BEHIND_BATCH_SIZE:
+            self.full_event.set()
+
+        if Config.WRITE_BEHIND_FSYNC:
+            await asyncio.to_thread(os.fsync, self.journal.fileno())
+
+    def _track(self, operation: Operation):
+        key = document_key(operation.collection, operation.filter)
+        pending = self.documents.get(key)
+
+        if operation.update is None:
+            self.documents[key] = PendingDocument(operation.seq, deleted=True)
+            return
+
+        if pending and not pending.deleted:
+            pending.seq = operation.seq
+            pending.created = pending.created or operation.upsert
+        else:
+            pending = self.documents[key] = PendingDocument(
+                operation.seq, created=operation.upsert, replaced=pending is not None
+            )
+
+        for name, value in operation.update.get("$set", {}).items():
+            pending.fields[name] = value
+            pending.increments.pop(name, None)
+        for name, amount in operation.update.get("$inc", {}).items():
+            if name in pending.fields:
+                pending.fields[name] += amount
+            else:
+                pending.increments[name] = pending.increments.get(name, 0) + amount
+
+    def _checkpoint(self, flushed_seq: int):
+        if self.queue:
+            self.journal.write(json_util.dumps({"flushed": flushed_seq}) + "\n")
+            self.journal.flush()
+        else:
+            # Everything journaled so far is in the database.
+            self.journal.truncate(0)
+
+    async def _write(self, batch: list[Operation]):
+        requests: dict[str, list] = {}
+        for operation in batch:
+            requests.setdefault(operation.collection, []).append(
+                operation.to_request()
+            )
+
+        start_time = time.perf_counter()
+        database = await get_database()
+        try:
+            for collection, collection_requests in requests.items():
+                await database[collection].bulk_write(collection_requests)
+        except Exception:
+            FLUSH_FAILURES.inc()
+            raise
+        finally:
+            FLUSH_DURATION.observe(time.perf_counter() - start_time)
+        FLUSHED_BATCH_SIZE.observe(len(batch))
+
+    async def _replay(self, path: pathlib.Path) -> int:
+        if not path.exists():
+            return 0
+
+        operations: list[Operation] = []
+        flushed_seq = 0
+        with open(path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json_util.loads(line)
+                except ValueError:
+                    # A line torn by a crash while it was being written was
+                    # never acknowledged.
+                    continue
+
+                if "flushed" in entry:
+                    flushed_seq = max(flushed_seq, entry["flushed"])
+                    continue
+
+                operations.append(
+                    Operation(
+                        entry["collection"],
+                        entry["filter"],
+                        entry["update"],
+                        entry["upsert"],
+                        entry["seq"],
+                        entry.get("run", ""),
+                    )
+                )
+
+        operations = [
+            operation for operation in operations if operation.seq > flushed_seq
+        ]
+        for start in range(0, len(operations), Config.WRITE_BEHIND_BATCH_SIZE):
+            await self._write(
+                operations[start : start + Config.WRITE_BEHIND_BATCH_SIZE]
+            )
+
+        path.unlink()
+        return len(operations)
+
+    async def _run(self):
+        while True:
+            await self.pending_event.wait()
+            try:
+                await asyncio.wait_for(
+                    self.full_event.wait(), timeout=Config.WRITE_BEHIND_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                await self.flush()
+            except Exception:
+                logging.exception(
+                    "Failed to flush %s pending writes, retrying in %ss.",
+                    len(self.queue),
+                    Config.WRITE_BEHIND_RETRY_DELAY,
+                )
+                await asyncio.sleep(Config.WRITE_BEHIND_RETRY_DELAY)
+
+
+async def find_overlapping_clusters() -> list[str]:
+    """Names the other live clusters running any of this cluster's shards."""
+    database = await get_database()
+    stale_after = pendulum.now("UTC").subtract(
+        seconds=Config.CLUSTER_MISSED_HEARTBEATS * Config.CLUSTER_HEARTBEAT_INTERVAL
+    )
+    return [
+        cluster["_id"]
+        async for cluster in database.clusters.find(
+            {
+                "_id": {"$ne": Config.CLUSTER_NAME},
+                "shard_ids": {"$in": cluster_shard_ids()},
+                "updated_at": {"$gte": stale_after},
+            },
+            {"_id": 1},
+        )
+    ]
+
+
+write_behind = WriteBehind()
+
+FLUSHED_BATCH_SIZE = metrics.histogram(
+    "rubby_write_behind_batch_size",
+    "Operations written per write-behind flush.",
+    buckets=BATCH_SIZE_BUCKETS,
+)
+FLUSH_DURATION = metrics.histogram(
+    "rubby_write_behind_flush_duration_seconds",
+    "Duration of write-behind flushes.",
+)
+FLUSH_FAILURES = metrics.counter(
+    "rubby_write_behind_flush_failures_total",
+    "Write-behind flushes that failed and will be retried.",
+)
+metrics.gauge(
+    "rubby_write_behind_pending_operations",
+    "Journaled writes waiting to be flushed.",
+    function=lambda: len(write_behind),
+)
@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import logging
+import sys
+
+from rubby.cluster import format_shard_ids, split_shards
+from rubby.misc import Config
+
+logging.basicConfig(level=logging.INFO)
+
+
+async def supervise(name: str, command: list[str]):
+    while True:
+        process = await asyncio.create_subprocess_exec(*command)
+        logging.info("Started cluster %s (pid %s).", name, process.pid)
+
+        try:
+            code = await process.wait()
+        except asyncio.CancelledError:
+            if process.returncode is None:
+                process.terminate()
+                await process.wait()
+            raise
+
+        logging.warning(
+            "Cluster %s exited with code %s, restarting it in %ss.",
+            name,
+            code,
+            Config.CLUSTER_RESTART_DELAY,
+        )
+        await asyncio.sleep(Config.CLUSTER_RESTART_DELAY)
+
+
+async def launch(args: argparse.Namespace, bot_args: list[str]):
+    clusters = []
+    for index, shard_ids in enumerate(split_shards(args.shard_count, args.clusters)):
+        name = f"cluster-{index}"
+        metrics_port = args.metrics_port + index if args.metrics_port else 0
+        command = [
+            sys.executable,
+            "-m",
+            "rubby",
+            "--shard-count",
+            str(args.shard_count),
+            "--shards",
+            format_shard_ids(shard_ids),
+            "--cluster-name",
+            name,
+            "--metrics-port",
+            str(metrics_port),
+            *bot_args,
+        ]
+        clusters.append(supervise(name, command))
+
+    await asyncio.gather(*clusters)
+
+
+def start():
+    parser = argparse.ArgumentParser(
+        prog="python -m rubby.launcher",
+        description="Runs the bot's shards across several processes.",
+    )
+    parser.add_argument("--shard-count", type=int, required=True)
+    parser.add_argument(
+        "--clusters", type=int, default=1, help="Number of processes to run."
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=Config.METRICS_PORT,
+        help="Metrics port of the first cluster, the others use the next ones.",
+    )
+    # Any other option is passed on to every cluster.
+    args, bot_args = parser.parse_known_args()
+
+    try:
+        asyncio.run(launch(args, bot_args))
+    except KeyboardInterrupt:
+        logging.info("Received signal to terminate the clusters.")
+
+
+if __name__ == "__main__":
+    start()
@@ -1,57 +1,243 @@
 import time
+
+PROCESS_START = time.perf_counter()
+
+import argparse
+import asyncio
 import logging
+import sys
 import disnake
 from disnake.ext import commands
 
-from rubby.database import DatabaseManager
+from rubby.cluster import format_shard_ids, parse_shard_ids
+from rubby.components import component_router
+from rubby.database import DatabaseManager, get_database
+from rubby.functions.write_behind import write_behind
+from rubby.metrics import instrument_bot, serve_metrics
 from rubby.misc import Config
 from rubby.misc import Env
+from rubby.profiles import CLIENT_PROFILES, PROFILES
+from rubby.schema import check_schema
+from rubby.startup import (
+    StartupProfiler,
+    find_dependencies,
+    find_extensions,
+    import_modules,
+)
 
 logging.basicConfig(level=logging.INFO)
 
-bot = commands.InteractionBot(
-    intents=disnake.Intents.all(),
-    command_sync_flags=commands.CommandSyncFlags.default(),
-    test_guilds=Config.GUILD_IDS,
-    owner_ids=Config.OWNER_IDS,
-)
+profiler = StartupProfiler(PROCESS_START)
 
 
-@bot.event
 async def on_ready():
-    await DatabaseManager.initialize()
-    await load_extensions()
-
+    profiler.mark("gateway ready")
     logging.info("Bot is ready!")
 
 
-async def load_extensions():
-    logging.info("Initializing COGS ...")
-    start_time = time.time()
+async def on_first_interaction(inter: disnake.Interaction):
+    if "first interaction" in profiler.marks:
+        return
+
+    profiler.mark("first interaction")
+    if Config.PROFILE_STARTUP:
+        print(profiler.report(), flush=True)
+
 
-    extension_paths = []
+def create_bot() -> commands.InteractionBot:
+    options = dict(
+        **PROFILES[Config.RUNTIME_PROFILE].options(),
+        command_sync_flags=commands.CommandSyncFlags.default(),
+        test_guilds=Config.GUILD_IDS,
+        owner_ids=Config.OWNER_IDS,
+    )
 
-    for extension_file in Config.COGS_DIR.rglob("*.py"):
-        if extension_file.stem.startswith("_"):
-            continue
+    if Config.SHARD_COUNT is None:
+        bot = commands.InteractionBot(**options)
+    else:
+        # Only the cluster running the first shard syncs the commands.
+        if Config.SHARD_IDS is not None and 0 not in Config.SHARD_IDS:
+            options["command_sync_flags"] = commands.CommandSyncFlags.none()
 
-        extension_path = ".".join(
-            extension_file.relative_to(Config.COGS_DIR).with_suffix("").parts
+        bot = commands.AutoShardedInteractionBot(
+            shard_ids=Config.SHARD_IDS, shard_count=Config.SHARD_COUNT, **options
+        )
+        logging.info(
+            "Cluster %s runs shards %s of %s.",
+            Config.CLUSTER_NAME,
+            format_shard_ids(Config.SHARD_IDS) if Config.SHARD_IDS else "all",
+            Config.SHARD_COUNT,
         )
-        extension_paths.append(f"rubby.cogs.{extension_path}")
 
-    for extension in extension_paths:
+    logging.info(
+        "Using the %s runtime profile and the %s database profile.",
+        Config.RUNTIME_PROFILE,
+        Config.DATABASE_PROFILE,
+    )
+    bot.add_listener(on_ready)
+    bot.add_listener(on_first_interaction, "on_interaction")
+    component_router.install(bot)
+    instrument_bot(bot)
+    return bot
+
+
+def load_extensions(bot: commands.InteractionBot, extensions: list[str]):
+    logging.info("Initializing COGS ...")
+
+    for extension in extensions:
         try:
-            bot.load_extension(extension)
+            with profiler.measure("extensions", extension):
+                bot.load_extension(extension)
             logging.info("Loaded %s successfully.", extension)
         except Exception as e:
             logging.error("Failed to load %s: %s", extension, e)
 
-    end_time = time.time()
     logging.info(
-        "Loaded %s cogs in %ss.", len(extension_paths), round(end_time - start_time, 2)
+        "Loaded %s cogs in %ss.",
+        len(extensions),
+        round(profiler.total("extensions"), 2),
+    )
+
+
+async def setup(bot: commands.InteractionBot):
+    profiler.mark("setup started")
+    extensions = find_extensions(Config.COGS_DIR)
+
+    # Logging in and creating the database client are network bound, so the
+    # extensions' dependencies are imported in a worker thread meanwhile.
+    await asyncio.gather(
+        profiler.measure_async("setup", "login", bot.login(Env.TOKEN)),
+        profiler.measure_async("setup", "database", DatabaseManager.initialize()),
+        profiler.measure_async(
+            "setup",
+            "imports",
+            asyncio.to_thread(import_modules, find_dependencies(extensions), profiler),
+        ),
+    )
+    profiler.mark("logged in")
+
+    # Writes journaled by a previous run are applied before anything reads them.
+    await write_behind.start()
+
+    load_extensions(bot, extensions)
+    profiler.mark("extensions loaded")
+
+
+async def run(bot: commands.InteractionBot):
+    metrics_server = (
+        await serve_metrics(Config.METRICS_HOST, Config.METRICS_PORT)
+        if Config.METRICS_PORT
+        else None
     )
 
+    try:
+        await setup(bot)
+        logging.info(
+            "Startup took %ss before connecting.",
+            round(time.perf_counter() - PROCESS_START, 2),
+        )
+        await bot.connect()
+    finally:
+        if metrics_server:
+            metrics_server.close()
+        if not bot.is_closed():
+            await bot.close()
+        await write_behind.close()
+
+
+async def check():
+    await DatabaseManager.initialize()
+    failures = await check_schema(await get_database())
+
+    for failure in failures:
+        logging.error("Query shape uses a collection scan: %s", failure)
+
+    return 1 if failures else 0
+
 
 def start():
-    bot.run(Env.TOKEN)
+    parser = argparse.ArgumentParser(prog="rubby")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Print where the time until the first handled interaction goes.",
+    )
+    parser.add_argument(
+        "--check-schema",
+        action="store_true",
+        help="Create missing indexes and fail if any query shape does a COLLSCAN.",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=Config.METRICS_PORT,
+        help="Port of the local Prometheus metrics endpoint, 0 to disable it.",
+    )
+    parser.add_argument(
+        "--shard-count",
+        type=int,
+        help="Total number of shards across every cluster, to run sharded.",
+    )
+    parser.add_argument(
+        "--shards",
+        type=parse_shard_ids,
+        help="Shards run by this process, e.g. 0-3, defaults to all of them.",
+    )
+    parser.add_argument(
+        "--cluster-name",
+        default=Config.CLUSTER_NAME,
+        help="Name of this process in the cluster status.",
+    )
+    parser.add_argument(
+        "--runtime-profile",
+        choices=PROFILES,
+        default=Config.RUNTIME_PROFILE,
+        help="Gateway intents and caches to run with, minimal uses the least memory.",
+    )
+    parser.add_argument(
+        "--database-profile",
+        choices=CLIENT_PROFILES,
+        default=Config.DATABASE_PROFILE,
+        help="MongoDB pool, timeouts and wire compression to connect with.",
+    )
+    parser.add_argument(
+        "--write-behind",
+        action="store_true",
+        help="Acknowledge giveaway entries once journaled and write them in batches.",
+    )
+    parser.add_argument(
+        "--write-behind-interval",
+        type=float,
+        default=Config.WRITE_BEHIND_INTERVAL,
+        help="Seconds journaled writes wait for more before being flushed.",
+    )
+    parser.add_argument(
+        "--write-behind-batch-size",
+        type=int,
+        default=Config.WRITE_BEHIND_BATCH_SIZE,
+        help="Journaled writes that trigger a flush without waiting.",
+    )
+    args = parser.parse_args()
+    if args.shards is not None and args.shard_count is None:
+        parser.error("--shards requires --shard-count")
+
+    Config.PROFILE_STARTUP = args.profile_startup
+    Config.METRICS_PORT = args.metrics_port
+    Config.SHARD_COUNT = args.shard_count
+    Config.SHARD_IDS = args.shards
+    Config.CLUSTER_NAME = args.cluster_name
+    Config.RUNTIME_PROFILE = args.runtime_profile
+    Config.DATABASE_PROFILE = args.database_profile
+    Config.WRITE_BEHIND = args.write_behind
+    Config.WRITE_BEHIND_INTERVAL = args.write_behind_interval
+    Config.WRITE_BEHIND_BATCH_SIZE = args.write_behind_batch_size
+
+    bot = create_bot()
+
+    if args.check_schema:
+        sys.exit(bot.loop.run_until_complete(check()))
+
+    try:
+        bot.loop.run_until_complete(run(bot))
+    except KeyboardInterrupt:
+        logging.info("Received signal to terminate bot.")
@@ -0,0 +1,351 @@
+import asyncio
+import bisect
+import functools
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+import disnake
+from disnake.ext import commands
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names: tuple[str, ...], values: tuple[str, ...], **extra) -> str:
+    pairs = [*zip(names, values), *extra.items()]
+    if not pairs:
+        return ""
+    labels = ",".join(f'{name}="{escape_label(value)}"' for name, value in pairs)
+    return "{" + labels + "}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        # Updated from pymongo's monitoring threads as well as the event loop.
+        self.lock = threading.Lock()
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, description, labels)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> list[str]:
+        with self.lock:
+            return [
+                f"{self.name}{format_labels(self.labels, labels)} {value}"
+                for labels, value in sorted(self.values.items())
+            ]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: tuple[str, ...] = (),
+        function: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, description, labels)
+        self.values: dict[tuple[str, ...], float] = {}
+        self.function = function
+
+    def set(self, value: float, *labels: str):
+        with self.lock:
+            self.values[labels] = value
+
+    def get(self, *labels: str) -> float:
+        if self.function:
+            return self.function()
+        return self.values.get(labels, 0)
+
+    def samples(self) -> list[str]:
+        if self.function:
+            return [f"{self.name} {self.function()}"]
+
+        with self.lock:
+            return [
+                f"{self.name}{format_labels(self.labels, labels)} {value}"
+                for labels, value in sorted(self.values.items())
+            ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, description, labels)
+        self.buckets = buckets
+        # Per label set: count per bucket (the last one being +Inf), sum.
+        self.series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str):
+        with self.lock:
+            counts, total = self.series.setdefault(
+                labels, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def label_sets(self) -> list[tuple[str, ...]]:
+        with self.lock:
+            return list(self.series)
+
+    def summary(self, *labels: str) -> tuple[int, float, float]:
+        """Returns the count, the mean and the upper bound of the 95th percentile."""
+        with self.lock:
+            counts, total = self.series.get(labels, ([0], [0.0]))
+            count = sum(counts)
+            if not count:
+                return 0, 0.0, 0.0
+
+            seen = 0
+            for index, bucket_count in enumerate(counts):
+                seen += bucket_count
+                if seen >= 0.95 * count:
+                    break
+            bound = self.buckets[index] if index < len(self.buckets) else float("inf")
+            return count, total[0] / count, bound
+
+    def samples(self) -> list[str]:
+        lines = []
+        with self.lock:
+            for labels, (counts, total) in sorted(self.series.items()):
+                cumulative = 0
+                for bound, count in zip((*self.buckets, "+Inf"), counts):
+                    cumulative += count
+                    bucket_labels = format_labels(self.labels, labels, le=bound)
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+
+                series_labels = format_labels(self.labels, labels)
+                lines.append(f"{self.name}_sum{series_labels} {total[0]}")
+                lines.append(f"{self.name}_count{series_labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, description: str, labels=()) -> Counter:
+        return self.register(Counter(name, description, labels))
+
+    def gauge(self, name: str, description: str, labels=(), function=None) -> Gauge:
+        return self.register(Gauge(name, description, labels, function))
+
+    def histogram(
+        self, name: str, description: str, labels=(), buckets=LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, description, labels, buckets))
+
+    def render(self) -> str:
+        lines = [line for metric in self.metrics.values() for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+HANDLER_DURATION = metrics.histogram(
+    "rubby_handler_duration_seconds",
+    "Time spent in interaction handlers.",
+    ("type", "handler"),
+)
+MONGODB_COMMAND_DURATION = metrics.histogram(
+    "rubby_mongodb_command_duration_seconds",
+    "Duration of MongoDB commands.",
+    ("collection", "operation"),
+)
+MONGODB_COMMAND_FAILURES = metrics.counter(
+    "rubby_mongodb_command_failures_total",
+    "MongoDB commands that failed.",
+    ("collection", "operation"),
+)
+REST_REQUESTS = metrics.counter(
+    "rubby_rest_requests_total",
+    "Discord REST requests by route.",
+    ("method", "route"),
+)
+REST_RATE_LIMITS = metrics.counter(
+    "rubby_rest_rate_limits_total",
+    "Discord REST responses with status 429.",
+    ("scope",),
+)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    def __init__(self):
+        self.pending: dict[tuple, tuple[str, str]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        collection = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+
+        self.pending[(event.connection_id, event.request_id)] = (
+            collection if isinstance(collection, str) else "",
+            event.command_name,
+        )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        labels = self.pending.pop((event.connection_id, event.request_id), None)
+        if labels:
+            MONGODB_COMMAND_DURATION.observe(event.duration_micros / 1e6, *labels)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        labels = self.pending.pop((event.connection_id, event.request_id), None)
+        if labels:
+            MONGODB_COMMAND_DURATION.observe(event.duration_micros / 1e6, *labels)
+            MONGODB_COMMAND_FAILURES.inc(*labels)
+
+
+# The messages disnake's HTTP client logs its 429s with, pinned by the tests
+# for the installed version.
+BUCKET_RATE_LIMIT_MESSAGE = (
+    "We are being rate limited. Retrying in %.2f seconds."
+    ' Handled under the bucket "%s"'
+)
+GLOBAL_RATE_LIMIT_MESSAGE = "Global rate limit has been hit. Retrying in %.2f seconds."
+
+
+class RateLimitHandler(logging.Handler):
+    # disnake retries 429s inside its HTTP client and only logs them, so they
+    # are counted from its log records. Every 429 is logged as a bucket one,
+    # global ones are logged again right after, before anything is awaited, so
+    # bucket 429s are only counted once the event loop runs again.
+    def __init__(self, level: int = logging.NOTSET):
+        super().__init__(level)
+        self.pending_buckets = 0
+
+    def emit(self, record: logging.LogRecord):
+        if record.msg == BUCKET_RATE_LIMIT_MESSAGE:
+            self.pending_buckets += 1
+            try:
+                asyncio.get_running_loop().call_soon(self.count_buckets)
+            except RuntimeError:
+                self.count_buckets()
+        elif record.msg == GLOBAL_RATE_LIMIT_MESSAGE:
+            self.pending_buckets = max(self.pending_buckets - 1, 0)
+            REST_RATE_LIMITS.inc("global")
+
+    def count_buckets(self):
+        if self.pending_buckets:
+            REST_RATE_LIMITS.inc("bucket", amount=self.pending_buckets)
+            self.pending_buckets = 0
+
+
+def command_name(inter: disnake.ApplicationCommandInteraction) -> str:
+    names = [inter.data.name]
+    options = inter.data.options
+    while options and options[0].type in (
+        disnake.OptionType.sub_command,
+        disnake.OptionType.sub_command_group,
+    ):
+        names.append(options[0].name)
+        options = options[0].options
+    return " ".join(names)
+
+
+def timed(kind: str, label: Callable[..., str]):
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            start_time = time.perf_counter()
+            try:
+                return await handler(*args, **kwargs)
+            finally:
+                HANDLER_DURATION.observe(
+                    time.perf_counter() - start_time, kind, label(*args, **kwargs)
+                )
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_bot(bot: commands.InteractionBot):
+    bot.on_application_command = timed("command", command_name)(
+        bot.on_application_command
+    )
+    bot.on_application_command_autocomplete = timed(
+        "autocomplete",
+        lambda inter: f"{command_name(inter)}:{inter.data.focused_option.name}",
+    )(bot.on_application_command_autocomplete)
+
+    # Component and modal handlers are timed per route by the component router.
+
+    request = bot.http.request
+
+    async def counted_request(route, **kwargs):
+        REST_REQUESTS.inc(route.method, route.path)
+        return await request(route, **kwargs)
+
+    bot.http.request = counted_request
+    logging.getLogger("disnake.http").addHandler(RateLimitHandler(logging.WARNING))
+
+
+async def serve_metrics(host: str, port: int) -> asyncio.AbstractServer:
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            parts = request_line.decode("latin-1").split()
+            found = len(parts) >= 2 and parts[0] == "GET" and parts[1] == "/metrics"
+
+            body = (metrics.render() if found else "Not Found\n").encode()
+            writer.write(
+                (
+                    f"HTTP/1.1 {'200 OK' if found else '404 Not Found'}\r\n"
+                    "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode()
+                + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logging.info("Serving metrics on http://%s:%s/metrics.", host, port)
+    return server
@@ -1,7 +1,7 @@
 import pathlib
 
 from abc import ABC
-from typing import Final, Iterable
+from typing import Final, Iterable, Optional
 
 
 class Config(ABC):
@@ -9,3 +9,37 @@ class Config(ABC):
     OWNER_IDS: Iterable[int] = [517770661733859329]
     GUILD_IDS: Final[list[int]] = [1023948114593321071, 1139893699787104256]
     COGS_DIR: Final[pathlib.Path] = pathlib.Path(__file__).parent.parent / "cogs"
+    MESSAGE_EDIT_WINDOW: Final[float] = 1.5
+    GUILD_SETTINGS_TTL: Final[float] = 600.0
+    GUILD_SETTINGS_CACHE_SIZE: Final[int] = 5_000
+    GIVEAWAY_END_CONCURRENCY: Final[int] = 8
+    GIVEAWAY_END_RETRY_DELAY: Final[int] = 60
+    GIVEAWAY_END_MAX_ATTEMPTS: Final[int] = 10
+    GIVEAWAY_POLL_INTERVAL: Final[float] = 60.0
+    GIVEAWAY_LEASE_DURATION: Final[int] = 120
+    GIVEAWAY_RESULT_LOOKUP_LIMIT: Final[int] = 100
+    PROFILE_STARTUP: bool = False
+    MIGRATION_LEASE_DURATION: Final[int] = 600
+    MIGRATION_POLL_INTERVAL: Final[float] = 1.0
+    GIVEAWAY_LIST_PAGE_SIZE: Final[int] = 5
+    GIVEAWAY_REROLL_RESERVE: Final[int] = 4
+    USER_CACHE_TTL: Final[float] = 900.0
+    USER_CACHE_SIZE: Final[int] = 1_000
+    METRICS_HOST: Final[str] = "127.0.0.1"
+    METRICS_PORT: int = 9108
+    CLUSTER_NAME: str = "main"
+    SHARD_COUNT: Optional[int] = None
+    SHARD_IDS: Optional[list[int]] = None
+    CLUSTER_HEARTBEAT_INTERVAL: Final[float] = 30.0
+    CLUSTER_HEARTBEAT_TTL: Final[int] = 86_400
+    # Clusters that missed this many heartbeats are considered down.
+    CLUSTER_MISSED_HEARTBEATS: Final[int] = 3
+    CLUSTER_RESTART_DELAY: Final[float] = 10.0
+    RUNTIME_PROFILE: str = "full"
+    DATABASE_PROFILE: str = "default"
+    WRITE_BEHIND: bool = False
+    WRITE_BEHIND_INTERVAL: float = 0.01
+    WRITE_BEHIND_BATCH_SIZE: int = 500
+    WRITE_BEHIND_FSYNC: bool = True
+    WRITE_BEHIND_RETRY_DELAY: Final[float] = 1.0
+    WRITE_BEHIND_JOURNAL_DIR: pathlib.Path = pathlib.Path("journal")
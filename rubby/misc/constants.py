@@ -11,6 +11,7 @@ class Constants(ABC):
     EMBED_FIELD_VALUE_LIMIT: Final[int] = 1_024
     EMBED_FOOTER_TEXT_LIMIT: Final[int] = 2_048
     EMBED_AUTHOR_NAME_LIMIT: Final[int] = 256
+    EMBED_TOTAL_LIMIT: Final[int] = 6_000
     # Select Menu Limits
     SELECT_MENU_OPTIONS_LIMIT: Final[int] = 25
     SELECT_MENU_OPTION_LABEL_LIMIT: Final[int] = 100
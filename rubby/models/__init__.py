@@ -1,3 +1,4 @@
 from .user import User
 from .guild import Guild
 from .giveaway import Giveaway
+from .giveaway_record import GiveawayRecord
@@ -13,7 +13,7 @@ class Giveaway(BaseModel):
     guild_id: int = Field(...)
 
     created_by: int = Field(...)
-    participants: Optional[list[int]] = Field(default=[])
+    participant_count: int = Field(default=0, ge=0)
     finished_configuring: Optional[bool] = Field(default=False)
 
     # Settings
@@ -23,7 +23,14 @@ class Giveaway(BaseModel):
 
     winner_count: int = Field(..., ge=1)
     allowed_roles: Optional[list[int]] = Field(default=[])
+    # Entry multipliers keyed by role ID (as a string, BSON keys must be strings).
+    role_weights: Optional[dict[str, int]] = Field(default={})
+    bonus_multiplier: int = Field(default=2, ge=1)
 
     ended: Optional[bool] = Field(default=False)
+    winners: Optional[list[int]] = Field(default=[])
+    draw_seed: Optional[int] = None
+    draw_order: Optional[list[int]] = Field(default=[])
+    draw_position: int = Field(default=0, ge=0)
     end_date: pendulum.DateTime
     created_at: pendulum.DateTime
@@ -0,0 +1,92 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Optional
+
+import pendulum
+
+
+@dataclass(slots=True)
+class GiveawayRecord:
+    """Read model of a giveaway document.
+
+    Unlike the `Giveaway` model used for inserts, it does no validation so that
+    decoding stays cheap on hot paths and bulk queries. Fields left out by a
+    projection keep their defaults.
+    """
+
+    id: int
+    channel_id: int = 0
+    guild_id: int = 0
+    created_by: int = 0
+    result_message_id: Optional[int] = None
+
+    title: str = ""
+    description: str = ""
+    prize: str = ""
+
+    winner_count: int = 1
+    participant_count: int = 0
+    allowed_roles: list[int] = field(default_factory=list)
+    role_weights: dict[str, int] = field(default_factory=dict)
+    bonus_multiplier: int = 2
+
+    finished_configuring: bool = False
+    ended: bool = False
+    winners: list[int] = field(default_factory=list)
+    draw_seed: Optional[int] = None
+    draw_order: list[int] = field(default_factory=list)
+    draw_position: Optional[int] = None
+
+    end_datetime: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    lease_owner: Optional[str] = None
+    lease_expires: Optional[datetime] = None
+    announced_at: Optional[datetime] = None
+    _end_date: Optional[pendulum.DateTime] = field(
+        default=None, repr=False, compare=False
+    )
+
+    @property
+    def end_date(self) -> pendulum.DateTime:
+        if self._end_date is None:
+            self._end_date = pendulum.instance(self.end_datetime)
+        return self._end_date
+
+    @classmethod
+    def from_document(cls, document: dict) -> "GiveawayRecord":
+        get = document.get
+        return cls(
+            document["_id"],
+            get("channel_id", 0),
+            get("guild_id", 0),
+            get("created_by", 0),
+            get("result_message_id"),
+            get("title", ""),
+            get("description", ""),
+            get("prize", ""),
+            get("winner_count", 1),
+            get("participant_count", 0),
+            get("allowed_roles") or [],
+            get("role_weights") or {},
+            get("bonus_multiplier", 2),
+            get("finished_configuring", False),
+            get("ended", False),
+            get("winners") or [],
+            get("draw_seed"),
+            get("draw_order") or [],
+            get("draw_position"),
+            get("end_date"),
+            get("created_at"),
+            get("lease_owner"),
+            get("lease_expires"),
+            get("announced_at"),
+        )
+
+    @classmethod
+    def decode(cls, document: Optional[dict]) -> Optional["GiveawayRecord"]:
+        return cls.from_document(document) if document else None
+
+    @classmethod
+    def decode_many(cls, documents: Iterable[dict]) -> list["GiveawayRecord"]:
+        from_document = cls.from_document
+        return [from_document(document) for document in documents]
@@ -0,0 +1,167 @@
+import importlib.util
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import disnake
+from pymongo import ReadPreference, WriteConcern
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
+
+# Modules the driver needs for each wire compressor, zlib is built in.
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+ReadPreferenceMode = Union[
+    Primary, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest
+]
+
+
+@dataclass(frozen=True)
+class RuntimeProfile:
+    name: str
+    intents: disnake.Intents
+    member_cache_flags: disnake.MemberCacheFlags
+    max_messages: Optional[int]
+    chunk_guilds_at_startup: bool
+
+    def options(self) -> dict:
+        return {
+            "intents": self.intents,
+            "member_cache_flags": self.member_cache_flags,
+            "max_messages": self.max_messages,
+            "chunk_guilds_at_startup": self.chunk_guilds_at_startup,
+        }
+
+
+# The guilds intent is kept by every profile: interactions resolve their guild,
+# channels and roles from it.
+PROFILES: dict[str, RuntimeProfile] = {
+    # Only what interactions need, members and messages are never cached.
+    "minimal": RuntimeProfile(
+        "minimal",
+        disnake.Intents(guilds=True),
+        disnake.MemberCacheFlags.none(),
+        max_messages=None,
+        chunk_guilds_at_startup=False,
+    ),
+    # Non-privileged intents, only members in voice channels are cached.
+    "standard": RuntimeProfile(
+        "standard",
+        disnake.Intents.default(),
+        disnake.MemberCacheFlags.from_intents(disnake.Intents.default()),
+        max_messages=100,
+        chunk_guilds_at_startup=False,
+    ),
+    # Every member, presence and the last thousand messages of every guild.
+    "full": RuntimeProfile(
+        "full",
+        disnake.Intents.all(),
+        disnake.MemberCacheFlags.all(),
+        max_messages=1_000,
+        chunk_guilds_at_startup=True,
+    ),
+}
+
+
+def available_compressors(compressors: tuple[str, ...]) -> list[str]:
+    # The driver only warns about compressors whose package isn't installed.
+    return [
+        compressor
+        for compressor in compressors
+        if importlib.util.find_spec(COMPRESSOR_MODULES[compressor])
+    ]
+
+
+@dataclass(frozen=True)
+class ClientProfile:
+    name: str
+    max_pool_size: int
+    # Connections kept open even when idle, opened at startup.
+    min_pool_size: int
+    max_idle_time_ms: Optional[int]
+    connect_timeout_ms: int
+    server_selection_timeout_ms: int
+    compressors: tuple[str, ...] = ()
+
+    def options(self) -> dict:
+        options = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "maxIdleTimeMS": self.max_idle_time_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+        }
+        compressors = available_compressors(self.compressors)
+        if compressors:
+            options["compressors"] = compressors
+        return options
+
+
+CLIENT_PROFILES: dict[str, ClientProfile] = {
+    # The driver's defaults.
+    "default": ClientProfile(
+        "default",
+        max_pool_size=100,
+        min_pool_size=0,
+        max_idle_time_ms=None,
+        connect_timeout_ms=20_000,
+        server_selection_timeout_ms=30_000,
+    ),
+    # A remote deployment: warm connections, fail fast and compress the wire.
+    "remote": ClientProfile(
+        "remote",
+        max_pool_size=100,
+        min_pool_size=10,
+        max_idle_time_ms=300_000,
+        connect_timeout_ms=5_000,
+        server_selection_timeout_ms=5_000,
+        compressors=("zstd", "snappy"),
+    ),
+    # A mongod on the same host, where compressing only costs CPU.
+    "local": ClientProfile(
+        "local",
+        max_pool_size=50,
+        min_pool_size=10,
+        max_idle_time_ms=None,
+        connect_timeout_ms=2_000,
+        server_selection_timeout_ms=2_000,
+    ),
+}
+
+
+@dataclass(frozen=True)
+class OperationClass:
+    name: str
+    write_concern: WriteConcern
+    read_preference: ReadPreferenceMode
+    # Sent as maxTimeMS, and bounds the time spent waiting for a connection.
+    max_time_ms: int
+
+
+OPERATION_CLASSES: dict[str, OperationClass] = {
+    # Giveaway entries: only acknowledged by the primary, a failover can lose
+    # the last toggles, which users can simply redo.
+    "hot-toggle": OperationClass(
+        "hot-toggle",
+        WriteConcern(w=1),
+        ReadPreference.PRIMARY,
+        max_time_ms=1_000,
+    ),
+    # Ending giveaways and other writes that must survive a failover.
+    "admin": OperationClass(
+        "admin",
+        WriteConcern(w="majority", wtimeout=10_000),
+        ReadPreference.PRIMARY,
+        max_time_ms=10_000,
+    ),
+    # Listings and status pages, which tolerate replication lag.
+    "analytics": OperationClass(
+        "analytics",
+        WriteConcern(),
+        ReadPreference.SECONDARY_PREFERRED,
+        max_time_ms=30_000,
+    ),
+}
@@ -0,0 +1,256 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+import pendulum
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+from rubby.misc import Config
+
+ACTIVE_GIVEAWAYS_FILTER = {"ended": False, "finished_configuring": True}
+
+INDEXES: dict[str, list[IndexModel]] = {
+    "giveaways": [
+        IndexModel(
+            [("guild_id", ASCENDING), ("_id", DESCENDING)],
+            name="guild_giveaways",
+        ),
+        # The filters of the giveaway list, each paged by message ID.
+        IndexModel(
+            [("guild_id", ASCENDING), ("ended", ASCENDING), ("_id", DESCENDING)],
+            name="guild_giveaways_by_status",
+        ),
+        IndexModel(
+            [("guild_id", ASCENDING), ("channel_id", ASCENDING), ("_id", DESCENDING)],
+            name="guild_giveaways_by_channel",
+        ),
+        IndexModel(
+            [("guild_id", ASCENDING), ("created_by", ASCENDING), ("_id", DESCENDING)],
+            name="guild_giveaways_by_host",
+        ),
+        IndexModel(
+            [("result_message_id", ASCENDING), ("guild_id", ASCENDING)],
+            name="result_message",
+        ),
+        IndexModel(
+            [("end_date", ASCENDING)],
+            name="active_by_end_date",
+            partialFilterExpression=ACTIVE_GIVEAWAYS_FILTER,
+        ),
+    ],
+    "giveaway_entries": [
+        IndexModel(
+            [("giveaway_id", ASCENDING), ("user_id", ASCENDING)],
+            name="giveaway_user",
+            unique=True,
+        ),
+    ],
+    "clusters": [
+        IndexModel(
+            [("updated_at", ASCENDING)],
+            name="heartbeat_expiry",
+            expireAfterSeconds=Config.CLUSTER_HEARTBEAT_TTL,
+        ),
+    ],
+}
+
+# Every query shape the cogs issue, with placeholder values. `check_schema`
+# explains each of them and reports the ones that scan a whole collection.
+QUERY_SHAPES: list[tuple[str, dict, list]] = [
+    ("giveaways", {"_id": 1, "guild_id": 1}, []),
+    ("giveaways", {"result_message_id": 1, "guild_id": 1}, []),
+    ("giveaways", {"_id": 1, **ACTIVE_GIVEAWAYS_FILTER}, []),
+    ("giveaways", ACTIVE_GIVEAWAYS_FILTER, [("end_date", ASCENDING)]),
+    ("giveaway_entries", {"giveaway_id": 1, "user_id": 1}, []),
+    ("giveaway_entries", {"giveaway_id": 1}, [("user_id", ASCENDING)]),
+    (
+        "giveaway_entries",
+        {"giveaway_id": 1, "user_id": {"$gt": 1}},
+        [("user_id", ASCENDING)],
+    ),
+    ("giveaways", {"guild_id": 1}, [("_id", DESCENDING)]),
+    (
+        "giveaways",
+        {"guild_id": 1, "ended": False, "_id": {"$lt": 1}},
+        [("_id", DESCENDING)],
+    ),
+    (
+        "giveaways",
+        {"guild_id": 1, "channel_id": 1, "_id": {"$lt": 1}},
+        [("_id", DESCENDING)],
+    ),
+    (
+        "giveaways",
+        {"guild_id": 1, "created_by": 1, "_id": {"$gt": 1}},
+        [("_id", ASCENDING)],
+    ),
+    (
+        "giveaways",
+        {"guild_id": 1, "ended": True, "channel_id": 1, "created_by": 1},
+        [("_id", DESCENDING)],
+    ),
+    ("guilds", {"_id": 1}, []),
+]
+
+
+async def migrate_inline_participants(database: AsyncIOMotorDatabase):
+    async for giveaway in database.giveaways.find(
+        {"participants": {"$exists": True}}, {"participants": 1}
+    ):
+        participants = giveaway["participants"] or []
+        if participants:
+            try:
+                await database.giveaway_entries.insert_many(
+                    [
+                        {"giveaway_id": giveaway["_id"], "user_id": user_id}
+                        for user_id in set(participants)
+                    ],
+                    ordered=False,
+                )
+            except BulkWriteError:
+                # Entries left over from an interrupted migration.
+                pass
+
+        participant_count = await database.giveaway_entries.count_documents(
+            {"giveaway_id": giveaway["_id"]}
+        )
+        await database.giveaways.update_one(
+            {"_id": giveaway["_id"]},
+            {
+                "$set": {"participant_count": participant_count},
+                "$unset": {"participants": ""},
+            },
+        )
+
+    await database.giveaways.update_many(
+        {"participant_count": {"$exists": False}},
+        {"$set": {"participant_count": 0}},
+    )
+
+
+async def recount_participants(database: AsyncIOMotorDatabase):
+    # Counts left off by a toggle that failed between its two writes.
+    counts = {
+        count["_id"]: count["participant_count"]
+        async for count in database.giveaway_entries.aggregate(
+            [{"$group": {"_id": "$giveaway_id", "participant_count": {"$sum": 1}}}]
+        )
+    }
+
+    async for giveaway in database.giveaways.find({}, {"participant_count": 1}):
+        participant_count = counts.get(giveaway["_id"], 0)
+        if giveaway.get("participant_count") != participant_count:
+            await database.giveaways.update_one(
+                {"_id": giveaway["_id"]},
+                {"$set": {"participant_count": participant_count}},
+            )
+
+
+MIGRATIONS: list[
+    tuple[int, str, Callable[[AsyncIOMotorDatabase], Awaitable[None]]]
+] = [
+    (1, "Move inline participants to giveaway_entries", migrate_inline_participants),
+    (2, "Recount participants from giveaway_entries", recount_participants),
+]
+
+
+async def ensure_indexes(database: AsyncIOMotorDatabase):
+    for collection, indexes in INDEXES.items():
+        try:
+            await database[collection].create_indexes(indexes)
+        except OperationFailure as error:
+            logging.error("Failed to create indexes on %s: %s", collection, error)
+
+
+async def claim_migration(
+    database: AsyncIOMotorDatabase, version: int, name: str
+) -> bool:
+    """Leases a migration unless it was applied or another process runs it."""
+    now = pendulum.now("UTC")
+    lease_expires = now.add(seconds=Config.MIGRATION_LEASE_DURATION)
+    try:
+        await database.schema_migrations.update_one(
+            {
+                "_id": version,
+                "applied_at": {"$exists": False},
+                "lease_expires": {"$not": {"$gt": now}},
+            },
+            {"$set": {"name": name, "lease_expires": lease_expires}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # The upsert found no claimable document and couldn't insert another.
+        return False
+    return True
+
+
+async def run_migrations(database: AsyncIOMotorDatabase):
+    """Applies the migrations not applied yet, in order.
+
+    Clusters starting together each claim a migration before running it and
+    wait for the ones claimed by the others. A migration whose lease expired,
+    e.g. because its process stopped, is run again, so migrations must be
+    idempotent.
+    """
+    applied = {
+        migration["_id"]
+        async for migration in database.schema_migrations.find(
+            {"applied_at": {"$exists": True}}, {"_id": 1}
+        )
+    }
+
+    for version, name, migration in MIGRATIONS:
+        while version not in applied:
+            if await claim_migration(database, version, name):
+                logging.info("Running schema migration %s: %s.", version, name)
+                await migration(database)
+                await database.schema_migrations.update_one(
+                    {"_id": version},
+                    {
+                        "$set": {"applied_at": pendulum.now("UTC")},
+                        "$unset": {"lease_expires": ""},
+                    },
+                )
+                break
+
+            logging.info("Waiting for schema migration %s to be applied.", version)
+            await asyncio.sleep(Config.MIGRATION_POLL_INTERVAL)
+            if await database.schema_migrations.find_one(
+                {"_id": version, "applied_at": {"$exists": True}}, {"_id": 1}
+            ):
+                applied.add(version)
+
+
+async def bootstrap_schema(database: AsyncIOMotorDatabase):
+    await ensure_indexes(database)
+    await run_migrations(database)
+
+
+def find_stages(plan: dict) -> set[str]:
+    stages = {plan["stage"]} if "stage" in plan else set()
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages |= find_stages(plan[key])
+    for input_stage in plan.get("inputStages", []):
+        stages |= find_stages(input_stage)
+    return stages
+
+
+async def check_schema(database: AsyncIOMotorDatabase) -> list[str]:
+    failures = []
+
+    for collection, query, sort in QUERY_SHAPES:
+        cursor = database[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+
+        explanation = await cursor.explain()
+        stages = find_stages(explanation["queryPlanner"]["winningPlan"])
+        logging.info("%s %s %s: %s", collection, query, sort, ", ".join(stages))
+
+        if "COLLSCAN" in stages:
+            failures.append(f"{collection} {query} {sort}")
+
+    return failures
@@ -0,0 +1,100 @@
+import ast
+import importlib
+import importlib.util
+import logging
+import pathlib
+import sys
+import time
+from contextlib import contextmanager
+from typing import Awaitable, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    def __init__(self, origin: float):
+        self.origin = origin
+        self.timings: dict[str, list[tuple[str, float]]] = {}
+        self.marks: dict[str, float] = {}
+
+    def mark(self, name: str):
+        self.marks.setdefault(name, time.perf_counter() - self.origin)
+
+    @contextmanager
+    def measure(self, category: str, name: str):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.setdefault(category, []).append(
+                (name, time.perf_counter() - start_time)
+            )
+
+    async def measure_async(self, category: str, name: str, awaitable: Awaitable[T]) -> T:
+        with self.measure(category, name):
+            return await awaitable
+
+    def total(self, category: str) -> float:
+        return sum(duration for _, duration in self.timings.get(category, []))
+
+    def report(self) -> str:
+        lines = ["Startup profile (seconds since process start):"]
+        for name, offset in sorted(self.marks.items(), key=lambda item: item[1]):
+            lines.append(f"  {offset:8.3f}  {name}")
+
+        for category, timings in self.timings.items():
+            lines.append(f"{category} ({self.total(category):.3f}s):")
+            for name, duration in sorted(timings, key=lambda item: -item[1]):
+                lines.append(f"  {duration:8.3f}  {name}")
+
+        return "\n".join(lines)
+
+
+def find_extensions(cogs_dir: pathlib.Path) -> list[str]:
+    extensions = []
+
+    for extension_file in sorted(cogs_dir.rglob("*.py")):
+        if extension_file.stem.startswith("_"):
+            continue
+
+        extension_path = ".".join(
+            extension_file.relative_to(cogs_dir).with_suffix("").parts
+        )
+        extensions.append(f"rubby.cogs.{extension_path}")
+
+    return extensions
+
+
+def find_dependencies(extensions: list[str]) -> list[str]:
+    dependencies = {}
+
+    for extension in extensions:
+        spec = importlib.util.find_spec(extension)
+        if spec is None or spec.origin is None:
+            continue
+
+        tree = ast.parse(pathlib.Path(spec.origin).read_text(encoding="utf-8"))
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    dependencies.setdefault(alias.name)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                dependencies.setdefault(node.module)
+
+    return [module for module in dependencies if module not in sys.modules]
+
+
+def import_modules(modules: list[str], profiler: StartupProfiler):
+    # Extensions are executed again by load_extension, so only their
+    # dependencies are worth importing ahead of time.
+    for module in modules:
+        if module in sys.modules:
+            continue
+        try:
+            with profiler.measure("imports", module):
+                importlib.import_module(module)
+        except Exception as e:
+            logger.warning("Failed to pre-import %s: %s", module, e)
+
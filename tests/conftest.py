@@ -0,0 +1,136 @@
+import asyncio
+import os
+import random
+from typing import Awaitable, Callable
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteOne
+
+from rubby.database import DatabaseManager
+from rubby.schema import ensure_indexes
+
+# A disposable deployment, e.g. `mongodb://localhost:27017`. The tests that
+# need the database also run against mongomock, this runs them against a real
+# server too.
+MONGO_TEST_URI = os.environ.get("MONGO_TEST_URI")
+TEST_DATABASE_NAME = "rubby_test"
+
+COLLECTION_METHODS = {
+    "count_documents",
+    "delete_many",
+    "delete_one",
+    "find_one",
+    "find_one_and_update",
+    "insert_many",
+    "insert_one",
+    "update_many",
+    "update_one",
+}
+
+
+class InterleavedCollection:
+    """mongomock collection whose operations yield to the event loop.
+
+    mongomock answers without ever suspending, so concurrent operations would
+    otherwise run one after the other instead of interleaving like they do
+    against a server.
+    """
+
+    def __init__(self, collection, rng: random.Random):
+        self.collection = collection
+        self.rng = rng
+
+    async def suspend(self):
+        for _ in range(self.rng.randrange(3)):
+            await asyncio.sleep(0)
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.collection, name)
+        if name not in COLLECTION_METHODS:
+            return attribute
+
+        async def interleaved(*args, **kwargs):
+            await self.suspend()
+            result = await attribute(*args, **kwargs)
+            await self.suspend()
+            return result
+
+        return interleaved
+
+    async def bulk_write(self, requests: list, **kwargs):
+        # mongomock can't build the bulk operations of recent pymongo versions.
+        for request in requests:
+            if isinstance(request, DeleteOne):
+                await self.delete_one(request._filter)
+            else:
+                await self.update_one(
+                    request._filter, request._doc, upsert=request._upsert
+                )
+
+
+class InterleavedDatabase:
+    def __init__(self, database, rng: random.Random):
+        self.database = database
+        self.rng = rng
+
+    def __getitem__(self, name: str) -> InterleavedCollection:
+        return InterleavedCollection(self.database[name], self.rng)
+
+    def __getattr__(self, name: str) -> InterleavedCollection:
+        return self[name]
+
+
+class InterleavedClient:
+    def __init__(self):
+        self.client = AsyncMongoMockClient()
+        self.rng = random.Random(0)
+
+    def __getitem__(self, name: str) -> InterleavedDatabase:
+        return InterleavedDatabase(self.client[name], self.rng)
+
+    def get_database(self, name: str, **options) -> InterleavedDatabase:
+        # Write concerns and read preferences don't apply to one in-memory node.
+        return self[name]
+
+    async def drop_database(self, name: str):
+        await self.client.drop_database(name)
+
+    def close(self):
+        pass
+
+
+async def with_database(backend: str, test: Callable[..., Awaitable]):
+    client = (
+        InterleavedClient()
+        if backend == "mongomock"
+        else AsyncIOMotorClient(MONGO_TEST_URI)
+    )
+
+    # `get_database` goes through the manager, so replacing its instance is
+    # enough for every module to use the test database.
+    manager = DatabaseManager.__new__(DatabaseManager)
+    manager.client = client
+    manager.database_name = TEST_DATABASE_NAME
+    manager.initialized = True
+    DatabaseManager._instance = manager
+
+    try:
+        await client.drop_database(TEST_DATABASE_NAME)
+        database = client[TEST_DATABASE_NAME]
+        await ensure_indexes(database)
+        return await test(database)
+    finally:
+        await client.drop_database(TEST_DATABASE_NAME)
+        client.close()
+        DatabaseManager._instance = None
+
+
+@pytest.fixture(params=["mongomock", "mongod"])
+def run_with_database(request) -> Callable[[Callable[..., Awaitable]], object]:
+    """Runs an async test, given the database, against each backend."""
+    if request.param == "mongod" and not MONGO_TEST_URI:
+        pytest.skip("MONGO_TEST_URI is not set.")
+
+    return lambda test: asyncio.run(with_database(request.param, test))
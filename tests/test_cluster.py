@@ -0,0 +1,29 @@
+import random
+
+from rubby.cluster import owned_guilds_filter, owns_guild
+from rubby.misc import Config
+
+GUILDS = 500
+
+
+def test_owned_guilds_filter_matches_owns_guild(run_with_database, monkeypatch):
+    monkeypatch.setattr(Config, "SHARD_COUNT", 16)
+    monkeypatch.setattr(Config, "SHARD_IDS", [3, 4, 5, 11])
+    rng = random.Random(0)
+    # Snowflakes of guilds created up to 2032, with random low bits.
+    guild_ids = [rng.randrange(1 << 22, 1 << 61) for _ in range(GUILDS)]
+
+    async def test(database):
+        await database.giveaways.insert_many(
+            [
+                {"_id": index, "guild_id": guild_id}
+                for index, guild_id in enumerate(guild_ids)
+            ]
+        )
+        matched = await database.giveaways.find(owned_guilds_filter()).to_list(None)
+
+        assert {giveaway["guild_id"] for giveaway in matched} == {
+            guild_id for guild_id in guild_ids if owns_guild(guild_id)
+        }
+
+    run_with_database(test)
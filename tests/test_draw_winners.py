@@ -0,0 +1,172 @@
+import asyncio
+import importlib
+import math
+import random
+from array import array
+from collections import Counter
+
+import pytest
+
+from rubby.misc import Config
+from rubby.models import GiveawayRecord
+
+# The package exports the `draw_winners` function under the module's name.
+draws = importlib.import_module("rubby.functions.giveaways.draw_winners")
+
+ENTRANTS = 40
+PAGE_SIZE = 7
+DRAWS = 20_000
+# Normal quantile of the chi-square tests' significance level (0.001).
+Z_CRITICAL = 3.09
+
+
+def chi_square(observed: Counter, expected: dict) -> float:
+    return sum(
+        (observed[key] - count) ** 2 / count for key, count in expected.items()
+    )
+
+
+def chi_square_critical(degrees: int) -> float:
+    # Wilson-Hilferty approximation of the chi-square quantile.
+    spread = 2 / (9 * degrees)
+    return degrees * (1 - spread + Z_CRITICAL * math.sqrt(spread)) ** 3
+
+
+def assert_distribution(observed: Counter, weights: dict):
+    total = sum(observed.values())
+    weight_sum = sum(weights.values())
+    expected = {key: total * weight / weight_sum for key, weight in weights.items()}
+
+    assert set(observed) <= set(weights)
+    assert chi_square(observed, expected) < chi_square_critical(len(weights) - 1)
+
+
+@pytest.fixture
+def entries(monkeypatch) -> dict[int, int]:
+    """Streams `ENTRANTS` entries, weighted 1 to 4, in pages like the database."""
+    weights = {user_id: 1 + user_id % 4 for user_id in range(1, ENTRANTS + 1)}
+    user_ids = sorted(weights)
+
+    async def iter_entries(giveaway_id):
+        for start in range(0, len(user_ids), PAGE_SIZE):
+            yield [
+                {"user_id": user_id, "weight": weights[user_id]}
+                for user_id in user_ids[start : start + PAGE_SIZE]
+            ]
+
+    async def iter_participants(giveaway_id):
+        async for page in iter_entries(giveaway_id):
+            yield [entry["user_id"] for entry in page]
+
+    monkeypatch.setattr(draws, "iter_entries", iter_entries)
+    monkeypatch.setattr(draws, "iter_participants", iter_participants)
+    return weights
+
+
+def test_alias_table_follows_weights():
+    weights = [0.5, 1, 1, 2, 3, 5, 8, 13]
+    table = draws.AliasTable(array("d", weights))
+    rng = random.Random(0)
+
+    observed = Counter(table.sample(rng) for _ in range(DRAWS * 5))
+    assert_distribution(observed, dict(enumerate(weights)))
+
+
+def test_weighted_sample_is_distinct_and_follows_weights():
+    weights = [1, 1, 2, 3, 5, 8]
+    rng = random.Random(1)
+    first, everyone = Counter(), Counter()
+
+    for _ in range(DRAWS):
+        sample = draws.weighted_sample(
+            array("q", range(len(weights))), array("d", weights), 3, rng
+        )
+        assert len(set(sample)) == 3
+        first[sample[0]] += 1
+        everyone.update(sample)
+
+    assert_distribution(first, dict(enumerate(weights)))
+    # Heavier participants are more likely to be among the winners.
+    assert [everyone[index] for index in range(1, len(weights))] == sorted(
+        everyone[index] for index in range(1, len(weights))
+    )
+
+
+def test_weighted_sample_draws_everyone_when_short():
+    rng = random.Random(2)
+    sample = draws.weighted_sample(
+        array("q", [10, 20, 30]), array("d", [1, 100, 10_000]), 5, rng
+    )
+    assert sorted(sample) == [10, 20, 30]
+
+
+def test_reservoir_sample_is_uniform(entries):
+    size = 5
+    rng = random.Random(3)
+
+    async def sample_all():
+        return [
+            await draws.sample_participants(0, size, rng, excluded=[1, 2])
+            for _ in range(DRAWS)
+        ]
+
+    samples = asyncio.run(sample_all())
+    included, first = Counter(), Counter()
+    for sample in samples:
+        assert len(set(sample)) == size
+        included.update(sample)
+        first[sample[0]] += 1
+
+    eligible = {user_id: 1 for user_id in entries if user_id not in (1, 2)}
+    assert_distribution(included, eligible)
+    # The reservoir is shuffled, so the order of the winners is random too.
+    assert_distribution(first, eligible)
+
+
+def test_weighted_participants_follow_weights(entries):
+    rng = random.Random(4)
+
+    async def sample_all():
+        return [
+            await draws.sample_weighted_participants(0, 1, rng)
+            for _ in range(DRAWS)
+        ]
+
+    observed = Counter(sample[0] for sample in asyncio.run(sample_all()))
+    assert_distribution(observed, entries)
+
+
+def test_rerolls_are_uniform(entries, monkeypatch):
+    winner_count = 2
+    reserved_rerolls = Config.GIVEAWAY_REROLL_RESERVE
+    monkeypatch.setattr(draws.secrets, "randbits", random.Random(5).getrandbits)
+
+    async def reroll_all() -> tuple[Counter, Counter]:
+        from_reserve, past_reserve = Counter(), Counter()
+        for _ in range(DRAWS // 10):
+            giveaway = GiveawayRecord(0, winner_count=winner_count)
+            for field, value in (await draws.draw_winners(giveaway)).items():
+                setattr(giveaway, field, value)
+            reserve = list(giveaway.draw_order)
+
+            for reroll in range(ENTRANTS // winner_count):
+                previous = set(giveaway.draw_order[: giveaway.draw_position])
+                for field, value in (await draws.reroll_winners(giveaway)).items():
+                    setattr(giveaway, field, value)
+                assert not set(giveaway.winners) & previous
+
+                if reroll == 0:
+                    from_reserve.update(giveaway.winners)
+                elif reroll == reserved_rerolls:
+                    past_reserve.update(giveaway.winners)
+
+            # Rerolls hand out the reserve first, then sample the others.
+            assert giveaway.draw_order[: len(reserve)] == reserve
+            assert sorted(giveaway.draw_order) == sorted(entries)
+        return from_reserve, past_reserve
+
+    # Over many draws, anyone is as likely to be rerolled in at any point.
+    from_reserve, past_reserve = asyncio.run(reroll_all())
+    uniform = dict.fromkeys(entries, 1)
+    assert_distribution(from_reserve, uniform)
+    assert_distribution(past_reserve, uniform)
@@ -0,0 +1,193 @@
+import asyncio
+import contextlib
+import random
+import types
+
+import pendulum
+import pytest
+from pymongo.errors import NetworkTimeout
+
+from rubby.database import get_database
+from rubby.functions.giveaways import giveaway_entries
+from rubby.functions.giveaways.giveaway_entries import toggle_participant
+from rubby.functions.write_behind import Operation, write_behind
+from rubby.misc import Config
+from rubby.schema import recount_participants
+
+GIVEAWAY_ID = 1_300_000_000_000_000_000
+USER_ID_START = 1_310_000_000_000_000_000
+USERS = 200
+CLICKS = 3_000
+
+
+@pytest.fixture(params=[False, True], ids=["direct", "write-behind"])
+def write_behind_enabled(request, monkeypatch, tmp_path) -> bool:
+    monkeypatch.setattr(Config, "WRITE_BEHIND", request.param)
+    monkeypatch.setattr(Config, "WRITE_BEHIND_FSYNC", False)
+    monkeypatch.setattr(Config, "WRITE_BEHIND_JOURNAL_DIR", tmp_path)
+    return request.param
+
+
+def random_clicks(seed: int) -> list[int]:
+    # Few users for many clicks, so most users click several times at once.
+    rng = random.Random(seed)
+    return [USER_ID_START + rng.randrange(USERS) for _ in range(CLICKS)]
+
+
+def toggled(clicks: list[int]) -> set[int]:
+    entries = set()
+    for user_id in clicks:
+        entries ^= {user_id}
+    return entries
+
+
+async def click_all(clicks: list[int]) -> list:
+    return await asyncio.gather(
+        *(toggle_participant(GIVEAWAY_ID, user_id) for user_id in clicks)
+    )
+
+
+async def read_state(database) -> tuple[set[int], int]:
+    entries = await database.giveaway_entries.find(
+        {"giveaway_id": GIVEAWAY_ID}
+    ).to_list(None)
+    giveaway = await database.giveaways.find_one({"_id": GIVEAWAY_ID})
+    return {entry["user_id"] for entry in entries}, giveaway["participant_count"]
+
+
+async def with_toggles(database, test):
+    # The write-behind's events are bound to the event loop of each test.
+    write_behind.__init__()
+    await database.giveaways.insert_one(
+        {"_id": GIVEAWAY_ID, "ended": False, "participant_count": 0}
+    )
+    await write_behind.start()
+    try:
+        await test()
+    finally:
+        await write_behind.close()
+
+
+def test_concurrent_toggles(run_with_database, write_behind_enabled):
+    clicks = random_clicks(0)
+
+    async def test(database):
+        async def toggle():
+            results = await click_all(clicks)
+            assert None not in results
+
+        await with_toggles(database, toggle)
+
+        entries, participant_count = await read_state(database)
+        assert entries == toggled(clicks)
+        assert participant_count == len(entries)
+
+    run_with_database(test)
+
+
+def test_toggles_after_giveaway_ended(run_with_database, write_behind_enabled):
+    clicks, late_clicks = random_clicks(1), random_clicks(2)
+
+    async def test(database):
+        async def toggle():
+            await click_all(clicks)
+            await write_behind.flush()
+            await database.giveaways.update_one(
+                {"_id": GIVEAWAY_ID}, {"$set": {"ended": True}}
+            )
+
+            # Every late click is undone, even when several of them race on
+            # the same entry.
+            results = await click_all(late_clicks)
+            assert results == [None] * len(late_clicks)
+
+        await with_toggles(database, toggle)
+
+        entries, participant_count = await read_state(database)
+        assert entries == toggled(clicks)
+        assert participant_count == len(entries)
+
+    run_with_database(test)
+
+
+def test_count_recovers_from_failed_increment(run_with_database, monkeypatch):
+    async def fail_increment(*args, **kwargs):
+        raise NetworkTimeout("timed out")
+
+    @contextlib.asynccontextmanager
+    async def database_operation(operation_class):
+        database = await get_database()
+        # Only the entry is written, as when the process stops in between.
+        yield types.SimpleNamespace(
+            giveaway_entries=database.giveaway_entries,
+            giveaways=types.SimpleNamespace(find_one_and_update=fail_increment),
+        )
+
+    async def test(database):
+        write_behind.__init__()
+        await database.giveaways.insert_one(
+            {"_id": GIVEAWAY_ID, "ended": False, "participant_count": 0}
+        )
+
+        with monkeypatch.context() as patch:
+            patch.setattr(giveaway_entries, "database_operation", database_operation)
+            with pytest.raises(NetworkTimeout):
+                await toggle_participant(GIVEAWAY_ID, USER_ID_START)
+
+        entries, participant_count = await read_state(database)
+        assert (entries, participant_count) == ({USER_ID_START}, 0)
+
+        await recount_participants(database)
+        entries, participant_count = await read_state(database)
+        assert participant_count == len(entries) == 1
+
+    run_with_database(test)
+
+
+def test_retried_increments_apply_once(run_with_database):
+    async def test(database):
+        await database.giveaways.insert_one(
+            {"_id": GIVEAWAY_ID, "ended": False, "participant_count": 0}
+        )
+        batches = [
+            [
+                Operation(
+                    "giveaways",
+                    {"_id": GIVEAWAY_ID},
+                    {"$inc": {"participant_count": 1}},
+                    seq=seq,
+                )
+                for seq in seqs
+            ]
+            for seqs in ([1, 2], [1, 2, 3], [3, 4])
+        ]
+
+        # As when a batch is retried and the journal replayed after a crash.
+        for batch in batches:
+            await write_behind._write(batch)
+
+        _, participant_count = await read_state(database)
+        assert participant_count == 4
+
+    run_with_database(test)
+
+
+def test_write_behind_refused_on_shared_shards(
+    run_with_database, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(Config, "WRITE_BEHIND", True)
+    monkeypatch.setattr(Config, "WRITE_BEHIND_JOURNAL_DIR", tmp_path)
+
+    async def test(database):
+        write_behind.__init__()
+        await database.clusters.insert_one(
+            {"_id": "other", "shard_ids": [0], "updated_at": pendulum.now("UTC")}
+        )
+
+        await write_behind.start()
+        try:
+            assert not write_behind.enabled
+        finally:
+            await write_behind.close()
+
+    run_with_database(test)
@@ -0,0 +1,92 @@
+import asyncio
+import types
+
+import disnake
+import pendulum
+import pytest
+
+from rubby.functions.giveaways.giveaway_scheduler import GiveawayScheduler
+from rubby.misc import Config
+
+GIVEAWAY_ID = 1_320_000_000_000_000_000
+
+
+@pytest.fixture(autouse=True)
+def intervals(monkeypatch):
+    monkeypatch.setattr(Config, "GIVEAWAY_POLL_INTERVAL", 0.05)
+    monkeypatch.setattr(Config, "GIVEAWAY_END_RETRY_DELAY", 0)
+    monkeypatch.setattr(Config, "GIVEAWAY_END_MAX_ATTEMPTS", 3)
+
+
+async def insert_giveaway(database) -> pendulum.DateTime:
+    end_date = pendulum.now("UTC").subtract(seconds=1)
+    await database.giveaways.insert_one(
+        {
+            "_id": GIVEAWAY_ID,
+            "guild_id": 1,
+            "ended": False,
+            "finished_configuring": True,
+            "end_date": end_date,
+        }
+    )
+    return end_date
+
+
+async def tick_until(scheduler: GiveawayScheduler, handler, calls: list, count: int):
+    async def tick():
+        while len(calls) < count:
+            await scheduler.tick(handler)
+
+    await asyncio.wait_for(tick(), timeout=2)
+
+
+def test_giveaway_created_elsewhere_is_loaded(run_with_database):
+    async def test(database):
+        creator, other = GiveawayScheduler(), GiveawayScheduler()
+        await creator.load()
+        await other.load()
+
+        # Created through the first process, which then stops: only the
+        # other one is left to end it.
+        creator.schedule(GIVEAWAY_ID, await insert_giveaway(database))
+        assert len(other) == 0
+
+        ended = []
+
+        async def end_giveaway(giveaway_id: int) -> bool:
+            ended.append(giveaway_id)
+            return True
+
+        await tick_until(other, end_giveaway, ended, 1)
+        assert ended == [GIVEAWAY_ID]
+
+    run_with_database(test)
+
+
+@pytest.mark.parametrize(
+    "error, attempts",
+    [
+        (disnake.Forbidden(types.SimpleNamespace(status=403, reason=""), ""), 1),
+        (RuntimeError("Temporary failure."), 3),
+    ],
+    ids=["forbidden", "transient"],
+)
+def test_failing_giveaway_is_given_up_on(run_with_database, error, attempts):
+    async def test(database):
+        await insert_giveaway(database)
+        scheduler = GiveawayScheduler()
+        calls = []
+
+        async def end_giveaway(giveaway_id: int) -> bool:
+            calls.append(giveaway_id)
+            raise error
+
+        await tick_until(scheduler, end_giveaway, calls, attempts)
+        # Nor is it loaded again from the database.
+        await asyncio.sleep(Config.GIVEAWAY_POLL_INTERVAL)
+        await scheduler.load()
+
+        assert len(calls) == attempts
+        assert len(scheduler) == 0
+
+    run_with_database(test)
@@ -0,0 +1,51 @@
+import asyncio
+import inspect
+import logging
+
+from disnake.http import HTTPClient
+
+from rubby.metrics import (
+    BUCKET_RATE_LIMIT_MESSAGE,
+    GLOBAL_RATE_LIMIT_MESSAGE,
+    REST_RATE_LIMITS,
+    RateLimitHandler,
+)
+
+
+def rate_limits() -> dict[str, float]:
+    return {
+        scope: REST_RATE_LIMITS.values.get((scope,), 0)
+        for scope in ("bucket", "global")
+    }
+
+
+def test_rate_limits_are_counted_once():
+    logger = logging.getLogger("tests.rate_limits")
+    logger.propagate = False
+    logger.addHandler(RateLimitHandler(logging.WARNING))
+
+    async def hit_rate_limits():
+        # As disnake logs them: a bucket 429, then a global one.
+        logger.warning(BUCKET_RATE_LIMIT_MESSAGE, 1.5, "bucket")
+        await asyncio.sleep(0)
+        logger.warning(BUCKET_RATE_LIMIT_MESSAGE, 0.5, "bucket")
+        logger.warning(GLOBAL_RATE_LIMIT_MESSAGE, 0.5)
+        await asyncio.sleep(0)
+
+    before = rate_limits()
+    asyncio.run(hit_rate_limits())
+    after = rate_limits()
+
+    assert after["bucket"] - before["bucket"] == 1
+    assert after["global"] - before["global"] == 1
+
+
+def test_rate_limit_messages_match_disnake():
+    source = inspect.getsource(HTTPClient.request)
+    bucket = source.index(repr(BUCKET_RATE_LIMIT_MESSAGE))
+    global_ = source.index(f'"{GLOBAL_RATE_LIMIT_MESSAGE}"')
+
+    # Global 429s are logged right after their bucket message, before the
+    # client sleeps, which is what counting them apart relies on.
+    assert bucket < global_ < source.index("await asyncio.sleep(retry_after)")
+    assert "await" not in source[bucket:global_]
@@ -0,0 +1,78 @@
+import asyncio
+
+import pendulum
+import pytest
+
+from rubby import schema
+from rubby.misc import Config
+from rubby.schema import run_migrations
+
+CLUSTERS = 5
+
+
+@pytest.fixture
+def migrations(monkeypatch) -> list[int]:
+    """Replaces the migrations with one that records each of its runs."""
+    runs = []
+
+    async def migration(database):
+        runs.append(1)
+        # Long enough for the other clusters to try claiming it meanwhile.
+        await asyncio.sleep(0.05)
+
+    monkeypatch.setattr(schema, "MIGRATIONS", [(1, "Test migration", migration)])
+    monkeypatch.setattr(Config, "MIGRATION_POLL_INTERVAL", 0.01)
+    return runs
+
+
+async def is_applied(database) -> bool:
+    migration = await database.schema_migrations.find_one({"_id": 1})
+    return "applied_at" in migration and "lease_expires" not in migration
+
+
+def test_concurrent_clusters_run_migrations_once(run_with_database, migrations):
+    async def test(database):
+        await asyncio.gather(*(run_migrations(database) for _ in range(CLUSTERS)))
+        assert migrations == [1]
+        assert await is_applied(database)
+
+        # Applied migrations are skipped on the next start.
+        await run_migrations(database)
+        assert migrations == [1]
+
+    run_with_database(test)
+
+
+def test_expired_lease_is_taken_over(run_with_database, migrations):
+    async def test(database):
+        await database.schema_migrations.insert_one(
+            {"_id": 1, "lease_expires": pendulum.now("UTC").subtract(seconds=1)}
+        )
+        await run_migrations(database)
+        assert migrations == [1]
+        assert await is_applied(database)
+
+    run_with_database(test)
+
+
+def test_waits_for_migration_leased_elsewhere(run_with_database, migrations):
+    async def test(database):
+        await database.schema_migrations.insert_one(
+            {"_id": 1, "lease_expires": pendulum.now("UTC").add(minutes=1)}
+        )
+
+        async def apply_elsewhere():
+            await asyncio.sleep(0.05)
+            await database.schema_migrations.update_one(
+                {"_id": 1},
+                {
+                    "$set": {"applied_at": pendulum.now("UTC")},
+                    "$unset": {"lease_expires": ""},
+                },
+            )
+
+        await asyncio.gather(run_migrations(database), apply_elsewhere())
+        assert migrations == []
+        assert await is_applied(database)
+
+    run_with_database(test)
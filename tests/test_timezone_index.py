@@ -0,0 +1,46 @@
+import types
+
+import pendulum
+import pytest
+
+from rubby.functions import timezone_index
+from rubby.functions.timezone_index import TimezoneIndex
+
+WINTER = pendulum.datetime(2030, 1, 15, 12).timestamp()
+SUMMER = pendulum.datetime(2030, 7, 15, 12).timestamp()
+
+
+@pytest.fixture(scope="module")
+def index() -> TimezoneIndex:
+    return TimezoneIndex(pendulum.timezones())
+
+
+@pytest.mark.parametrize(
+    "query, timezone",
+    [
+        ("new york", "America/New_York"),
+        ("New-York", "America/New_York"),
+        ("america/new york", "America/New_York"),
+        ("port au prince", "America/Port-au-Prince"),
+        ("europe/pa", "Europe/Paris"),
+        ("est", "America/New_York"),
+    ],
+)
+def test_search_normalizes_separators(index, query, timezone):
+    assert timezone in index.search(query)
+
+
+def test_offsets_follow_dst(index, monkeypatch):
+    now = [WINTER]
+    monkeypatch.setattr(
+        timezone_index, "time", types.SimpleNamespace(time=lambda: now[0])
+    )
+    index.offsets_expire = 0.0
+
+    assert "America/New_York" in index.search("utc-5", 1_000)
+    assert "America/New_York" not in index.search("utc-4", 1_000)
+
+    # Cached results are dropped along with the offsets they were ranked by.
+    now[0] = SUMMER
+    assert "America/New_York" in index.search("utc-4", 1_000)
+    assert "America/New_York" not in index.search("utc-5", 1_000)